@@ -0,0 +1,209 @@
+# AsrModels.py
+#
+# Registro dos modelos de ASR (checkpoints wav2vec2 CTC em francês) e a
+# política que escolhe o modelo de cada pedido. Com um modelo só (padrão),
+# tudo vai para ele, como antes. Com um segundo checkpoint menor, vão para o
+# modelo leve:
+#
+#   - clipes curtos (um "bonjour madame" não precisa do xls-r 1B);
+#   - categorias de exercício configuradas;
+#   - tudo, quando a fila de ASR passa de uma fração do orçamento (pressão);
+#   - o pedido que o modelo grande faria recusar com 503 (fila cheia): o custo
+#     estimado do leve é menor e ele ainda cabe no orçamento.
+#
+# Variáveis de ambiente:
+#   ASR_MODELS             nome=checkpoint separados por vírgula; o primeiro é o padrão
+#   ASR_SMALL_MODEL        nome do modelo leve (padrão: o último de ASR_MODELS, se houver mais de um)
+#   ASR_SMALL_MAX_SECONDS  clipes até essa duração vão ao leve (padrão: 2.0; 0 desliga)
+#   ASR_SMALL_CATEGORIES   categorias de exercício que usam o leve, separadas por vírgula
+#   ASR_DEGRADE_PRESSURE   fração de max_queued_seconds na fila acima da qual tudo vai ao leve
+#                          (padrão: 0.5; 0 desliga)
+#
+# O custo de cada modelo no AsrScheduler é relativo ao padrão: a razão entre
+# os fatores tempo-real medidos (média móvel) ou, antes da primeira medição,
+# entre os números de parâmetros.
+# Precisão e latência por modelo num conjunto local: python -m benchmarks.asr_eval
+
+import os
+import logging
+import threading
+
+import Metrics
+from Cancellation import check_active
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_ASR_MODELS = 'large=jonatasgrosman/wav2vec2-xls-r-1b-french'
+RTF_SMOOTHING = 0.2
+
+ASR_MODEL_REQUESTS = Metrics.counter(
+    'pronunciation_asr_model_requests_total',
+    'Pedidos de ASR por modelo e motivo da escolha (default, duration, category, '
+    'pressure, overload).',
+    ('model', 'reason')
+)
+ASR_MODEL_SECONDS = Metrics.histogram(
+    'pronunciation_asr_model_seconds',
+    'Tempo do forward do wav2vec2 por modelo.',
+    ('model',)
+)
+
+
+class AsrModel:
+    """Processor + modelo CTC de um checkpoint, com o fator tempo-real medido."""
+
+    def __init__(self, name, checkpoint, processor, model):
+        self.name = name
+        self.checkpoint = checkpoint
+        self.processor = processor
+        self.model = model
+        self.parameters = sum(p.numel() for p in model.parameters())
+        self.rtf = None
+        self._lock = threading.Lock()
+        install_cancel_checks(model)
+
+    def observe(self, audio_seconds, elapsed):
+        """Atualiza o fator tempo-real (segundos de forward / segundo de áudio)."""
+        ASR_MODEL_SECONDS.observe(elapsed, model=self.name)
+        if audio_seconds <= 0:
+            return
+        with self._lock:
+            rtf = elapsed / audio_seconds
+            self.rtf = rtf if self.rtf is None else self.rtf + RTF_SMOOTHING * (rtf - self.rtf)
+
+    def as_dict(self):
+        return {
+            'name': self.name,
+            'checkpoint': self.checkpoint,
+            'parameters': self.parameters,
+            'rtf': round(self.rtf, 4) if self.rtf is not None else None,
+        }
+
+
+def install_cancel_checks(model):
+    """
+    Verifica o token ativo (Cancellation.active) antes de cada camada
+    convolucional e de cada camada do transformer do wav2vec2: o forward é
+    um só (sem cortar palavras entre blocos) e ainda para logo ao cancelar.
+    """
+    wav2vec2 = getattr(model, 'wav2vec2', model)
+    layers = [*getattr(getattr(wav2vec2, 'feature_extractor', None), 'conv_layers', ()),
+              *getattr(getattr(wav2vec2, 'encoder', None), 'layers', ())]
+    for layer in layers:
+        layer.register_forward_pre_hook(lambda module, inputs: check_active())
+    return len(layers)
+
+
+def parse_model_specs(spec):
+    """'large=org/ckpt-1b,base=org/ckpt-base' -> [('large', 'org/ckpt-1b'), ('base', 'org/ckpt-base')]."""
+    specs = []
+    for part in spec.split(','):
+        part = part.strip()
+        if not part:
+            continue
+        name, sep, checkpoint = part.partition('=')
+        if not sep:
+            name, checkpoint = part.rstrip('/').rsplit('/', 1)[-1], part
+        specs.append((name.strip(), checkpoint.strip()))
+    if not specs:
+        raise ValueError(f"ASR_MODELS vazio: {spec!r}")
+    names = [name for name, _ in specs]
+    if len(set(names)) != len(names):
+        raise ValueError(f"Nomes repetidos em ASR_MODELS: {spec!r}")
+    return specs
+
+
+class ModelRegistry:
+    """Modelos carregados por nome; o primeiro é o padrão e `small` o de degradação."""
+
+    def __init__(self, models, small=None):
+        self.models = {m.name: m for m in models}
+        self.default = models[0]
+        self.small = self.get(small) if small else None
+        if self.small is self.default:
+            self.small = None
+
+    @classmethod
+    def from_env(cls, loader):
+        """loader(checkpoint) -> (processor, model), ex.: from_pretrained do transformers."""
+        models = []
+        for name, checkpoint in parse_model_specs(os.environ.get('ASR_MODELS', DEFAULT_ASR_MODELS)):
+            processor, model = loader(checkpoint)
+            models.append(AsrModel(name, checkpoint, processor, model))
+            logger.info(f"Modelo de ASR '{name}' carregado: {checkpoint} "
+                        f"({models[-1].parameters / 1e6:.0f}M parâmetros)")
+        small = os.environ.get('ASR_SMALL_MODEL') or (models[-1].name if len(models) > 1 else None)
+        return cls(models, small)
+
+    def get(self, name):
+        """Modelo pelo nome; None ou '' -> o padrão."""
+        if not name:
+            return self.default
+        try:
+            return self.models[name]
+        except KeyError:
+            raise ValueError(f"Modelo de ASR desconhecido: {name!r}") from None
+
+    def relative_cost(self, asr_model):
+        """Custo de `asr_model` por segundo de áudio em relação ao modelo padrão."""
+        if asr_model is self.default:
+            return 1.0
+        if asr_model.rtf is not None and self.default.rtf is not None:
+            return asr_model.rtf / self.default.rtf
+        return asr_model.parameters / self.default.parameters
+
+    def stats(self):
+        return {
+            'default': self.default.name,
+            'small': self.small.name if self.small else None,
+            'models': [dict(m.as_dict(), relative_cost=round(self.relative_cost(m), 3))
+                       for m in self.models.values()],
+        }
+
+
+class RoutingPolicy:
+    """Escolhe o modelo de cada pedido por duração, categoria e pressão na fila de ASR."""
+
+    def __init__(self, registry, small_max_seconds=2.0, small_categories=(), degrade_pressure=0.5):
+        self.registry = registry
+        self.small_max_seconds = small_max_seconds
+        self.small_categories = frozenset(small_categories)
+        self.degrade_pressure = degrade_pressure
+
+    @classmethod
+    def from_env(cls, registry):
+        categories = os.environ.get('ASR_SMALL_CATEGORIES', '')
+        return cls(
+            registry,
+            small_max_seconds=float(os.environ.get('ASR_SMALL_MAX_SECONDS', '2.0')),
+            small_categories=[c.strip() for c in categories.split(',') if c.strip()],
+            degrade_pressure=float(os.environ.get('ASR_DEGRADE_PRESSURE', '0.5')),
+        )
+
+    def choose(self, audio_seconds, category=None, pressure=0.0):
+        """
+        (modelo, motivo) para um clipe de `audio_seconds` da categoria
+        `category`, com a fila de ASR em `pressure` (fração do orçamento).
+        """
+        small = self.registry.small
+        if small is None:
+            return self.registry.default, 'default'
+        if category in self.small_categories:
+            return small, 'category'
+        if 0 < audio_seconds <= self.small_max_seconds:
+            return small, 'duration'
+        if self.degrade_pressure > 0 and pressure >= self.degrade_pressure:
+            return small, 'pressure'
+        return self.registry.default, 'default'
+
+    def fallback(self, asr_model):
+        """Modelo para tentar de novo quando `asr_model` não cabe na fila (None: não há)."""
+        small = self.registry.small
+        return small if small is not None and small is not asr_model else None
+
+    def as_dict(self):
+        return {
+            'small_max_seconds': self.small_max_seconds,
+            'small_categories': sorted(self.small_categories),
+            'degrade_pressure': self.degrade_pressure,
+        }
@@ -0,0 +1,202 @@
+# AsrScheduler.py
+#
+# Escalonador dos jobs de ASR com controle de admissão.
+#
+# Substitui o ThreadPoolExecutor FIFO: cada job tem um custo estimado a partir
+# da duração do áudio e os mais curtos passam na frente (shortest-job-first).
+# Para não deixar clipes longos esperando para sempre, a prioridade envelhece:
+#
+#     prioridade = custo_estimado - AGING_RATE * tempo_na_fila
+#
+# Como o envelhecimento é linear e igual para todos, a ordem relativa não muda
+# enquanto os jobs esperam, então basta um heap com a chave
+# custo_estimado + AGING_RATE * instante_de_entrada.
+#
+# A soma dos custos na fila é limitada por `max_queued_seconds`; acima disso o
+# submit falha na hora com SchedulerOverloaded (a rota responde 503 +
+# Retry-After) em vez de estourar o timeout de 120 s.
+#
+# Um Future cancelado enquanto espera (future.cancel()) sai do heap e libera o
+# orçamento na hora: a profundidade da fila e a admissão só contam jobs vivos.
+# Jobs que terminam com OperationCancelled também contam como cancelados.
+
+import math
+import time
+import heapq
+import logging
+import itertools
+import threading
+from collections import deque
+from concurrent.futures import Future
+
+from Cancellation import OperationCancelled
+import Metrics
+
+logger = logging.getLogger(__name__)
+
+
+class SchedulerOverloaded(Exception):
+    """A fila de ASR excedeu o orçamento de segundos; tente após `retry_after` s."""
+
+    def __init__(self, retry_after):
+        super().__init__(f"Fila de ASR cheia, tente novamente em {retry_after} s.")
+        self.retry_after = retry_after
+
+
+class AsrScheduler:
+    """
+    Pool de threads com fila por prioridade (SJF + envelhecimento).
+
+    - workers: threads que executam o ASR em paralelo
+    - max_queued_seconds: orçamento total de custo estimado (s) aguardando na fila
+    - aging_rate: quantos segundos de custo um job "perde" por segundo de espera
+    - initial_rtf: fator tempo-real inicial (tempo de ASR / duração do áudio);
+      é atualizado por média móvel exponencial a cada job concluído
+    - initializer: chamado uma vez no início de cada thread (como no
+      ThreadPoolExecutor), ex.: configurar as threads do torch
+    """
+
+    def __init__(self, workers=2, max_queued_seconds=60.0, aging_rate=0.5,
+                 initial_rtf=0.5, overhead_seconds=0.2, initializer=None):
+        self.max_queued_seconds = max_queued_seconds
+        self.aging_rate = aging_rate
+        self.overhead_seconds = overhead_seconds
+        self.rtf = initial_rtf
+        self.initializer = initializer
+
+        self._heap = []
+        self._sequence = itertools.count()
+        self._cond = threading.Condition()
+        self._queued_cost = 0.0
+        self._running = 0
+        self._running_cost = 0.0
+        self._completed = 0
+        self._rejected = 0
+        self._cancelled = 0
+        self._wait_times = deque(maxlen=500)
+
+        self._threads = []
+        for i in range(workers):
+            t = threading.Thread(target=self._worker, name=f'asr-worker-{i}', daemon=True)
+            t.start()
+            self._threads.append(t)
+        self.workers = workers
+
+    def estimate_cost(self, audio_seconds):
+        """Custo estimado (s de processamento) para um áudio de `audio_seconds`."""
+        return self.overhead_seconds + max(audio_seconds, 0.0) * self.rtf
+
+    def submit(self, fn, *args, audio_seconds=0.0, **kwargs):
+        """
+        Enfileira fn(*args, **kwargs) e retorna um Future.
+        Levanta SchedulerOverloaded se o orçamento de fila seria excedido.
+        """
+        future = Future()
+        with self._cond:
+            cost = self.estimate_cost(audio_seconds)
+            # Um job sozinho sempre é aceito com a fila vazia, mesmo se for maior que o orçamento
+            if self._heap and self._queued_cost + cost > self.max_queued_seconds:
+                self._rejected += 1
+                raise SchedulerOverloaded(self._retry_after())
+            enqueued_at = time.monotonic()
+            key = cost + self.aging_rate * enqueued_at
+            heapq.heappush(self._heap, (key, next(self._sequence), enqueued_at, cost,
+                                        audio_seconds, future, fn, args, kwargs))
+            self._queued_cost += cost
+            self._cond.notify()
+        future.add_done_callback(lambda f: self._on_cancelled_in_queue(f, cost))
+        return future
+
+    def _on_cancelled_in_queue(self, future, cost):
+        # Só chega aqui cancelado se ainda estava na fila (cancel() falha depois de iniciado)
+        if future.cancelled():
+            with self._cond:
+                self._queued_cost -= cost
+                self._cancelled += 1
+                # A fila é limitada pelo orçamento: refazer o heap sem a entrada é barato.
+                # Se um worker já a tirou do heap, ele a descarta sozinho.
+                live = [entry for entry in self._heap if entry[5] is not future]
+                if len(live) != len(self._heap):
+                    heapq.heapify(live)
+                    self._heap = live
+
+    def stats(self):
+        """Profundidade da fila, custo enfileirado e estatísticas de espera."""
+        with self._cond:
+            waits = sorted(self._wait_times)
+            return {
+                'queue_depth': len(self._heap),
+                'queued_seconds': round(self._queued_cost, 3),
+                'max_queued_seconds': self.max_queued_seconds,
+                'running': self._running,
+                'workers': self.workers,
+                'completed': self._completed,
+                'rejected': self._rejected,
+                'cancelled': self._cancelled,
+                'rtf': round(self.rtf, 4),
+                'wait_seconds': {
+                    'count': len(waits),
+                    'mean': round(sum(waits) / len(waits), 4) if waits else 0.0,
+                    'p50': round(_percentile(waits, 0.50), 4),
+                    'p95': round(_percentile(waits, 0.95), 4),
+                    'max': round(waits[-1], 4) if waits else 0.0,
+                },
+            }
+
+    def _retry_after(self):
+        # Tempo aproximado para esvaziar a fila atual com todos os workers
+        backlog = self._queued_cost + self._running_cost
+        return max(1, int(math.ceil(backlog / max(self.workers, 1))))
+
+    def _worker(self):
+        if self.initializer is not None:
+            try:
+                self.initializer()
+            except Exception:
+                logger.exception("Falha no initializer do worker de ASR")
+        while True:
+            with self._cond:
+                while not self._heap:
+                    self._cond.wait()
+                (_key, _seq, enqueued_at, cost, audio_seconds,
+                 future, fn, args, kwargs) = heapq.heappop(self._heap)
+                if not future.set_running_or_notify_cancel():
+                    # Cancelado entre o pop e o callback: o custo é descontado no callback
+                    continue
+                self._queued_cost -= cost
+                self._running += 1
+                self._running_cost += cost
+                wait = time.monotonic() - enqueued_at
+                self._wait_times.append(wait)
+            Metrics.STAGE_SECONDS.observe(wait, stage='asr_queue_wait')
+
+            start = time.monotonic()
+            cancelled = False
+            try:
+                result = fn(*args, **kwargs)
+            except OperationCancelled as e:
+                cancelled = True
+                future.set_exception(e)
+            except BaseException as e:
+                future.set_exception(e)
+            else:
+                future.set_result(result)
+            finally:
+                elapsed = time.monotonic() - start
+                with self._cond:
+                    self._running -= 1
+                    self._running_cost -= cost
+                    if cancelled:
+                        self._cancelled += 1
+                    else:
+                        self._completed += 1
+                    if audio_seconds > 0 and not cancelled:
+                        observed = max(elapsed - self.overhead_seconds, 0.0) / audio_seconds
+                        self.rtf = 0.8 * self.rtf + 0.2 * observed
+
+
+def _percentile(sorted_values, q):
+    if not sorted_values:
+        return 0.0
+    idx = min(len(sorted_values) - 1, int(round(q * (len(sorted_values) - 1))))
+    return sorted_values[idx]
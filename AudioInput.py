@@ -0,0 +1,106 @@
+# AudioInput.py
+#
+# Contrato de upload do gravador do navegador: WAV PCM 16 bits, mono, 16 kHz
+# (templates/index.html reamostra com OfflineAudioContext antes de enviar). O
+# cabeçalho RIFF declara o formato; nesse caso o servidor não decodifica,
+# não mistura canais nem reamostra: as amostras são vistas direto nos bytes
+# do arquivo (np.frombuffer, sem cópia) e só convertidas para float32 na
+# mesma escala do torchaudio.load (int16 / 32768).
+#
+# Qualquer outro formato (WAV de outra taxa, estéreo ou float; WebM/Ogg com
+# Opus; MP4; MP3) continua pelo caminho com torchaudio (main.load_waveform).
+# sniff_format dá o rótulo de formato das métricas de carga por formato. Um
+# WAV sem nenhuma amostra no chunk data é recusado (EmptyAudio -> 400) antes
+# de chegar ao noisereduce.
+
+import struct
+
+import numpy as np
+
+FAST_SAMPLE_RATE = 16000
+FAST_FORMAT = 'wav_pcm16_16k_mono'
+
+WAVE_FORMAT_PCM = 0x0001
+WAVE_FORMAT_EXTENSIBLE = 0xFFFE
+# Os 2 primeiros bytes do SubFormat GUID de WAVE_FORMAT_EXTENSIBLE repetem o código do formato
+_EXTENSIBLE_SUBFORMAT_OFFSET = 24
+
+
+class EmptyAudio(Exception):
+    """WAV cujo chunk data não tem nenhuma amostra."""
+
+
+def parse_wav_header(data):
+    """
+    Cabeçalho de um WAV RIFF: {format, channels, sample_rate, bits, data_offset,
+    data_size}, ou None se `data` não for WAV. Pula chunks desconhecidos (LIST...).
+    """
+    if len(data) < 12 or data[:4] != b'RIFF' or data[8:12] != b'WAVE':
+        return None
+    fmt = None
+    pos = 12
+    while pos + 8 <= len(data):
+        chunk_id = data[pos:pos + 4]
+        chunk_size = struct.unpack_from('<I', data, pos + 4)[0]
+        body = pos + 8
+        if chunk_id == b'fmt ' and chunk_size >= 16:
+            audio_format, channels, sample_rate, _byte_rate, _align, bits = \
+                struct.unpack_from('<HHIIHH', data, body)
+            if audio_format == WAVE_FORMAT_EXTENSIBLE and chunk_size >= 40:
+                audio_format = struct.unpack_from('<H', data, body + _EXTENSIBLE_SUBFORMAT_OFFSET)[0]
+            fmt = {'format': audio_format, 'channels': channels,
+                   'sample_rate': sample_rate, 'bits': bits}
+        elif chunk_id == b'data':
+            if fmt is None:
+                return None
+            # Gravadores em streaming deixam o tamanho em 0 ou 0xFFFFFFFF: vale o que chegou
+            size = min(chunk_size, len(data) - body) if chunk_size else len(data) - body
+            return dict(fmt, data_offset=body, data_size=size)
+        pos = body + chunk_size + (chunk_size & 1)
+    return None
+
+
+def is_empty_wav(data):
+    """Se `data` é um WAV cujo chunk data não tem nem um quadro inteiro."""
+    header = parse_wav_header(data)
+    if header is None:
+        return False
+    frame_bytes = max(1, header['channels'] * header['bits'] // 8)
+    return header['data_size'] < frame_bytes
+
+
+def sniff_format(data):
+    """Rótulo do formato do upload pelos primeiros bytes."""
+    header = parse_wav_header(data)
+    if header is not None:
+        if (header['format'] == WAVE_FORMAT_PCM and header['bits'] == 16
+                and header['channels'] == 1 and header['sample_rate'] == FAST_SAMPLE_RATE):
+            return FAST_FORMAT
+        return 'wav'
+    if data[:4] == b'OggS':
+        return 'ogg'
+    if data[:4] == b'\x1aE\xdf\xa3':
+        return 'webm'
+    if data[4:8] == b'ftyp':
+        return 'mp4'
+    if data[:3] == b'ID3' or data[:2] in (b'\xff\xfb', b'\xff\xf3', b'\xff\xf2'):
+        return 'mp3'
+    return 'other'
+
+
+def pcm16_samples(data, out=None):
+    """
+    Amostras float32 (1-D) de um WAV FAST_FORMAT, ou None se o arquivo não
+    estiver nesse formato. Só a conversão int16 -> float32 escreve memória:
+    num array novo ou em `out` (callable n -> array float32 de n amostras,
+    ex.: AudioPreprocess.scratch().take).
+    """
+    header = parse_wav_header(data)
+    if header is None or (header['format'], header['bits'], header['channels'],
+                          header['sample_rate']) != (WAVE_FORMAT_PCM, 16, 1, FAST_SAMPLE_RATE):
+        return None
+    pcm = np.frombuffer(data, dtype='<i2', count=header['data_size'] // 2, offset=header['data_offset'])
+    samples = out(pcm.size) if out is not None else np.empty(pcm.size, dtype=np.float32)
+    # 1/32768 é potência de 2: o resultado é exato, igual ao do torchaudio.load
+    np.multiply(pcm, np.float32(1.0 / 32768), out=samples)
+    return samples
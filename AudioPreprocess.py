@@ -0,0 +1,97 @@
+# AudioPreprocess.py
+#
+# Pré-processamento do áudio antes do wav2vec2 sobre um único buffer float32.
+# Antes, cada etapa devolvia uma cópia: tensor -> .numpy() -> noisereduce ->
+# torch.tensor (cópia) -> divisão pelo RMS (outra) -> processor_asr
+# (np.asarray + normalização média zero/variância um + torch.tensor: mais
+# três). Aqui:
+#
+#   - a carga do WAV do gravador escreve direto num buffer de rascunho da
+#     thread (ScratchBuffer, um por worker de ASR, reaproveitado entre pedidos);
+#   - o noisereduce recebe esse buffer sem cópia e devolve o único array novo
+#     do pipeline;
+#   - RMS e a normalização do feature extractor rodam nesse array, no lugar;
+#   - o array vira a entrada do modelo por torch.from_numpy (memória compartilhada).
+#
+# A normalização é a de Wav2Vec2FeatureExtractor (do_normalize):
+# (x - média) / sqrt(var + 1e-7). Só é aplicada se o extractor do modelo a usa.
+# Pico de alocação por pedido, novo x antigo: python -m benchmarks.run -k audio.preprocess
+
+import threading
+
+import numpy as np
+import noisereduce as nr
+
+NOISE_PROP_DECREASE = 0.8
+# Buffers de rascunho maiores que isso (60 s a 16 kHz) não ficam retidos na thread
+SCRATCH_MAX_SAMPLES = 60 * 16000
+# Mesmo epsilon de Wav2Vec2FeatureExtractor.zero_mean_unit_var_norm
+NORM_EPSILON = 1e-7
+
+
+class ScratchBuffer:
+    """Buffer float32 reaproveitado, que cresce em potências de 2 até `max_samples`."""
+
+    def __init__(self, max_samples=SCRATCH_MAX_SAMPLES):
+        self.max_samples = max_samples
+        self._buffer = np.empty(0, dtype=np.float32)
+
+    def take(self, n):
+        """Vista de `n` amostras (conteúdo indefinido). Acima do limite, um array novo."""
+        if n > self.max_samples:
+            return np.empty(n, dtype=np.float32)
+        if n > self._buffer.size:
+            self._buffer = np.empty(min(1 << (n - 1).bit_length(), self.max_samples), dtype=np.float32)
+        return self._buffer[:n]
+
+    @property
+    def nbytes(self):
+        return self._buffer.nbytes
+
+
+_local = threading.local()
+
+
+def scratch():
+    """ScratchBuffer da thread atual (cada worker de ASR tem o seu)."""
+    buffer = getattr(_local, 'scratch', None)
+    if buffer is None:
+        buffer = _local.scratch = ScratchBuffer()
+    return buffer
+
+
+def rms_normalize_(samples):
+    """Divide `samples` pelo seu RMS, no lugar (silêncio absoluto fica como está)."""
+    if samples.size:
+        rms = np.sqrt(np.dot(samples, samples) / samples.size)
+        if rms > 0:
+            samples /= rms
+    return samples
+
+
+def zero_mean_unit_var_(samples, epsilon=NORM_EPSILON):
+    """(x - média) / sqrt(var + epsilon), no lugar."""
+    if samples.size:
+        samples -= samples.mean()
+        # Com a média já subtraída, var = <x, x> / n, sem o temporário de np.var
+        samples /= np.sqrt(np.dot(samples, samples) / samples.size + epsilon)
+    return samples
+
+
+def denoise_and_normalize(samples, sample_rate):
+    """
+    Redução de ruído + normalização RMS de `samples` (1-D float32, não é
+    alterado). Retorna o array novo do noisereduce, normalizado no lugar.
+    """
+    reduced = np.asarray(nr.reduce_noise(y=samples, sr=sample_rate, prop_decrease=NOISE_PROP_DECREASE),
+                         dtype=np.float32)
+    if np.shares_memory(reduced, samples):
+        reduced = reduced.copy()
+    return rms_normalize_(reduced)
+
+
+def model_input(samples, feature_extractor):
+    """Normalização do feature extractor do modelo, no lugar; `samples` já é a entrada do modelo."""
+    if getattr(feature_extractor, 'do_normalize', False):
+        zero_mean_unit_var_(samples)
+    return samples
@@ -0,0 +1,141 @@
+# Cancellation.py
+#
+# Cancelamento cooperativo: um CancelToken acompanha a requisição pelas
+# etapas do pipeline (áudio -> ASR -> distância -> CP-SAT -> feedback).
+# Cada etapa chama token.raise_if_cancelled() entre passos; o solver CP-SAT
+# registra um callback para interromper a busca na hora. Dentro de código que
+# não recebe o token (as camadas do wav2vec2, via forward pre-hooks), vale o
+# token ativo da thread: `with active(token)` + check_active().
+#
+# Os cancelamentos são contados por motivo ('timeout', 'disconnect', 'client').
+
+import select
+import socket
+import threading
+import contextvars
+from collections import Counter
+from contextlib import contextmanager
+
+_counts = Counter()
+_counts_lock = threading.Lock()
+_active_token = contextvars.ContextVar('active_cancel_token', default=None)
+
+
+class OperationCancelled(Exception):
+    """A requisição foi cancelada (timeout, cliente desconectado etc.)."""
+
+
+class CancelToken:
+    def __init__(self):
+        self._event = threading.Event()
+        self._lock = threading.Lock()
+        self._callbacks = []
+        self.reason = None
+
+    @property
+    def cancelled(self):
+        return self._event.is_set()
+
+    def cancel(self, reason='client'):
+        """Marca como cancelado e dispara os callbacks registrados (uma única vez)."""
+        with self._lock:
+            if self._event.is_set():
+                return
+            self.reason = reason
+            self._event.set()
+            callbacks, self._callbacks = self._callbacks, []
+        with _counts_lock:
+            _counts[reason] += 1
+        for callback in callbacks:
+            callback()
+
+    def raise_if_cancelled(self):
+        if self._event.is_set():
+            raise OperationCancelled(self.reason)
+
+    def add_callback(self, callback):
+        """Registra callback(); se já estiver cancelado, chama imediatamente."""
+        with self._lock:
+            if not self._event.is_set():
+                self._callbacks.append(callback)
+                return
+        callback()
+
+    def remove_callback(self, callback):
+        with self._lock:
+            if callback in self._callbacks:
+                self._callbacks.remove(callback)
+
+
+class DisconnectWatcher:
+    """
+    Context manager que, enquanto a requisição está sendo processada, verifica
+    a cada `interval` s se o cliente fechou a conexão e, se sim, cancela o token.
+
+    Funciona com o servidor de desenvolvimento do werkzeug e com o gunicorn
+    (environ['werkzeug.socket'] / environ['gunicorn.socket']); em outros
+    servidores não faz nada.
+    """
+
+    def __init__(self, environ, cancel_token, interval=0.5):
+        self.sock = environ.get('gunicorn.socket') or environ.get('werkzeug.socket')
+        self.cancel_token = cancel_token
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread = None
+
+    def __enter__(self):
+        if self.sock is not None:
+            self._thread = threading.Thread(target=self._watch, name='disconnect-watcher', daemon=True)
+            self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._stop.set()
+        return False
+
+    def _watch(self):
+        while not self._stop.wait(self.interval):
+            if self.cancel_token.cancelled:
+                return
+            if client_disconnected(self.sock):
+                self.cancel_token.cancel('disconnect')
+                return
+
+
+def client_disconnected(sock):
+    """True se o socket do cliente foi fechado (leitura não bloqueante retorna EOF)."""
+    try:
+        readable, _, _ = select.select([sock], [], [], 0)
+        if not readable:
+            return False
+        return sock.recv(1, socket.MSG_PEEK) == b''
+    except (OSError, ValueError):
+        return True
+
+
+def check_cancelled(cancel_token):
+    """Atalho para os pontos de verificação: aceita cancel_token=None."""
+    if cancel_token is not None:
+        cancel_token.raise_if_cancelled()
+
+
+@contextmanager
+def active(cancel_token):
+    """Torna `cancel_token` o token verificado por check_active() neste contexto."""
+    reset = _active_token.set(cancel_token)
+    try:
+        yield cancel_token
+    finally:
+        _active_token.reset(reset)
+
+
+def check_active():
+    """Ponto de verificação sem argumento: o token de active(), se houver."""
+    check_cancelled(_active_token.get())
+
+
+def cancellation_counts():
+    """Total de cancelamentos por motivo desde o início do processo."""
+    with _counts_lock:
+        return dict(_counts)
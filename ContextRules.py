@@ -0,0 +1,136 @@
+# ContextRules.py
+#
+# Motor de regras de contexto por palavra: grupos como "est-ce que", a
+# pronúncia de "plus"/"est" pelos vizinhos e as liaisons. As regras são dados
+# (ver SpecialRoules.py) e são avaliadas todas numa única passada da esquerda
+# para a direita sobre os tokens:
+#
+#   - GroupRule: sequência de palavras -> tokens de saída (tenta-se primeiro,
+#     na ordem da tabela; consome a sequência inteira)
+#   - WordRule: palavra -> saída do primeiro caso cujas condições valem
+#   - LiaisonRule: entre cada token de saída e o seguinte, a alteração
+#     (sufixo a remover, consoante a acrescentar) da pronúncia do primeiro
+#
+# Uma condição é (deslocamento, predicado). Deslocamento negativo olha os
+# tokens já produzidos (com as regras aplicadas) e positivo, os tokens de
+# entrada ainda por vir. Fora da frase a condição é falsa. As palavras são
+# comparadas em minúsculas, por conjuntos/dicionários pré-montados.
+
+
+def _word_set(words):
+    if isinstance(words, str):
+        words = (words,)
+    return frozenset(w.lower() for w in words)
+
+
+class GroupRule:
+    """
+    pattern: uma palavra (ou conjunto de alternativas) por posição.
+    output: tokens produzidos; sources: posição no padrão de onde vem cada um.
+    """
+
+    def __init__(self, pattern, output, sources):
+        self.pattern = tuple(_word_set(words) for words in pattern)
+        self.output = tuple(output)
+        self.sources = tuple(sources)
+
+    def matches(self, lowered, i):
+        if i + len(self.pattern) > len(lowered):
+            return False
+        return all(lowered[i + k] in words for k, words in enumerate(self.pattern))
+
+
+class WordRule:
+    """
+    cases: [(condições, saída)]; vale o primeiro caso com todas as condições
+    verdadeiras, senão `default`.
+    """
+
+    def __init__(self, word, cases, default):
+        self.word = word.lower()
+        self.cases = tuple((tuple(conditions), output) for conditions, output in cases)
+        self.default = default
+
+
+class LiaisonRule:
+    """
+    before(próximo token): se pode haver liaison antes dele.
+    by_word (palavra em minúsculas) tem prioridade sobre by_last_letter
+    (último caractere, como escrito); os valores são (sufixo, consoante).
+    """
+
+    def __init__(self, before, by_word, by_last_letter):
+        self.before = before
+        self.by_word = {w.lower(): action for w, action in by_word.items()}
+        self.by_last_letter = dict(by_last_letter)
+
+    def choose(self, token, next_token):
+        if not self.before(next_token):
+            return None
+        action = self.by_word.get(token.lower())
+        if action is None:
+            action = self.by_last_letter.get(token[-1:])
+        return action
+
+
+def apply_liaison(pronunciation, liaison):
+    """Aplica à pronúncia a liaison escolhida por ContextRules.apply (ou nada, se None)."""
+    if liaison is None:
+        return pronunciation
+    strip, consonant = liaison
+    return (pronunciation.rstrip(strip) if strip else pronunciation) + consonant
+
+
+class ContextRules:
+    def __init__(self, groups=(), words=(), liaison=None):
+        self._groups = {}
+        for rule in groups:
+            for first in rule.pattern[0]:
+                self._groups.setdefault(first, []).append(rule)
+        self._words = {rule.word: rule for rule in words}
+        self.liaison = liaison
+
+    def apply(self, words):
+        """
+        Retorna (tokens, sources, liaisons): os tokens de saída, o índice em
+        `words` de onde veio cada um e, por token, a liaison com o seguinte
+        (para apply_liaison) ou None.
+        """
+        lowered = [w.lower() for w in words]
+        tokens, sources, liaisons = [], [], []
+
+        def emit(token, source):
+            if tokens and self.liaison is not None:
+                liaisons[-1] = self.liaison.choose(tokens[-1], token)
+            tokens.append(token)
+            sources.append(source)
+            liaisons.append(None)
+
+        i = 0
+        while i < len(words):
+            group = next((rule for rule in self._groups.get(lowered[i], ())
+                          if rule.matches(lowered, i)), None)
+            if group is not None:
+                for token, offset in zip(group.output, group.sources):
+                    emit(token, i + offset)
+                i += len(group.pattern)
+                continue
+
+            rule = self._words.get(lowered[i])
+            emit(words[i] if rule is None else self._choose(rule, tokens, words, i), i)
+            i += 1
+        return tokens, sources, liaisons
+
+    @staticmethod
+    def _choose(rule, tokens, words, i):
+        for conditions, output in rule.cases:
+            for offset, predicate in conditions:
+                if offset < 0:
+                    context = tokens[offset] if len(tokens) >= -offset else None
+                else:
+                    context = words[i + offset] if i + offset < len(words) else None
+                if context is None or not predicate(context):
+                    break
+            else:
+                return output
+        return rule.default
@@ -0,0 +1,112 @@
+# CpuTopology.py
+#
+# Threads e CPUs do servidor de áudio (main.py). Sem configuração, cada um dos
+# ASR_WORKERS forwards do wav2vec2 abre um time de threads do tamanho da
+# máquina e o NumPy do noisereduce abre outro: mais threads que núcleos e
+# picos de contenção no p99. Aqui:
+#
+#   ASR_INTRA_OP_THREADS  threads de cada forward (torch.set_num_threads em
+#                         cada worker); padrão: CPUs disponíveis / ASR_WORKERS
+#   ASR_INTER_OP_THREADS  torch.set_num_interop_threads; padrão: 1 (o
+#                         paralelismo entre pedidos vem dos ASR_WORKERS)
+#   ASR_CPU_AFFINITY      CPUs do processo, ex.: "0-7" ou "0,2,4-6"; padrão:
+#                         sem pinagem (para vários processos na mesma máquina,
+#                         um conjunto disjunto para cada)
+#   BLAS_NUM_THREADS      OMP/MKL/OpenBLAS/numexpr (NumPy, noisereduce); padrão: 1
+#
+# configure_process() precisa rodar antes de importar numpy/torch: as
+# bibliotecas de BLAS leem as variáveis de ambiente ao carregar.
+# A melhor combinação para a máquina: python -m benchmarks.tune_threads
+
+import os
+import logging
+
+logger = logging.getLogger(__name__)
+
+BLAS_THREAD_VARIABLES = ('OMP_NUM_THREADS', 'MKL_NUM_THREADS', 'OPENBLAS_NUM_THREADS',
+                         'NUMEXPR_NUM_THREADS', 'VECLIB_MAXIMUM_THREADS')
+
+
+def parse_cpu_list(spec):
+    """'0-3,8,10-11' -> {0, 1, 2, 3, 8, 10, 11}."""
+    cpus = set()
+    for part in spec.split(','):
+        part = part.strip()
+        if not part:
+            continue
+        first, sep, last = part.partition('-')
+        if sep:
+            if int(last) < int(first):
+                raise ValueError(f"Intervalo de CPUs inválido: {part!r}")
+            cpus.update(range(int(first), int(last) + 1))
+        else:
+            cpus.add(int(first))
+    if not cpus:
+        raise ValueError(f"Lista de CPUs vazia: {spec!r}")
+    return cpus
+
+
+def available_cpus():
+    """CPUs que o processo pode usar (respeita taskset/cgroups), ou os.cpu_count()."""
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
+
+
+class ThreadConfig:
+    def __init__(self, workers, intra_op_threads, inter_op_threads=1, cpu_affinity=None, blas_threads=1):
+        self.workers = workers
+        self.intra_op_threads = intra_op_threads
+        self.inter_op_threads = inter_op_threads
+        self.cpu_affinity = cpu_affinity
+        self.blas_threads = blas_threads
+
+    @classmethod
+    def from_env(cls, workers):
+        affinity_spec = os.environ.get('ASR_CPU_AFFINITY', '').strip()
+        cpu_affinity = parse_cpu_list(affinity_spec) if affinity_spec else None
+        cpus = len(cpu_affinity) if cpu_affinity else available_cpus()
+        intra = os.environ.get('ASR_INTRA_OP_THREADS')
+        return cls(
+            workers=workers,
+            intra_op_threads=int(intra) if intra else max(1, cpus // max(workers, 1)),
+            inter_op_threads=int(os.environ.get('ASR_INTER_OP_THREADS', '1')),
+            cpu_affinity=cpu_affinity,
+            blas_threads=int(os.environ.get('BLAS_NUM_THREADS', '1')),
+        )
+
+    def as_dict(self):
+        return {
+            'workers': self.workers,
+            'intra_op_threads': self.intra_op_threads,
+            'inter_op_threads': self.inter_op_threads,
+            'cpu_affinity': sorted(self.cpu_affinity) if self.cpu_affinity else None,
+            'blas_threads': self.blas_threads,
+        }
+
+
+def configure_process(config):
+    """Afinidade de CPU e limites de BLAS; antes de importar numpy/torch."""
+    if config.cpu_affinity:
+        os.sched_setaffinity(0, config.cpu_affinity)
+    for variable in BLAS_THREAD_VARIABLES:
+        # Um valor já exportado pelo operador vale mais que o padrão
+        os.environ.setdefault(variable, str(config.blas_threads))
+
+
+def configure_torch(torch, config):
+    """Threads do torch no processo (inter-op só pode ser definido uma vez, antes do primeiro uso)."""
+    try:
+        torch.set_num_interop_threads(config.inter_op_threads)
+    except RuntimeError as e:
+        logger.warning(f"torch.set_num_interop_threads ignorado: {e}")
+    torch.set_num_threads(config.intra_op_threads)
+    logger.info(f"Threads do ASR: {config.as_dict()}")
+
+
+def worker_initializer(torch, config):
+    """initializer do AsrScheduler: o número de threads intra-op vale por thread que chama o modelo."""
+    def initialize():
+        torch.set_num_threads(config.intra_op_threads)
+    return initialize
@@ -0,0 +1,189 @@
+# IncrementalPronunciation.py
+#
+# /pronounce incremental para digitação ao vivo. O servidor guarda, por
+# sessão, o texto, os tokens (com posições) e a pronúncia de cada token.
+# O cliente manda só a edição de caracteres {pos, delete, insert}; o servidor
+#
+#   1. retokeniza apenas o trecho do texto tocado pela edição;
+#   2. recalcula a pronúncia dos tokens editados e dos vizinhos a até
+#      CONTEXT_RADIUS tokens (liaison, 'est ce que', 'plus', 'est', "nu a"),
+#      rodando o pipeline numa janela de 2 * CONTEXT_RADIUS em volta;
+#   3. devolve só o trecho de tokens que mudou: {start, delete, outputs}.
+#
+# O custo do pipeline por tecla depende do tamanho da edição, não da frase.
+# O cliente aplica cada mudança com outputs.splice(start, delete, ...novos)
+# e mostra outputs.filter(Boolean).join(' ').
+#
+# Cada resposta tem `version`; uma edição com versão diferente da do servidor
+# (cliente dessincronizado) é recusada com VersionConflict e o cliente
+# recria a sessão com o texto inteiro.
+
+import re
+import time
+import uuid
+import bisect
+import threading
+from collections import OrderedDict
+
+from TextPipeline import transliterate_words, join_word_outputs, CONTEXT_RADIUS
+
+TOKEN_RE = re.compile(r'\S+')
+MAX_TEXT_LENGTH = 5000
+
+
+class SessionNotFound(Exception):
+    """Sessão expirada ou inexistente."""
+
+
+class VersionConflict(Exception):
+    """A edição foi feita sobre uma versão que não é a atual da sessão."""
+
+
+class InvalidEdit(Exception):
+    """Edição fora dos limites do texto."""
+
+
+class PronunciationSession:
+    def __init__(self, text):
+        self.lock = threading.Lock()
+        self.version = 0
+        self.last_used = time.monotonic()
+        self._set_text(text)
+
+    def _set_text(self, text):
+        self.text = text
+        matches = list(TOKEN_RE.finditer(text))
+        self.starts = [m.start() for m in matches]
+        self.ends = [m.end() for m in matches]
+        self.tokens = [m.group(0) for m in matches]
+        self.outputs = transliterate_words(self.tokens)
+
+    def output_strings(self):
+        return [' '.join(output) for output in self.outputs]
+
+    def pronunciation(self):
+        return join_word_outputs(self.outputs)
+
+    def apply_edit(self, pos, delete, insert):
+        """
+        Aplica a edição de caracteres e retorna a mudança nos tokens de saída:
+        {'start': i, 'delete': n, 'outputs': [...]}, ou None se nada mudou.
+        """
+        if pos < 0 or delete < 0 or pos + delete > len(self.text):
+            raise InvalidEdit(f"Edição fora do texto (pos={pos}, delete={delete}, tamanho={len(self.text)}).")
+        if len(self.text) - delete + len(insert) > MAX_TEXT_LENGTH:
+            raise InvalidEdit("Texto muito longo.")
+
+        new_text = self.text[:pos] + insert + self.text[pos + delete:]
+        shift = len(insert) - delete
+
+        # Tokens antigos tocados pela edição (inclusive os encostados nela,
+        # que podem se fundir com o texto inserido): índices [first, last)
+        first = bisect.bisect_left(self.ends, pos)
+        last = bisect.bisect_right(self.starts, pos + delete)
+        region_start = min(pos, self.starts[first]) if first < last else pos
+        region_end = max(pos + delete, self.ends[last - 1]) if first < last else pos + delete
+
+        # Retokeniza só o trecho correspondente no texto novo
+        new_region_end = region_end + shift
+        matches = list(TOKEN_RE.finditer(new_text, region_start, new_region_end))
+        new_tokens = [m.group(0) for m in matches]
+
+        self.text = new_text
+        self.tokens[first:last] = new_tokens
+        self.starts[first:last] = [m.start() for m in matches]
+        self.ends[first:last] = [m.end() for m in matches]
+        for i in range(first + len(new_tokens), len(self.starts)):
+            self.starts[i] += shift
+            self.ends[i] += shift
+
+        # Saídas afetadas: tokens editados + CONTEXT_RADIUS de cada lado
+        changed_end = first + len(new_tokens)
+        affected_start = max(first - CONTEXT_RADIUS, 0)
+        affected_end = min(changed_end + CONTEXT_RADIUS, len(self.tokens))
+        old_affected_end = affected_end - len(new_tokens) + (last - first)
+
+        # O pipeline roda numa janela com mais CONTEXT_RADIUS de contexto, e
+        # só as saídas do trecho afetado (cujo contexto está todo na janela) são usadas
+        window_start = max(affected_start - CONTEXT_RADIUS, 0)
+        window_end = min(affected_end + CONTEXT_RADIUS, len(self.tokens))
+        window_outputs = transliterate_words(self.tokens[window_start:window_end])
+        new_outputs = window_outputs[affected_start - window_start:affected_end - window_start]
+
+        old_outputs = self.outputs[affected_start:old_affected_end]
+        self.outputs[affected_start:old_affected_end] = new_outputs
+        self.version += 1
+        return _trim_change(affected_start, old_outputs, new_outputs)
+
+
+def _trim_change(start, old_outputs, new_outputs):
+    # Remove das pontas as saídas que não mudaram, para a resposta ter só o necessário
+    head = 0
+    while head < min(len(old_outputs), len(new_outputs)) and old_outputs[head] == new_outputs[head]:
+        head += 1
+    tail = 0
+    while (tail < min(len(old_outputs), len(new_outputs)) - head
+           and old_outputs[-1 - tail] == new_outputs[-1 - tail]):
+        tail += 1
+    old_changed = old_outputs[head:len(old_outputs) - tail]
+    new_changed = new_outputs[head:len(new_outputs) - tail]
+    if not old_changed and not new_changed:
+        return None
+    return {
+        'start': start + head,
+        'delete': len(old_changed),
+        'outputs': [' '.join(output) for output in new_changed],
+    }
+
+
+class SessionStore:
+    """Sessões em memória com limite de quantidade (LRU) e expiração por inatividade."""
+
+    def __init__(self, max_sessions=5000, ttl_seconds=1800):
+        self.max_sessions = max_sessions
+        self.ttl_seconds = ttl_seconds
+        self._sessions = OrderedDict()
+        self._lock = threading.Lock()
+
+    def create(self, text):
+        if len(text) > MAX_TEXT_LENGTH:
+            raise InvalidEdit("Texto muito longo.")
+        session = PronunciationSession(text)
+        session_id = uuid.uuid4().hex
+        with self._lock:
+            self._sessions[session_id] = session
+            self._evict()
+        return session_id, session
+
+    def get(self, session_id):
+        with self._lock:
+            session = self._sessions.get(session_id)
+            if session is None or time.monotonic() - session.last_used > self.ttl_seconds:
+                self._sessions.pop(session_id, None)
+                raise SessionNotFound(session_id)
+            self._sessions.move_to_end(session_id)
+            session.last_used = time.monotonic()
+            return session
+
+    def edit(self, session_id, base_version, edits):
+        """Aplica as edições em ordem; retorna (nova_versão, lista de mudanças)."""
+        session = self.get(session_id)
+        with session.lock:
+            if base_version != session.version:
+                raise VersionConflict(session.version)
+            changes = []
+            for edit in edits:
+                change = session.apply_edit(int(edit.get('pos', 0)), int(edit.get('delete', 0)),
+                                            str(edit.get('insert', '')))
+                if change is not None:
+                    changes.append(change)
+            return session.version, changes
+
+    def _evict(self):
+        now = time.monotonic()
+        while self._sessions:
+            session_id, session = next(iter(self._sessions.items()))
+            if len(self._sessions) > self.max_sessions or now - session.last_used > self.ttl_seconds:
+                self._sessions.popitem(last=False)
+            else:
+                break
@@ -0,0 +1,106 @@
+# LogitsStore.py
+#
+# Guarda as emissões do CTC (logits do wav2vec2) das tentativas recentes para
+# re-pontuar sem rodar o modelo de novo (POST /rescore): com os logits, a
+# decodificação + alinhamento + feedback custam milissegundos.
+#
+# Os logits vão em float16 comprimidos com zlib (~40% do float32 original);
+# um clipe de 10 s ocupa poucas dezenas de KB. O total é limitado em bytes
+# (LOGITS_STORE_MAX_MB) com remoção LRU, e cada tentativa expira após
+# LOGITS_STORE_TTL_SECONDS. Fica em memória, por processo.
+
+import os
+import time
+import uuid
+import zlib
+import logging
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+LOGITS_STORE_MAX_MB = float(os.environ.get('LOGITS_STORE_MAX_MB', '256'))
+LOGITS_STORE_TTL_SECONDS = int(os.environ.get('LOGITS_STORE_TTL_SECONDS', str(24 * 3600)))
+COMPRESSION_LEVEL = 1
+
+
+class AttemptNotFound(Exception):
+    """Tentativa expirada, removida por espaço ou inexistente."""
+
+
+class _Attempt:
+    __slots__ = ('shape', 'blob', 'text', 'transcription', 'model', 'created')
+
+    def __init__(self, shape, blob, text, transcription, model=None):
+        self.shape = shape
+        self.blob = blob
+        self.text = text
+        self.transcription = transcription
+        self.model = model
+        self.created = time.monotonic()
+
+
+def encode_logits(logits):
+    """ndarray (frames x vocab) -> (shape, bytes float16 comprimidos)."""
+    half = np.ascontiguousarray(logits, dtype=np.float16)
+    return half.shape, zlib.compress(half.tobytes(), COMPRESSION_LEVEL)
+
+
+def decode_logits(shape, blob):
+    """Inverso de encode_logits; devolve float32 (o argmax/softmax não precisa de mais)."""
+    half = np.frombuffer(zlib.decompress(blob), dtype=np.float16).reshape(shape)
+    return half.astype(np.float32)
+
+
+class LogitsStore:
+    def __init__(self, max_bytes=int(LOGITS_STORE_MAX_MB * 2 ** 20), ttl_seconds=LOGITS_STORE_TTL_SECONDS):
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self._attempts = OrderedDict()
+        self._total_bytes = 0
+        self._lock = threading.Lock()
+
+    def put(self, logits, text, transcription, model=None):
+        """
+        Guarda os logits de uma tentativa e retorna o attempt_id. `model` é o
+        nome do modelo de ASR que os gerou (o vocabulário da decodificação).
+        """
+        shape, blob = encode_logits(logits)
+        attempt_id = uuid.uuid4().hex
+        with self._lock:
+            self._attempts[attempt_id] = _Attempt(shape, blob, text, transcription, model)
+            self._total_bytes += len(blob)
+            self._evict()
+        return attempt_id
+
+    def get(self, attempt_id):
+        """Retorna (logits float32, texto de referência original, transcrição original, modelo)."""
+        with self._lock:
+            attempt = self._attempts.get(attempt_id)
+            if attempt is None or time.monotonic() - attempt.created > self.ttl_seconds:
+                self._remove(attempt_id)
+                raise AttemptNotFound(attempt_id)
+            self._attempts.move_to_end(attempt_id)
+        return decode_logits(attempt.shape, attempt.blob), attempt.text, attempt.transcription, attempt.model
+
+    def stats(self):
+        with self._lock:
+            return {'attempts': len(self._attempts), 'bytes': self._total_bytes, 'max_bytes': self.max_bytes}
+
+    def _remove(self, attempt_id):
+        attempt = self._attempts.pop(attempt_id, None)
+        if attempt is not None:
+            self._total_bytes -= len(attempt.blob)
+
+    def _evict(self):
+        now = time.monotonic()
+        while self._attempts:
+            attempt_id, attempt = next(iter(self._attempts.items()))
+            expired = now - attempt.created > self.ttl_seconds
+            # A tentativa recém-guardada (última) nunca sai por tamanho
+            if expired or (self._total_bytes > self.max_bytes and len(self._attempts) > 1):
+                self._remove(attempt_id)
+            else:
+                break
@@ -0,0 +1,222 @@
+# Metrics.py
+#
+# Métricas no formato texto do Prometheus, servidas em GET /metrics.
+# Só usa a biblioteca padrão (o servidor só-texto também importa este módulo).
+#
+# O custo no caminho quente é um perf_counter(), um bisect e um incremento sob
+# um Lock por observação, desprezível perto de qualquer etapa medida.
+#
+# Uso:
+#     with Metrics.stage('resample'):
+#         ...
+#     Metrics.EPITRAN_FALLBACKS.inc()
+
+import time
+import bisect
+import threading
+from contextlib import contextmanager
+
+import Tracing
+
+# Limites (s) dos histogramas de latência: de 1 ms a 2 min
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5,
+                   1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+
+_registry = []
+_registry_lock = threading.Lock()
+
+
+def _register(metric):
+    with _registry_lock:
+        _registry.append(metric)
+    return metric
+
+
+def _label_key(labelnames, labels):
+    return tuple(str(labels.get(name, '')) for name in labelnames)
+
+
+def _format_labels(labelnames, key, extra=None):
+    pairs = list(zip(labelnames, key))
+    if extra:
+        pairs.append(extra)
+    if not pairs:
+        return ''
+    escaped = (f'{name}="{_escape(value)}"' for name, value in pairs)
+    return '{' + ','.join(escaped) + '}'
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+class Counter:
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1, **labels):
+        key = _label_key(self.labelnames, labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels):
+        return self._values.get(_label_key(self.labelnames, labels), 0)
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} counter']
+        with self._lock:
+            items = sorted(self._values.items())
+        for key, value in items:
+            lines.append(f'{self.name}{_format_labels(self.labelnames, key)} {value}')
+        return lines
+
+
+class Histogram:
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, **labels):
+        key = _label_key(self.labelnames, labels)
+        idx = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                # [contagem por bucket..., +Inf], soma, total
+                series = self._series[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][idx] += 1
+            series[1] += value
+            series[2] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} histogram']
+        with self._lock:
+            items = sorted((key, (list(s[0]), s[1], s[2])) for key, s in self._series.items())
+        for key, (counts, total_sum, total_count) in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float('inf'),), counts):
+                cumulative += count
+                le = '+Inf' if bound == float('inf') else repr(bound)
+                lines.append(f'{self.name}_bucket{_format_labels(self.labelnames, key, ("le", le))} {cumulative}')
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f'{self.name}_sum{labels} {total_sum}')
+            lines.append(f'{self.name}_count{labels} {total_count}')
+        return lines
+
+
+class GaugeCallback:
+    """Gauge lido na hora do /metrics: fn() retorna {valor_do_label: valor} ou um número."""
+
+    def __init__(self, name, documentation, fn, labelname=None, metric_type='gauge'):
+        self.name = name
+        self.documentation = documentation
+        self.fn = fn
+        self.labelname = labelname
+        self.metric_type = metric_type
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} {self.metric_type}']
+        values = self.fn()
+        if self.labelname is None:
+            lines.append(f'{self.name} {values}')
+        else:
+            for label_value, value in sorted(values.items()):
+                lines.append(f'{self.name}{{{self.labelname}="{_escape(label_value)}"}} {value}')
+        return lines
+
+
+def counter(name, documentation, labelnames=()):
+    return _register(Counter(name, documentation, labelnames))
+
+
+def histogram(name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+    return _register(Histogram(name, documentation, labelnames, buckets))
+
+
+def gauge_callback(name, documentation, fn, labelname=None, metric_type='gauge'):
+    return _register(GaugeCallback(name, documentation, fn, labelname, metric_type))
+
+
+def render():
+    """Todas as métricas registradas no formato de exposição texto do Prometheus."""
+    with _registry_lock:
+        metrics = list(_registry)
+    lines = []
+    for metric in metrics:
+        lines.extend(metric.render())
+    return '\n'.join(lines) + '\n'
+
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+# Métricas do pipeline de pontuação ------------------------------------------
+
+STAGE_SECONDS = histogram(
+    'pronunciation_stage_seconds',
+    'Tempo por etapa do pipeline de pontuação (load_pcm16, load_decode, resample, '
+    'noise_reduction, asr_forward, distance_matrix, alignment, feedback...).',
+    ('stage',)
+)
+ALIGNMENT_SECONDS = histogram(
+    'pronunciation_alignment_seconds',
+    'Tempo de resolução do alinhamento por motor (cpsat, dtw, anchored).',
+    ('engine',)
+)
+ALIGNMENT_RUNS = counter(
+    'pronunciation_alignment_runs_total',
+    'Alinhamentos por motor; dtw conta os fallbacks do CP-SAT.',
+    ('engine',)
+)
+ALIGNMENT_FASTPATH = counter(
+    'pronunciation_alignment_fastpath_total',
+    'Atalho antes do alinhamento: exact (transcrição = referência, sem solver), '
+    'trimmed (só o miolo diferente foi alinhado), none (alinhamento completo).',
+    ('result',)
+)
+CACHE_REQUESTS = counter(
+    'pronunciation_cache_requests_total',
+    'Consultas a caches por resultado (hit/miss).',
+    ('cache', 'result')
+)
+EPITRAN_FALLBACKS = counter(
+    'pronunciation_epitran_fallbacks_total',
+    'Palavras fora do dic.json transliteradas pelo Epitran.'
+)
+UPLOAD_FORMATS = counter(
+    'pronunciation_upload_format_total',
+    'Uploads de áudio por formato (wav_pcm16_16k_mono = formato do gravador, '
+    'sem decodificação nem reamostragem; wav, webm, ogg, mp4, mp3, other).',
+    ('format',)
+)
+AUDIO_LOAD_SECONDS = histogram(
+    'pronunciation_audio_load_seconds',
+    'Tempo de carga do áudio até o tensor 16 kHz mono (leitura + decodificação '
+    '+ reamostragem) por formato do upload.',
+    ('format',)
+)
+
+
+@contextmanager
+def stage(name):
+    """
+    Context manager que mede uma etapa em pronunciation_stage_seconds e, se a
+    requisição estiver sendo rastreada, grava a etapa como span (Tracing).
+    """
+    with STAGE_SECONDS.time(stage=name), Tracing.span(name):
+        yield
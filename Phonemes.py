@@ -0,0 +1,100 @@
+# Phonemes.py
+#
+# Inventário único de fonemas, com códigos inteiros de 1 byte, usado pela
+# conversão francês -> pt-BR do pipeline de texto (TextPipeline): a pronúncia
+# de cada palavra vira uma sequência de códigos em `bytes` (imutável, pode ser
+# chave do cache) e os contextos da conversão são testes de pertinência em
+# conjuntos de códigos.
+#
+# As métricas (WordMetrics) e o alinhamento (WordMatching) continuam
+# comparando as strings caractere a caractere: comparar os buffers de códigos
+# (uma nasal valendo um fonema) mudava o score de quase metade dos pares do
+# corpus, então a similaridade por buffer ficou de fora.
+#
+# Cada fonema é um caractere base mais as marcas combinantes que o seguem
+# (ɛ + U+0303 = ɛ̃), em NFC. Antes as nasais eram cortadas em 'ɛ' + '̃' e o
+# til seguia solto pelo pipeline. Grupos de duas letras (dʒ, tʃ, ks, sj)
+# continuam dois fonemas, como já acontecia no split_into_phonemes.
+#
+# A codificação de cada texto é feita uma vez (lru_cache). Só o INVENTORY tem
+# código: a tabela é fixa e o texto dos pedidos nunca entra nela. Um símbolo
+# fora do inventário fica na sequência como a própria string (encode devolve
+# então uma tupla em vez de bytes), de modo que dois símbolos desconhecidos
+# diferentes continuam diferentes. Os códigos valem só dentro do processo e
+# não devem ser gravados.
+
+import unicodedata
+from functools import lru_cache
+
+UNKNOWN = 0
+CACHE_SIZE = 1 << 16
+
+INVENTORY = (
+    # Vogais orais e nasais do francês
+    'a', 'e', 'i', 'o', 'u', 'y', 'ɛ', 'ɔ', 'ɑ', 'ø', 'œ', 'ə',
+    'ɛ̃', 'ɑ̃', 'ɔ̃', 'œ̃',
+    # Semivogais
+    'j', 'w', 'ɥ',
+    # Consoantes
+    'b', 'd', 'f', 'g', 'ɡ', 'k', 'l', 'm', 'n', 'p', 'ʁ', 'r', 's', 't',
+    'v', 'z', 'ʃ', 'ʒ', 'ɲ', 'ŋ', 'ç', 'ʎ', 'ʔ', 'θ', 'ð', 'ɾ', 'ʕ', 'h', 'x',
+    'ʧ', 'ʤ',
+    # Letras da pronúncia aproximada em pt-BR
+    'á', 'é', 'ê', 'í', 'ó', 'ô', 'ú', 'ã', 'ẽ', 'ĩ', 'õ', 'ũ', 'c', 'q',
+    # Separadores
+    ' ', '.', "'", '-',
+)
+
+_symbols = [None]              # código -> símbolo (0 = UNKNOWN)
+_codes = {}                    # símbolo -> código
+
+for _symbol in INVENTORY:
+    _codes[unicodedata.normalize('NFC', _symbol)] = len(_symbols)
+    _symbols.append(unicodedata.normalize('NFC', _symbol))
+
+
+def code(symbol):
+    """Código de um fonema do INVENTORY; fora dele, o próprio símbolo (str)."""
+    return _codes.get(symbol, symbol)
+
+
+def symbol(code_):
+    """Símbolo de um código ('' para UNKNOWN); uma str fora do inventário é o próprio símbolo."""
+    if isinstance(code_, str):
+        return code_
+    return _symbols[code_] or ''
+
+
+def code_set(symbols):
+    """frozenset dos códigos de `symbols`, para testes de pertinência."""
+    return frozenset(code(unicodedata.normalize('NFC', s)) for s in symbols)
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def split_phonemes(text):
+    """Fonemas de `text`: cada caractere base com as marcas combinantes seguintes."""
+    phonemes = []
+    for char in unicodedata.normalize('NFD', text):
+        if phonemes and unicodedata.combining(char):
+            phonemes[-1] += char
+        else:
+            phonemes.append(char)
+    return tuple(unicodedata.normalize('NFC', p) for p in phonemes)
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def encode(text):
+    """
+    Sequência de códigos dos fonemas de `text`, calculada uma vez por texto:
+    bytes se todos estão no INVENTORY; senão, tupla com a str de cada
+    símbolo desconhecido no lugar do código.
+    """
+    codes = tuple(code(p) for p in split_phonemes(text))
+    if all(type(c) is int for c in codes):
+        return bytes(codes)
+    return codes
+
+
+def decode(codes):
+    """Inverso de encode (em NFC)."""
+    return ''.join(symbol(c) for c in codes)
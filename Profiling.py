@@ -0,0 +1,153 @@
+# Profiling.py
+#
+# Profiler por requisição, sob demanda, para /upload, /pronounce e /hints.
+#
+# Ativação (variáveis de ambiente, lidas na inicialização):
+#   PROFILE_ADMIN_TOKEN   perfila requisições com o cabeçalho "X-Profile: <token>"
+#   PROFILE_SAMPLE_RATE   fração das requisições perfiladas por amostragem (ex.: 0.01)
+#   PROFILE_DIR           pasta de saída (padrão: ./profiles)
+#
+# Sem token e com taxa 0, o decorador @profiled devolve a própria view: custo zero.
+#
+# Para cada requisição perfilada são gravados, com o id da requisição:
+#   <id>.pstats      cProfile da thread da requisição (snakeviz, pstats)
+#   <id>.folded      pilhas amostradas de todas as threads no formato "collapsed"
+#                    (flamegraph.pl, speedscope, inferno); inclui os workers do ASR
+#   <id>.alloc.txt   top-N alocações do tracemalloc e o pico de memória
+# O id (RequestIds: o mesmo do trace) volta no cabeçalho X-Profile-Id.
+
+import os
+import sys
+import time
+import random
+import logging
+import cProfile
+import threading
+import functools
+import tracemalloc
+from collections import Counter
+
+from flask import request
+
+import RequestIds
+
+logger = logging.getLogger(__name__)
+
+PROFILE_ADMIN_TOKEN = os.environ.get('PROFILE_ADMIN_TOKEN', '')
+PROFILE_SAMPLE_RATE = float(os.environ.get('PROFILE_SAMPLE_RATE', '0') or 0)
+PROFILE_DIR = os.environ.get('PROFILE_DIR', 'profiles')
+SAMPLE_INTERVAL_SECONDS = 0.005
+ALLOCATION_TOP_N = 25
+
+# cProfile/sys.monitoring só admite um profiler ativo por vez: perfilamos uma requisição de cada vez
+_active_lock = threading.Lock()
+
+
+def profiling_enabled():
+    return bool(PROFILE_ADMIN_TOKEN) or PROFILE_SAMPLE_RATE > 0
+
+
+def profiled(view):
+    """Decorador de view Flask: perfila a requisição se pedida/sorteada."""
+    if not profiling_enabled():
+        return view
+
+    @functools.wraps(view)
+    def wrapper(*args, **kwargs):
+        if not _should_profile() or not _active_lock.acquire(blocking=False):
+            return view(*args, **kwargs)
+        try:
+            request_id = RequestIds.request_id(request.environ)
+            with RequestProfiler(request_id):
+                response = view(*args, **kwargs)
+            return RequestIds.tag_response(response, 'X-Profile-Id', request_id)
+        finally:
+            _active_lock.release()
+
+    return wrapper
+
+
+def _should_profile():
+    if PROFILE_ADMIN_TOKEN and request.headers.get('X-Profile') == PROFILE_ADMIN_TOKEN:
+        return True
+    return PROFILE_SAMPLE_RATE > 0 and random.random() < PROFILE_SAMPLE_RATE
+
+
+class RequestProfiler:
+    """cProfile + amostragem de pilhas + tracemalloc durante o bloco `with`."""
+
+    def __init__(self, request_id, output_dir=None):
+        self.request_id = request_id
+        self.output_dir = output_dir or PROFILE_DIR
+        self.profile = cProfile.Profile()
+        self.stacks = Counter()
+        self._stop = threading.Event()
+        self._sampler = threading.Thread(target=self._sample, name='profile-sampler', daemon=True)
+        self._started_tracemalloc = False
+        self._start = None
+
+    def __enter__(self):
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._started_tracemalloc = True
+        tracemalloc.reset_peak()
+        self._start = time.perf_counter()
+        self._sampler.start()
+        self.profile.enable()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.profile.disable()
+        elapsed = time.perf_counter() - self._start
+        self._stop.set()
+        self._sampler.join()
+        snapshot = tracemalloc.take_snapshot()
+        current, peak = tracemalloc.get_traced_memory()
+        if self._started_tracemalloc:
+            tracemalloc.stop()
+        try:
+            self._write(snapshot, peak, elapsed)
+        except Exception as e:
+            logger.error(f"Erro ao gravar o perfil {self.request_id}: {e}")
+        return False
+
+    def _sample(self):
+        own_ident = threading.get_ident()
+        names = {}
+        while not self._stop.wait(SAMPLE_INTERVAL_SECONDS):
+            if len(names) != threading.active_count():
+                names = {t.ident: t.name for t in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if ident == own_ident:
+                    continue
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(f'{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})')
+                    frame = frame.f_back
+                stack.append(names.get(ident, str(ident)))
+                self.stacks[';'.join(reversed(stack))] += 1
+
+    def _write(self, snapshot, peak, elapsed):
+        os.makedirs(self.output_dir, exist_ok=True)
+        base = os.path.join(self.output_dir, self.request_id)
+
+        self.profile.dump_stats(base + '.pstats')
+
+        with open(base + '.folded', 'w', encoding='utf-8') as f:
+            for stack, count in self.stacks.most_common():
+                f.write(f'{stack} {count}\n')
+
+        snapshot = snapshot.filter_traces((
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, '<frozen importlib._bootstrap>'),
+        ))
+        with open(base + '.alloc.txt', 'w', encoding='utf-8') as f:
+            f.write(f'request_id: {self.request_id}\n')
+            f.write(f'path: {request.path}\n')
+            f.write(f'elapsed_s: {elapsed:.4f}\n')
+            f.write(f'tracemalloc_peak_bytes: {peak}\n\n')
+            for stat in snapshot.statistics('lineno')[:ALLOCATION_TOP_N]:
+                f.write(f'{stat}\n')
+
+        logger.info(f"Perfil gravado em {base}.* ({elapsed:.3f}s)")
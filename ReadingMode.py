@@ -0,0 +1,232 @@
+# ReadingMode.py
+#
+# Modo leitura: o aluno lê um parágrafo inteiro (minutos de áudio). Um forward
+# único sobre a gravação toda faz memória e latência crescerem com a duração;
+# aqui o áudio é
+#
+#   1. cortado em trechos de ~CHUNK_TARGET_SECONDS no meio dos silêncios
+#      detectados pelo WebRTC VAD (só há corte no meio da fala se alguém
+#      falar mais de CHUNK_MAX_SECONDS sem pausa);
+#   2. transcrito trecho a trecho pelo AsrScheduler, em paralelo entre os
+#      workers, com no máximo `max_in_flight` trechos na fila de cada vez,
+#      para não tomar o orçamento de fila das frases curtas do /upload;
+#   3. publicado por trecho assim que fica pronto (on_chunk) e, com todos
+#      prontos, costurado na ordem (on_done).
+#
+# Trechos quase sem fala (< MIN_VOICED_RATIO dos quadros) nem passam pelo modelo.
+
+import logging
+import threading
+
+import numpy as np
+
+from AsrScheduler import SchedulerOverloaded
+from Cancellation import OperationCancelled
+
+logger = logging.getLogger(__name__)
+
+SAMPLE_RATE = 16000
+FRAME_MS = 30
+VAD_MODE = 2
+MIN_SILENCE_MS = 300
+CHUNK_MIN_SECONDS = 4.0
+CHUNK_TARGET_SECONDS = 15.0
+CHUNK_MAX_SECONDS = 25.0
+MIN_VOICED_RATIO = 0.05
+
+
+def voiced_frames(samples, sample_rate=SAMPLE_RATE, frame_ms=FRAME_MS, mode=VAD_MODE):
+    """
+    Um bool por quadro de `frame_ms` (fala ou não) para amostras float mono
+    em [-1, 1]. O resto final menor que um quadro é ignorado.
+    """
+    import webrtcvad  # só o modo leitura precisa do VAD
+    vad = webrtcvad.Vad(mode)
+    pcm = (np.clip(samples, -1.0, 1.0) * 32767).astype(np.int16).tobytes()
+    frame_bytes = int(sample_rate * frame_ms / 1000) * 2
+    return [vad.is_speech(pcm[i:i + frame_bytes], sample_rate)
+            for i in range(0, len(pcm) - frame_bytes + 1, frame_bytes)]
+
+
+def plan_chunks(voiced, total_samples, sample_rate=SAMPLE_RATE, frame_ms=FRAME_MS,
+                min_silence_ms=MIN_SILENCE_MS, min_seconds=CHUNK_MIN_SECONDS,
+                target_seconds=CHUNK_TARGET_SECONDS, max_seconds=CHUNK_MAX_SECONDS):
+    """
+    Divide a gravação em trechos [(amostra_inicial, amostra_final, fração_com_fala)].
+    Os cortes caem no meio de silêncios de pelo menos `min_silence_ms`, o mais
+    perto possível de `target_seconds`; cada trecho fica entre `min_seconds`
+    e `max_seconds` (o último pode ser menor).
+    """
+    frames = len(voiced)
+    if frames == 0:
+        return [(0, total_samples, 0.0)] if total_samples else []
+    per_second = 1000 / frame_ms
+    min_frames = int(min_seconds * per_second)
+    target_frames = int(target_seconds * per_second)
+    max_frames = int(max_seconds * per_second)
+    min_silence_frames = max(1, int(min_silence_ms / frame_ms))
+
+    # Candidatos a corte: o meio de cada silêncio longo o bastante
+    cuts = []
+    run_start = None
+    for f, is_voiced in enumerate(list(voiced) + [True]):
+        if not is_voiced:
+            if run_start is None:
+                run_start = f
+        elif run_start is not None:
+            if f - run_start >= min_silence_frames:
+                cuts.append((run_start + f) // 2)
+            run_start = None
+
+    bounds = []
+    start = 0
+    k = 0
+    while frames - start > target_frames + min_frames:
+        while k < len(cuts) and cuts[k] < start + min_frames:
+            k += 1
+        limit = min(start + max_frames, frames - min_frames)
+        best = None
+        j = k
+        while j < len(cuts) and cuts[j] <= limit:
+            if best is None or abs(cuts[j] - start - target_frames) < abs(best - start - target_frames):
+                best = cuts[j]
+            j += 1
+        # Sem silêncio na janela (fala contínua): corta no limite
+        end = best if best is not None else limit
+        bounds.append((start, end))
+        start = end
+    bounds.append((start, frames))
+
+    samples_per_frame = int(sample_rate * frame_ms / 1000)
+    chunks = []
+    for i, (start, end) in enumerate(bounds):
+        first = start * samples_per_frame
+        # O último trecho leva também o resto que não fechou um quadro
+        last = total_samples if i == len(bounds) - 1 else end * samples_per_frame
+        ratio = sum(voiced[start:end]) / max(end - start, 1)
+        chunks.append((first, last, ratio))
+    return chunks
+
+
+def stitch_transcripts(texts):
+    """Junta as transcrições dos trechos na ordem, ignorando os vazios."""
+    return ' '.join(text.strip() for text in texts if text and text.strip())
+
+
+class ChunkedTranscription:
+    """
+    Transcreve os trechos de `waveform` (1 x amostras, 16 kHz) com
+    `transcribe(trecho, cancel_token)` pelo escalonador, mantendo até
+    `max_in_flight` trechos enfileirados/em execução.
+
+    - on_chunk(índice, texto, prontos): cada trecho concluído, na ordem em que terminam
+    - on_done(textos): todos concluídos, textos na ordem dos trechos
+    - on_error(exceção): chamado uma vez se um trecho falhar ou o token for
+      cancelado; os trechos ainda na fila são cancelados
+    """
+
+    def __init__(self, scheduler, transcribe, waveform, chunks, cancel_token,
+                 on_chunk, on_done, on_error, max_in_flight=2, sample_rate=SAMPLE_RATE):
+        self.scheduler = scheduler
+        self.transcribe = transcribe
+        self.waveform = waveform
+        self.chunks = chunks
+        self.cancel_token = cancel_token
+        self.on_chunk = on_chunk
+        self.on_done = on_done
+        self.on_error = on_error
+        self.max_in_flight = max(1, max_in_flight)
+        self.sample_rate = sample_rate
+
+        self._lock = threading.RLock()
+        self._results = [None] * len(chunks)
+        self._futures = {}
+        self._next = 0
+        self._done = 0
+        self._finished = False
+
+    def start(self):
+        if not self.chunks:
+            self._finish()
+            return
+        self.cancel_token.add_callback(self._on_cancel)
+        self._pump()
+
+    def _pump(self):
+        # Enfileira o próximo trecho enquanto houver vaga na janela
+        while True:
+            with self._lock:
+                if self._finished:
+                    return
+                if self.cancel_token.cancelled:
+                    self._fail(OperationCancelled(self.cancel_token.reason))
+                    return
+                if self._next >= len(self.chunks) or len(self._futures) >= self.max_in_flight:
+                    return
+                index = self._next
+                start, end, voiced_ratio = self.chunks[index]
+                if voiced_ratio < MIN_VOICED_RATIO:
+                    self._next += 1
+                    self._complete(index, '')
+                    continue
+                try:
+                    future = self.scheduler.submit(self.transcribe, self.waveform[..., start:end],
+                                                   self.cancel_token,
+                                                   audio_seconds=(end - start) / self.sample_rate)
+                except SchedulerOverloaded as e:
+                    # Fila tomada por outros pedidos: tenta o mesmo trecho de novo mais tarde
+                    logger.info(f"Fila de ASR cheia; trecho {index} reenviado em {e.retry_after} s")
+                    timer = threading.Timer(e.retry_after, self._pump)
+                    timer.daemon = True
+                    timer.start()
+                    return
+                self._next += 1
+                self._futures[index] = future
+            future.add_done_callback(lambda f, index=index: self._on_future(index, f))
+
+    def _on_future(self, index, future):
+        with self._lock:
+            self._futures.pop(index, None)
+            if self._finished:
+                return
+            if future.cancelled():
+                self._fail(OperationCancelled(self.cancel_token.reason or 'client'))
+                return
+            error = future.exception()
+            if error is not None:
+                self._fail(error)
+                return
+            self._complete(index, future.result())
+        self._pump()
+
+    def _complete(self, index, text):
+        self._results[index] = text
+        self._done += 1
+        self.on_chunk(index, text, self._done)
+        if self._done == len(self.chunks):
+            self._finish()
+
+    def _finish(self):
+        self._finished = True
+        self.cancel_token.remove_callback(self._on_cancel)
+        self.on_done(list(self._results))
+
+    def _fail(self, error):
+        if self._finished:
+            return
+        self._finished = True
+        self.cancel_token.remove_callback(self._on_cancel)
+        for future in list(self._futures.values()):
+            future.cancel()
+        self.on_error(error)
+
+    def _on_cancel(self):
+        with self._lock:
+            pending = list(self._futures.values())
+            idle = not pending
+        # Os cancelados na fila avisam por _on_future; sem nenhum em voo, falha aqui
+        for future in pending:
+            future.cancel()
+        if idle:
+            with self._lock:
+                self._fail(OperationCancelled(self.cancel_token.reason))
@@ -0,0 +1,36 @@
+# RequestIds.py
+#
+# Id da requisição, compartilhado pelo profiler (X-Profile-Id, nome dos
+# arquivos em PROFILE_DIR) e pelo rastreamento (X-Trace-Id, trace_id dos
+# spans): o X-Request-Id do proxy, se for curto e só tiver [A-Za-z0-9_-]
+# (seguro como nome de arquivo), ou um uuid4 novo. O id fica guardado no
+# environ WSGI, então profiler e trace da mesma requisição usam o mesmo.
+#
+# Só biblioteca padrão: Tracing não importa o Flask ao ser importado.
+
+import uuid
+
+MAX_LENGTH = 64
+_ENVIRON_KEY = 'pronunciation.request_id'
+
+
+def is_valid(candidate):
+    return (0 < len(candidate) <= MAX_LENGTH
+            and all((c.isascii() and c.isalnum()) or c in '-_' for c in candidate))
+
+
+def request_id(environ):
+    """Id da requisição do environ WSGI (calculado uma vez por requisição)."""
+    found = environ.get(_ENVIRON_KEY)
+    if found is None:
+        candidate = environ.get('HTTP_X_REQUEST_ID', '')
+        found = environ[_ENVIRON_KEY] = candidate if is_valid(candidate) else uuid.uuid4().hex
+    return found
+
+
+def tag_response(response, header, value):
+    """Põe `header: value` na resposta de uma view (Response ou (Response, status))."""
+    target = response[0] if isinstance(response, tuple) else response
+    if hasattr(target, 'headers'):
+        target.headers[header] = value
+    return response
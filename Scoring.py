@@ -0,0 +1,123 @@
+# Scoring.py
+#
+# Pontuação de uma tentativa: alinha a transcrição do ASR com o texto de
+# referência e gera diff_html, pronúncias e feedback por palavra.
+# Compartilhado entre /upload (síncrono) e a API de jobs (ScoringJobs.py).
+
+import time
+
+import WordMatching
+import WordMetrics
+from Cancellation import check_cancelled
+import Metrics
+import Tracing
+from SingleFlight import SingleFlight
+from TextPipeline import transliterate_and_convert_sentence, normalize_text
+
+# Vários alunos enviando a mesma frase ao mesmo tempo: a pronúncia de referência é calculada uma vez
+reference_flight = SingleFlight('reference_transliteration')
+
+
+# Similaridade fonética mínima para a palavra contar como correta
+DEFAULT_SIMILARITY_THRESHOLD = 0.8
+
+
+def compare_phonetics(phonetic1, phonetic2, threshold=DEFAULT_SIMILARITY_THRESHOLD):
+    """Usa similaridade híbrida melhorada"""
+    similarity = WordMetrics.hybrid_similarity(phonetic1, phonetic2)
+    return similarity >= threshold
+
+
+def reference_pronunciations(words_real):
+    """Pronúncia de cada palavra distinta do texto de referência."""
+    pronunciations = {}
+    for word in dict.fromkeys(words_real):
+        with Tracing.span('transliterate', word=word):
+            pronunciations[word] = transliterate_and_convert_sentence(word)
+    return pronunciations
+
+
+def score_transcription(transcription, text, cancel_token=None, threshold=DEFAULT_SIMILARITY_THRESHOLD):
+    """
+    Compara a transcrição do áudio com o texto de referência; `threshold` é a
+    similaridade fonética mínima para uma palavra contar como correta.
+    Retorna o dicionário de resposta de /upload (ratio, diff_html,
+    pronunciations, feedback, completeness_score).
+    Levanta OperationCancelled se cancel_token for cancelado.
+    """
+    # Normalização e comparação
+    normalized_transcription = normalize_text(transcription)
+    normalized_text = normalize_text(text)
+    words_estimated = normalized_transcription.split()
+    words_real = normalized_text.split()
+
+    with Tracing.span('reference_transliteration', words=len(words_real)):
+        reference = reference_flight.do(normalized_text, reference_pronunciations, words_real)
+
+    # Alinhamento e métricas (textos longos: âncoras + faixa, ver WordMatching)
+    with Tracing.span('alignment', words_real=len(words_real), words_estimated=len(words_estimated)):
+        mapped_words, mapped_indices = WordMatching.get_best_mapped_words(
+            words_estimated, words_real, cancel_token=cancel_token
+        )
+
+    # Geração do diff_html e feedback
+    diff_html = []
+    pronunciations = {}
+    feedback = {}
+    correct_count = 0
+    incorrect_count = 0
+
+    feedback_start = time.perf_counter()
+    for idx, real_word in enumerate(words_real):
+        check_cancelled(cancel_token)
+        mapped_word = mapped_words[idx]
+        if mapped_word != '-':
+            correct_pron = reference[real_word]
+            if mapped_word == real_word:
+                # Palavra idêntica à referência: a pronúncia é a do léxico, já calculada
+                user_pron = correct_pron
+            else:
+                with Tracing.span('transliterate', word=mapped_word):
+                    user_pron = transliterate_and_convert_sentence(mapped_word)
+            if mapped_word == real_word or compare_phonetics(correct_pron, user_pron, threshold):
+                diff_html.append(f'<span class="word correct" onclick="showPronunciation(\'{real_word}\')">{real_word}</span>')
+                correct_count += 1
+            else:
+                diff_html.append(f'<span class="word incorrect" onclick="showPronunciation(\'{real_word}\')">{real_word}</span>')
+                incorrect_count += 1
+                feedback[real_word] = {
+                    'correct': correct_pron,
+                    'user': user_pron,
+                    'suggestion': f"Tente pronunciar '{real_word}' como '{correct_pron}'"
+                }
+            pronunciations[real_word] = {
+                'correct': correct_pron,
+                'user': user_pron
+            }
+        else:
+            diff_html.append(f'<span class="word missing" onclick="showPronunciation(\'{real_word}\')">{real_word}</span>')
+            incorrect_count += 1
+            feedback[real_word] = {
+                'correct': reference[real_word],
+                'user': '',
+                'suggestion': f"Tente pronunciar '{real_word}' como '{reference[real_word]}'"
+            }
+            pronunciations[real_word] = {
+                'correct': reference[real_word],
+                'user': ''
+            }
+
+    Metrics.STAGE_SECONDS.observe(time.perf_counter() - feedback_start, stage='feedback')
+
+    diff_html = ' '.join(diff_html)
+    total_words = correct_count + incorrect_count
+    ratio = (correct_count / total_words) * 100 if total_words > 0 else 0
+    completeness_score = (len(mapped_words) / len(words_real)) * 100 if len(words_real) > 0 else 0
+
+    return {
+        'ratio': f"{ratio:.2f}",
+        'diff_html': diff_html,
+        'pronunciations': pronunciations,
+        'feedback': feedback,
+        'completeness_score': f"{completeness_score:.2f}"
+    }
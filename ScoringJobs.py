@@ -0,0 +1,200 @@
+# ScoringJobs.py
+#
+# API assíncrona de pontuação de áudio: o cliente envia o áudio, recebe um
+# job_id na hora e acompanha o progresso por polling (GET /jobs/<id>) ou por
+# server-sent events (GET /jobs/<id>/events).
+#
+# Tudo roda no próprio processo: uma fila limitada (queue.Queue) alimenta
+# threads de trabalho, e o JobStore em memória faz o papel de um armazenamento
+# externo (Redis etc.), sem exigir nenhum serviço adicional.
+
+import json
+import time
+import uuid
+import queue
+import logging
+import threading
+
+from Cancellation import OperationCancelled
+
+logger = logging.getLogger(__name__)
+
+# Estados de um job, na ordem em que normalmente acontecem
+JOB_QUEUED = 'queued'
+JOB_TRANSCRIBING = 'transcribing'
+JOB_TRANSCRIBED = 'transcribed'
+JOB_DONE = 'done'
+JOB_ERROR = 'error'
+JOB_CANCELLED = 'cancelled'
+FINAL_STATES = (JOB_DONE, JOB_ERROR, JOB_CANCELLED)
+
+
+class JobQueueFull(Exception):
+    """A fila de jobs atingiu o limite; o cliente deve tentar mais tarde."""
+
+
+class JobStore:
+    """
+    Armazenamento de jobs em memória, seguro entre threads.
+
+    Cada job guarda seu estado atual e a lista de eventos emitidos, para que
+    um assinante SSE possa retomar a partir de um cursor. Jobs finalizados
+    expiram depois de `ttl_seconds`.
+    """
+
+    def __init__(self, ttl_seconds=900):
+        self.ttl_seconds = ttl_seconds
+        self._jobs = {}
+        self._cond = threading.Condition()
+
+    def create(self, **fields):
+        job_id = uuid.uuid4().hex
+        now = time.time()
+        job = {
+            'id': job_id,
+            'status': JOB_QUEUED,
+            'created_at': now,
+            'updated_at': now,
+            'transcription': None,
+            'result': None,
+            'error': None,
+            'events': [{'status': JOB_QUEUED}],
+        }
+        job.update(fields)
+        with self._cond:
+            self._evict_expired(now)
+            self._jobs[job_id] = job
+        return job_id
+
+    def update(self, job_id, status, **fields):
+        """
+        Muda o estado do job, registra o evento e acorda os assinantes. Um job
+        em estado final não muda mais: um callback atrasado (ex.: o ASR que
+        termina depois do DELETE) não reabre o job.
+        """
+        with self._cond:
+            job = self._jobs.get(job_id)
+            if job is None or job['status'] in FINAL_STATES:
+                return
+            job.update(fields)
+            job['status'] = status
+            job['updated_at'] = time.time()
+            event = {'status': status}
+            event.update(fields)
+            job['events'].append(event)
+            self._cond.notify_all()
+
+    def get(self, job_id):
+        """Retorna uma cópia pública do job (sem a lista de eventos) ou None."""
+        with self._cond:
+            job = self._jobs.get(job_id)
+            if job is None:
+                return None
+            return {k: v for k, v in job.items() if k != 'events'}
+
+    def wait_for_events(self, job_id, cursor, timeout):
+        """
+        Bloqueia até haver eventos depois de `cursor` (ou até `timeout`).
+        Retorna (novos_eventos, novo_cursor); (None, cursor) se o job não existe.
+        """
+        deadline = time.monotonic() + timeout
+        with self._cond:
+            while True:
+                job = self._jobs.get(job_id)
+                if job is None:
+                    return None, cursor
+                events = job['events']
+                if len(events) > cursor:
+                    return events[cursor:], len(events)
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return [], cursor
+                self._cond.wait(remaining)
+
+    def _evict_expired(self, now):
+        expired = [
+            job_id for job_id, job in self._jobs.items()
+            if job['status'] in FINAL_STATES and now - job['updated_at'] > self.ttl_seconds
+        ]
+        for job_id in expired:
+            del self._jobs[job_id]
+
+
+class ScoringJobQueue:
+    """
+    Fila limitada + threads de trabalho.
+
+    `handler(job_id, payload)` faz o trabalho e reporta o progresso via
+    store.update(); exceções viram estado 'error' (OperationCancelled vira
+    'cancelled'). `on_reject(payload)` é
+    chamado quando a fila está cheia (ex.: para apagar o arquivo temporário).
+    """
+
+    def __init__(self, store, handler, max_pending=32, workers=2, on_reject=None):
+        self.store = store
+        self.handler = handler
+        self.on_reject = on_reject
+        self._queue = queue.Queue(maxsize=max_pending)
+        self._threads = []
+        for i in range(workers):
+            t = threading.Thread(target=self._worker, name=f'scoring-job-{i}', daemon=True)
+            t.start()
+            self._threads.append(t)
+
+    def submit(self, payload, job_id=None):
+        """
+        Enfileira o job e retorna o job_id. Levanta JobQueueFull se não houver vaga.
+        Se `job_id` for dado, o job já existe no store (ex.: criado na admissão).
+        """
+        if job_id is None:
+            job_id = self.store.create()
+        try:
+            self._queue.put_nowait((job_id, payload))
+        except queue.Full:
+            self.store.update(job_id, JOB_ERROR, error="Fila de jobs cheia.")
+            if self.on_reject:
+                self.on_reject(payload)
+            raise JobQueueFull()
+        return job_id
+
+    def pending(self):
+        return self._queue.qsize()
+
+    def _worker(self):
+        while True:
+            job_id, payload = self._queue.get()
+            try:
+                self.handler(job_id, payload)
+            except OperationCancelled as e:
+                logger.info(f"Job {job_id} cancelado: {e}")
+                self.store.update(job_id, JOB_CANCELLED, error=str(e))
+            except Exception as e:
+                logger.exception(f"Erro no job {job_id}: {e}")
+                self.store.update(job_id, JOB_ERROR, error=str(e))
+            finally:
+                self._queue.task_done()
+
+
+def sse_event_stream(store, job_id, keepalive_seconds=15):
+    """
+    Gerador de server-sent events para um job: um evento por mudança de
+    estado ('transcribed' traz a transcrição, 'done' traz o resultado
+    completo). Envia comentários de keep-alive e termina no estado final.
+    """
+    cursor = 0
+    while True:
+        events, cursor = store.wait_for_events(job_id, cursor, keepalive_seconds)
+        if events is None:
+            yield _format_sse('error', {'status': JOB_ERROR, 'error': "Job não encontrado."})
+            return
+        if not events:
+            yield ': keep-alive\n\n'
+            continue
+        for event in events:
+            yield _format_sse(event['status'], event)
+            if event['status'] in FINAL_STATES:
+                return
+
+
+def _format_sse(event_name, data):
+    return f"event: {event_name}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
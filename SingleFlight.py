@@ -0,0 +1,72 @@
+# SingleFlight.py
+#
+# Coalescência de trabalho idêntico concorrente ("single flight"): se várias
+# requisições pedem a mesma chave ao mesmo tempo (a turma inteira recebe a
+# mesma frase), só a primeira executa a função; as outras esperam e recebem
+# o mesmo resultado (ou a mesma exceção). Não é um cache: terminada a
+# execução, a chave sai do mapa e o próximo pedido executa de novo.
+#
+# O resultado é compartilhado entre as threads: quem o recebe não deve alterá-lo.
+#
+# Uso:
+#     pronounce_flight = SingleFlight('pronounce')
+#     result = pronounce_flight.do(text, transliterate_and_convert_sentence, text)
+#
+# Contagem em pronunciation_singleflight_requests_total{group, role=leader|coalesced}.
+
+import threading
+
+import Metrics
+
+SINGLEFLIGHT_REQUESTS = Metrics.counter(
+    'pronunciation_singleflight_requests_total',
+    'Chamadas por grupo de single-flight: leader executou, coalesced reaproveitou.',
+    ('group', 'role')
+)
+
+
+class _Call:
+    __slots__ = ('done', 'result', 'error')
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    def __init__(self, group):
+        self.group = group
+        self._calls = {}
+        self._lock = threading.Lock()
+
+    def do(self, key, fn, *args, **kwargs):
+        """Executa fn(*args, **kwargs) uma vez por chave entre chamadas concorrentes."""
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+
+        if not leader:
+            SINGLEFLIGHT_REQUESTS.inc(group=self.group, role='coalesced')
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        SINGLEFLIGHT_REQUESTS.inc(group=self.group, role='leader')
+        try:
+            call.result = fn(*args, **kwargs)
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+        return call.result
+
+    def in_flight(self):
+        with self._lock:
+            return len(self._calls)
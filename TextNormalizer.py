@@ -0,0 +1,154 @@
+# TextNormalizer.py
+#
+# Normalizadores de texto pré-compilados a partir de tabelas ordenadas de
+# reescrita. Cada normalizador faz, no máximo:
+#
+#   1. str.lower();
+#   2. str.translate com uma tabela de caracteres (remoção de acentos,
+#      de pontuação e trocas 1 -> 1), preenchida sob demanda;
+#   3. uma única passada de uma regex que combina todas as reescritas em
+#      alternativas nomeadas: em cada posição vence a primeira alternativa
+#      da tabela que casar, e o texto produzido não é reanalisado.
+#
+# Substitui as cadeias de re.sub / str.replace sequenciais de
+# TextPipeline.normalize_text, WordMetrics.preprocess_french_pronunciation e
+# WordMatching.convert_to_phonetics. Onde uma regra antiga dependia da saída
+# de outra (ex.: 'ôi' -> 'oi' -> 'wa'), a tabela tem a alternativa composta
+# explícita. As versões antigas ficam em TextNormalizerReference:
+# test_TextNormalizer.py compara as saídas e benchmarks/bench_normalizer.py
+# mede o ganho.
+
+import re
+import unicodedata
+
+
+class _AccentTable(dict):
+    """
+    Tabela para str.translate que remove acentos como NFD + descarte das
+    marcas (categoria Mn) e, se `keep` for dado, descarta também o que não
+    casar com essa regex de um caractere. Cada caractere é decomposto uma vez,
+    no primeiro uso.
+    """
+
+    def __init__(self, extra=None, keep=None):
+        super().__init__()
+        self.keep = re.compile(keep) if keep else None
+        for char, replacement in (extra or {}).items():
+            self[ord(char)] = replacement
+
+    def __missing__(self, ordinal):
+        stripped = ''.join(c for c in unicodedata.normalize('NFD', chr(ordinal))
+                           if unicodedata.category(c) != 'Mn'
+                           and (self.keep is None or self.keep.match(c)))
+        self[ordinal] = stripped
+        return stripped
+
+
+class Normalizer:
+    """
+    rewrites: lista ordenada de (regex, substituição), sem grupos de captura;
+    a substituição é uma string ou uma função que recebe o trecho casado.
+    """
+
+    def __init__(self, rewrites=(), translate=None, lower=True, flags=0):
+        self.lower = lower
+        self.translate = translate
+        self._replacements = {}
+        alternatives = []
+        for i, (pattern, replacement) in enumerate(rewrites):
+            name = f'r{i}'
+            alternatives.append(f'(?P<{name}>{pattern})')
+            self._replacements[name] = replacement
+        self._regex = re.compile('|'.join(alternatives), flags) if alternatives else None
+        # Uma regra só, com substituição fixa: re.sub sem chamar Python por trecho
+        self._template = None
+        if len(rewrites) == 1 and isinstance(rewrites[0][1], str):
+            self._template = rewrites[0][1].replace('\\', '\\\\')
+
+    def _replace(self, match):
+        replacement = self._replacements[match.lastgroup]
+        return replacement if isinstance(replacement, str) else replacement(match.group())
+
+    def __call__(self, text):
+        if self.lower:
+            text = text.lower()
+        if self.translate is not None:
+            text = text.translate(self.translate)
+        if self._template is not None:
+            text = self._regex.sub(self._template, text)
+        elif self._regex is not None:
+            text = self._regex.sub(self._replace, text)
+        return text
+
+
+ACCENT_TABLE = _AccentTable()
+
+
+def remove_accents(text):
+    return text.translate(ACCENT_TABLE)
+
+
+###############################################################################
+# Texto do aluno / referência (Scoring): minúsculas, sem acentos, só letras,
+# dígitos, espaços e apóstrofos, sem espaço em volta dos apóstrofos.
+###############################################################################
+TEXT_REWRITES = [
+    # A pontuação já saiu na tabela; somem os espaços em volta dos apóstrofos
+    (r"\s*'\s*", "'"),
+]
+_text = Normalizer(TEXT_REWRITES, translate=_AccentTable({'’': "'"}, keep=r"[\w\s']"))
+
+
+def normalize_text(text):
+    return _text(text).strip()
+
+
+###############################################################################
+# Forma fonética simplificada do francês (WordMetrics.hybrid_similarity)
+###############################################################################
+# Nasais, como eram aplicadas em sequência: a vogal que segue "in"/"on" pode
+# já ter virado nasal (não conta mais como vogal) numa regra anterior.
+_AM = r'(?:am|em|om)(?=[^aeiouy]|$)'
+_IN = r'(?:in|yn|ain|ein)(?=[^aeiouy]|$|' + _AM + r')'
+_ON = r'on(?=[^aeiouy]|$|' + _AM + r'|' + _IN + r')'
+_NASAL = r'(?:' + _AM + r'|' + _IN + r')'
+
+FRENCH_PRONUNCIATION_REWRITES = [
+    # Nasais prioritárias
+    (_AM, 'ɑ̃'),
+    (_IN, 'ɛ̃'),
+    (_ON, 'ɔ̃'),
+
+    # Grupos consonantais específicos (o "e" que começa uma nasal já foi usado)
+    (r'ch', 'ʃ'),
+    (r'g(?!' + _NASAL + r')e', 'ʒ'),
+    (r'j', 'ʒ'),
+
+    # "oi" → "wa", também quando o "o" vem de "ô", exceto antes de "in" nasal
+    (r'[oô](?!' + _IN + r')i', 'wa'),
+
+    # Vogais
+    (r'é|ê', 'e'),
+    (r'è', 'ɛ'),
+    (r'â', 'a'),
+    (r'ô', 'o'),
+
+    # Regra para "gue" → "ʒ" (também "gué"/"guê", que viravam "gue")
+    (r'gu(?:[éê]|(?!' + _NASAL + r')e)', 'ʒ'),
+]
+normalize_french_pronunciation = Normalizer(FRENCH_PRONUNCIATION_REWRITES, flags=re.IGNORECASE)
+
+
+###############################################################################
+# Pseudo-fonética das palavras no alinhamento (WordMatching.compute_word_cost)
+###############################################################################
+PSEUDO_PHONETIC_REWRITES = [
+    ('ch', 'ʃ'),
+    ('ou', 'u'),
+    ('on', 'õ'),
+]
+_pseudo_phonetic = Normalizer(PSEUDO_PHONETIC_REWRITES, translate=ACCENT_TABLE)
+
+
+def pseudo_phonetic(word):
+    return _pseudo_phonetic(word.strip())
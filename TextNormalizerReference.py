@@ -0,0 +1,113 @@
+# TextNormalizerReference.py
+#
+# Cadeias sequenciais de re.sub / str.replace que o TextNormalizer substituiu,
+# copiadas como referência, e as entradas em que as duas versões são
+# comparadas (corpus + cadeias aleatórias com as letras que disparam as
+# regras). Usado por test_TextNormalizer.py (saídas iguais) e por
+# benchmarks/bench_normalizer.py (tempo de cada versão).
+#
+# Só biblioteca padrão e o corpus do repositório: os testes não dependem do
+# código dos benchmarks.
+
+import os
+import re
+import pickle
+import random
+import unicodedata
+
+CORPUS_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'frases_categorias.pickle')
+FUZZ_CASES = 20000
+
+
+###############################################################################
+# Implementações de referência (antes do TextNormalizer)
+###############################################################################
+def reference_remove_accents(text):
+    return ''.join(
+        c for c in unicodedata.normalize('NFD', text)
+        if unicodedata.category(c) != 'Mn'
+    )
+
+
+def reference_normalize_text(text):
+    text = text.lower()
+    text = text.replace("’", "'")
+    text = reference_remove_accents(text)
+    text = re.sub(r"[^\w\s']", '', text)
+    text = re.sub(r"\s+'", "'", text)
+    text = re.sub(r"'\s+", "'", text)
+    return text.strip()
+
+
+def reference_preprocess_french_pronunciation(text):
+    text = text.lower()
+    replacements = [
+        (r'(?i)(am|em|om)(?=[^aeiouy]|$)', 'ɑ̃'),
+        (r'(?i)(in|yn|ain|ein)(?=[^aeiouy]|$)', 'ɛ̃'),
+        (r'(?i)(on)(?=[^aeiouy]|$)', 'ɔ̃'),
+        (r'(?i)ch', 'ʃ'),
+        (r'(?i)ge', 'ʒ'),
+        (r'(?i)j', 'ʒ'),
+        (r'(?i)é|ê', 'e'),
+        (r'(?i)è', 'ɛ'),
+        (r'(?i)â', 'a'),
+        (r'(?i)ô', 'o'),
+        (r'(?i)oi', 'wa'),
+        (r'(?i)gue', 'ʒ'),
+    ]
+    for pattern, repl in replacements:
+        text = re.sub(pattern, repl, text)
+    return text
+
+
+def reference_convert_to_phonetics(word):
+    w = word.lower().strip()
+    w = reference_remove_accents(w)
+    return w.replace("ch", "ʃ").replace("ou", "u").replace("on", "õ")
+
+
+###############################################################################
+# Entradas
+###############################################################################
+def corpus_sentences():
+    """Frases de todas as categorias, em ordem estável."""
+    with open(CORPUS_FILE, 'rb') as f:
+        categorized = pickle.load(f)
+    return [s for category in sorted(categorized) for s in categorized[category]]
+
+
+def corpus_words(limit=None, seed=0):
+    words = [word for sentence in corpus_sentences() for word in sentence.split()]
+    if limit is not None:
+        random.Random(seed).shuffle(words)
+        words = words[:limit]
+    return words
+
+
+def _fuzz(alphabet, seed):
+    rng = random.Random(seed)
+    return [''.join(rng.choice(alphabet) for _ in range(rng.randint(0, 12)))
+            for _ in range(FUZZ_CASES)]
+
+
+def text_inputs():
+    return corpus_sentences() + _fuzz("aéÉÀç’' !?,.-«»\t\n1_", seed=1)
+
+
+def french_inputs():
+    from TextPipeline import transliterate_and_convert_sentence
+    pronunciations = [transliterate_and_convert_sentence(w) for w in corpus_words(limit=1000)]
+    return (pronunciations + [reference_convert_to_phonetics(w) for w in corpus_words()]
+            + _fuzz('aeiouyéêèâôgjchmnAÉ ', seed=2) + _fuzz('aeioyugnmôé', seed=3))
+
+
+def phonetic_inputs():
+    return corpus_words() + _fuzz('aeiouôchnmÉç ', seed=4)
+
+
+# caso -> (entradas, função do TextNormalizer, referência)
+CASES = {
+    'text': (text_inputs, 'normalize_text', reference_normalize_text),
+    'french': (french_inputs, 'normalize_french_pronunciation', reference_preprocess_french_pronunciation),
+    'phonetic': (phonetic_inputs, 'pseudo_phonetic', reference_convert_to_phonetics),
+}
@@ -0,0 +1,549 @@
+# TextPipeline.py
+#
+# Pipeline de texto (pronúncia aproximada em pt-BR, normalização etc.).
+# Este módulo NÃO importa torch/transformers/ortools: ele é compartilhado
+# entre o servidor completo (main.py) e o servidor só-texto (main_text.py).
+
+import json
+import hashlib
+import logging
+import threading
+import unicodedata
+from functools import lru_cache
+
+import Metrics
+import Phonemes
+import TextNormalizer
+from ContextRules import apply_liaison
+from SpecialRoules import FRENCH_CONTEXT_RULES
+
+logger = logging.getLogger(__name__)
+
+# Distância máxima (em tokens) até onde o contexto influencia a pronúncia de
+# uma palavra: 'est ce que' (3 tokens) + vizinho de liaison/plus/est.
+CONTEXT_RADIUS = 4
+
+# Iniciar o Epitran e funções de tradução --------------------------------------------------------------------------------------------------
+# O Epitran para Francês leva ~2 s para carregar as tabelas (panphon/pandas).
+# Como ele só é usado quando a palavra não está no dic.json, carregamos sob demanda.
+_epi = None
+_epi_lock = threading.Lock()
+
+
+def get_epitran():
+    global _epi
+    if _epi is None:
+        with _epi_lock:
+            if _epi is None:
+                import epitran
+                _epi = epitran.Epitran('fra-Latn')
+    return _epi
+
+
+# Carregar o dic.json
+with open('dic.json', 'rb') as f:
+    _dic_bytes = f.read()
+ipa_dictionary = json.loads(_dic_bytes)
+# Versão do léxico: entra no ETag das respostas de GET /pronounce e /hints
+LEXICON_VERSION = hashlib.sha256(_dic_bytes).hexdigest()[:16]
+del _dic_bytes
+
+# Mapeamento de fonemas francês para português com regras contextuais aprimoradas
+# Cada entrada deve ser um dicionário com, no mínimo, a chave 'default'.
+# Se houver contextos adicionais (ex.: 'before_front_vowel', 'word_initial', etc.),
+# mantenha também o 'default' para evitar KeyError.
+
+french_to_portuguese_phonemes = {
+    # VOGAIS ORAIS
+    'i': { 'default': 'i' },
+    'e': { 'default': 'e' },
+    'ɛ': { 'default': 'é' },
+    'a': { 'default': 'a' },
+    'ɑ': { 'default': 'a' },    # se não quiser “á” aberto
+    'ɔ': { 'default': 'ó' },
+    'o': { 'default': 'ô' },
+    'u': { 'default': 'u' },
+    'y': { 'default': 'u' },
+    'ø': { 'default': 'eu' },   # ou 'ô', se preferir "vou" ~ "vô"
+    'œ': { 'default': 'eu' },   # ou 'é'
+    'ə': { 'default': 'e'  },   # TROCA IMPORTANTE: schwa -> “e”
+
+    # VOGAIS NASAIS
+    'ɛ̃': { 'default': 'ẽ' },
+    'ɑ̃': { 'default': 'ã' },
+    'ɔ̃': { 'default': 'õ' },
+    'œ̃': { 'default': 'ũ' },
+    'ð':  { 'default': 'd'  },
+
+    # SEMIVOGAIS
+    'w': { 'default': 'u' },
+    'ɥ': { 'default': 'u', 'after_vowel': 'w' },
+
+    # CONSOANTES
+    'b':  { 'default': 'b' },
+    'd':  { 'default': 'd', 'before_i': 'dj' },
+    'f':  { 'default': 'f' },
+    'g':  { 'default': 'g', 'before_front_vowel': 'j' },
+    'ʒ':  { 'default': 'j' },
+    'k':  { 'default': 'k', 'before_front_vowel': 'qu' },
+    'l':  { 'default': 'l' },
+    'm':  { 'default': 'm' },
+    'n':  { 'default': 'n' },
+    'p':  { 'default': 'p' },
+    # REMOVE o "rr" e "h" aqui:
+    'ʁ':  { 'default': 'r' }, 
+    's':  { 
+        'default': 's',
+        'between_vowels': 'z',
+        'word_final': 's'
+    },
+    't':  { 'default': 't', 'before_i': 'tch' },
+    'v':  { 'default': 'v' },
+    'z':  { 'default': 'z' },
+    'ʃ':  { 'default': 'ch' },
+    'dʒ': { 'default': 'dj' },
+    'tʃ': { 'default': 'tch' },
+    'ɲ':  { 'default': 'nh' },
+    'ŋ':  { 'default': 'ng' },
+    'ç':  { 'default': 's' },
+    'ʎ':  { 'default': 'lh' },
+    'ʔ':  { 'default': '' },
+    'θ':  { 'default': 't' },
+    'ɾ':  { 'default': 'r' },
+    'ʕ':  { 'default': 'r' },
+
+    # FONEMAS COMPOSTOS
+    'sj': { 'default': 'si' },  
+    'ks': { 'default': 'x' },
+    'gz': { 'default': 'gz' },
+    'x':  { 'default': 'x' },
+    'ʃj': { 'default': 'chi' },
+    'ʒʁ':{ 'default': 'jr' },
+
+    # H aspirado ou mudo
+    'h':  {
+        'default': '',
+        'aspirated': 'h',
+        'mute': ''
+    },
+
+    # Consoantes duplas
+    'kk': { 'default': 'c' },
+    'tt': { 'default': 't' },
+    'pp': { 'default': 'p' },
+    'bb': { 'default': 'b' },
+    'gg': { 'default': 'g' },
+
+    # Finais
+    'k$': { 'default': 'c' },
+    'g$': { 'default': 'g' },
+    'p$': { 'default': 'p' },
+    't$': { 'default': 't' },
+
+    # Outros
+    'ɡə': { 'default': 'gue' },
+    'ɡi': { 'default': 'gi' },
+    'ʧ': { 'default': 'tch' },
+    'ʤ': { 'default': 'dj' }
+}
+
+# Características fonéticas: palavras de 'h' aspirado e demais regras de
+# contexto ficam em SpecialRoules.py
+
+#--------------------------------------------------------------------------------------------------
+
+# Funções de pronúncia e transcrição --------------------------------------------------------------------------------------------------
+# 
+def get_pronunciation(word):
+    word_normalized = word.lower()
+    # Tratar casos especiais para artigos definidos e pronomes tonicos
+    if word_normalized == 'le':
+        return 'luh'
+    elif word_normalized == 'la':
+        return 'lá'
+    elif word_normalized == 'les':
+        return 'lê'
+    elif word_normalized== 'moi':
+        return 'mwa'
+    elif word_normalized== 'toi':
+        return 'twa'
+    elif word_normalized== 'lui':
+        return 'lui'
+    elif word_normalized== 'elle':
+        return 'él'
+    elif word_normalized== 'nous':
+        return 'nu'
+    elif word_normalized== 'vous':
+        return 'vu'
+    elif word_normalized== 'eux':
+        return 'ø'
+    elif word_normalized== 'elles':
+        return 'él'
+    elif word_normalized=='une':
+        return  'úne'
+    elif word_normalized=='un':
+        return  'ãn'
+    elif word_normalized=="Il est":
+        return 'il ét'
+    else:
+        try:
+            # Tentar obter a pronúncia do dic.json
+            pronunciation = ipa_dictionary.get(word_normalized)
+            if pronunciation:
+                Metrics.CACHE_REQUESTS.inc(cache='lexicon', result='hit')
+                return pronunciation
+            else:
+                # Se não encontrado, usar Epitran como fallback
+                Metrics.CACHE_REQUESTS.inc(cache='lexicon', result='miss')
+                Metrics.EPITRAN_FALLBACKS.inc()
+                pronunciation = get_epitran().transliterate(word)
+                return pronunciation
+        except Exception as e:
+            logger.error(f"Erro ao obter pronúncia para '{word}': {e}")
+            return word  # Retorna a palavra original como fallback
+
+
+def remove_silent_endings(pronunciation, word):
+    # Verificar se a palavra termina com 'ent' e a pronúncia termina com 't'
+    if word.endswith('ent') and pronunciation.endswith('t'):
+        pronunciation = pronunciation[:-1]
+    # Adicionar outras regras conforme necessário
+    return pronunciation
+
+
+# Ajustar listas conforme sua necessidade
+vogais_orais = ['a', 'e', 'i', 'o', 'u', 'é', 'ê', 'í', 'ó', 'ô', 'ú', 'ø', 'œ', 'ə']
+vogais_nasais = ['ã', 'ẽ', 'ĩ', 'õ', 'ũ']
+semivogais = ['j', 'w', 'ɥ']
+grupos_consonantais_especiais = ['tch', 'dj', 'sj', 'dʒ', 'ks']
+consoantes_base = [
+    'b','d','f','g','k','l','m','n','p','ʁ','r','s','t','v','z','ʃ','ʒ','ɲ','ŋ','ç'
+]
+
+excecoes_semivogais = {
+    # Exemplos de exceções: padrão -> substituição
+    # Caso queira ajustar manualmente certos clusters após a primeira passagem.
+    # Por exemplo, se "sós.jó" sempre deveria ficar "sósjó"
+    ("sós","jó"): ["sósjó"],
+    ("próm","uv"): ["pró","muv"],  # exemplo hipotético
+}
+
+def e_vogal(c):
+    return (c in vogais_orais) or (c in vogais_nasais)
+
+def e_vogal_nasal(c):
+    return c in vogais_nasais
+
+def e_semivogal(c):
+    return c in semivogais
+
+def e_consoante(c):
+    return c in consoantes_base
+
+def e_grupo_consonantal(seq):
+    return seq in grupos_consonantais_especiais
+
+def tokenizar_palavra(palavra):
+    i = 0
+    tokens = []
+    while i < len(palavra):
+        matched = False
+        for gc in grupos_consonantais_especiais:
+            length = len(gc)
+            if palavra[i:i+length] == gc:
+                tokens.append(gc)
+                i += length
+                matched = True
+                break
+        if not matched:
+            tokens.append(palavra[i])
+            i += 1
+    return tokens
+
+def ajustar_semivogais(silabas):
+    # Primeiro, mover semivogais do final da sílaba se a próxima inicia com vogal
+    novas_silabas = []
+    i = 0
+    while i < len(silabas):
+        s = silabas[i]
+        if i < len(silabas)-1:
+            ultima_letra = s[-1]
+            proxima_silaba = silabas[i+1]
+            if ultima_letra in semivogais and e_vogal(proxima_silaba[0]):
+                # Move a semivogal para a próxima sílaba
+                s = s[:-1]
+                proxima_silaba = ultima_letra + proxima_silaba
+                novas_silabas.append(s)
+                silabas[i+1] = proxima_silaba
+            else:
+                novas_silabas.append(s)
+        else:
+            # Última sílaba, apenas adiciona
+            novas_silabas.append(s)
+        i += 1
+
+    silabas = novas_silabas
+
+    # Agora, tentar mesclar semivogais do início de uma sílaba anterior se a anterior terminou em vogal
+    # Exemplo: se anterior terminar em vogal e a atual começar com semivogal + vogal, podemos unir.
+    # Cuidado para não bagunçar a lógica já aplicada. Faça testes com frases reais.
+    novas_silabas = []
+    i = 0
+    while i < len(silabas):
+        if i > 0:
+            # Verifica se a sílaba atual começa com semivogal e a anterior termina em vogal
+            si = silabas[i]
+            anterior = novas_silabas[-1]
+            if si and e_semivogal(si[0]) and e_vogal(anterior[-1]):
+                # Une a semivogal com a sílaba anterior
+                novas_silabas[-1] = novas_silabas[-1] + si
+            else:
+                novas_silabas.append(si)
+        else:
+            novas_silabas.append(silabas[i])
+        i += 1
+
+    silabas = novas_silabas
+
+    # Aplicar exceções específicas de semivogais:
+    # Procurar padrões em pares de sílabas e substituir caso encontre
+    i = 0
+    refinadas = []
+    while i < len(silabas):
+        if i < len(silabas)-1:
+            par = (silabas[i], silabas[i+1])
+            if par in excecoes_semivogais:
+                # Substituir pelo padrão definido
+                refinadas.extend(excecoes_semivogais[par])
+                i += 2
+                continue
+        refinadas.append(silabas[i])
+        i += 1
+
+    return refinadas
+
+def silabificar_refinado(palavra):
+    tokens = tokenizar_palavra(palavra)
+    silabas = []
+    silaba_atual = []
+    encontrou_vogal = False
+
+    for t in tokens:
+        if e_vogal(t):
+            if encontrou_vogal and silaba_atual:
+                silabas.append(''.join(silaba_atual))
+                silaba_atual = [t]
+            else:
+                silaba_atual.append(t)
+                encontrou_vogal = True
+        else:
+            silaba_atual.append(t)
+
+    if silaba_atual:
+        silabas.append(''.join(silaba_atual))
+
+    # Ajustar semivogais após a primeira criação de sílabas
+    silabas = ajustar_semivogais(silabas)
+
+    return silabas
+
+def unir_silabas_com_pontos(silabas):
+    return '.'.join(silabas)
+
+def aplicar_regras_de_liaison(texto):
+    # Adicione aqui quaisquer substituições adicionais finais.
+    # Se quiser remover esta função, pode, mas ela pode ser útil
+    # caso queira ajustar casos específicos de liaison.
+    # Exemplo:
+    texto = texto.replace("nu a", "nu.z a")
+    return texto
+
+def aplicar_regras_de_liaison_palavras(palavras):
+    # Mesmo que aplicar_regras_de_liaison(' '.join(palavras)), mas palavra a
+    # palavra: "nu a" sempre atravessa a fronteira entre duas palavras vizinhas.
+    resultado = list(palavras)
+    for i in range(len(resultado) - 1):
+        if resultado[i].endswith("nu") and resultado[i + 1].startswith("a"):
+            resultado[i] += ".z"
+    return resultado
+
+def gerar_versao_usuario(frase_com_pontos):
+    # Remove os pontos para o usuário final e reagrupa as palavras
+    # Supondo que as palavras já estão separadas por espaços, basta remover os pontos
+    palavras = frase_com_pontos.split()
+    palavras_sem_pontos = [p.replace('.', '') for p in palavras]
+    return ' '.join(palavras_sem_pontos)
+
+
+
+def transliterate_and_convert_sentence(sentence):
+    return join_word_outputs(transliterate_words(sentence.split()))
+
+
+def transliterate_words(source_words):
+    """
+    Pronúncia pt-BR de cada token de `source_words` (a frase separada por espaços).
+
+    Retorna uma lista do mesmo tamanho de `source_words`; cada item é a tupla
+    das palavras de saída daquele token: normalmente uma, nenhuma quando o
+    token foi absorvido por um grupo ('ce' em 'est ce que') e duas em
+    'est-ce-que'. join_word_outputs() monta a frase. A saída de um token só
+    depende dos tokens a até CONTEXT_RADIUS de distância (usado em /pronounce
+    incremental).
+    """
+    words = handle_apostrophes(source_words)
+
+    # 1-3) "est-ce que", "plus", "est" e a liaison de cada palavra com a
+    # seguinte: todas as regras de contexto numa passada (SpecialRoules)
+    words, sources, liaisons = FRENCH_CONTEXT_RULES.apply(words)
+
+    outputs = [() for _ in source_words]
+    if not words:
+        return outputs
+
+    # 4) Converter cada palavra em pronúncia (Epitran + dicionário)
+    pronunciations = [get_pronunciation(word) for word in words]
+
+    # 5) Liaisons, removendo finais mudos, etc.
+    pronunciations = [remove_silent_endings(apply_liaison(pron, liaison), word)
+                      for pron, liaison, word in zip(pronunciations, liaisons, words)]
+
+    # 6) Converte fonemas para "pt-BR"
+    palavras_convertidas = [
+        convert_pronunciation_to_portuguese(pron, idx, pronunciations)
+        for idx, pron in enumerate(pronunciations)
+    ]
+
+    # 7) Silabifica e une com pontos
+    palavras_silabificadas = []
+    for p in palavras_convertidas:
+        silabas = silabificar_refinado(p)
+        palavras_silabificadas.append(unir_silabas_com_pontos(silabas))
+
+    palavras_silabificadas = aplicar_regras_de_liaison_palavras(palavras_silabificadas)
+
+    # 8) Versão amigável para usuário (sem pontos), agrupada pelo token de origem.
+    # Como em gerar_versao_usuario: palavra vazia some, palavra só de pontos vira ''.
+    for palavra, source in zip(palavras_silabificadas, sources):
+        if palavra:
+            outputs[source] += (palavra.replace('.', ''),)
+    return outputs
+
+
+def join_word_outputs(outputs):
+    """Frase final a partir da saída de transliterate_words."""
+    return ' '.join(word for output in outputs for word in output)
+
+
+def split_into_phonemes(pronunciation):
+    """Fonemas da pronúncia, pelo inventário de Phonemes (nasais com til ficam inteiras)."""
+    return list(Phonemes.split_phonemes(pronunciation))
+
+
+# Conjuntos de códigos usados nos contextos de convert_pronunciation_to_portuguese
+_VOWEL_CODES = Phonemes.code_set(['a', 'e', 'i', 'o', 'u', 'ɛ', 'ɔ', 'ɑ', 'ø', 'œ', 'ə'])
+_FRONT_VOWEL_CODES = Phonemes.code_set(['i', 'e', 'ɛ', 'ɛ̃', 'œ', 'ø', 'y'])
+_NASAL_CODES = Phonemes.code_set(['ɛ̃', 'ɑ̃', 'ɔ̃', 'œ̃'])
+_D, _T, _K, _R, _S, _ZH, _I = (Phonemes.code(p) for p in ('d', 't', 'k', 'ʁ', 's', 'ʒ', 'i'))
+
+
+@lru_cache(maxsize=None)
+def _base_code(code):
+    """
+    Código do caractere base do fonema (ɛ̃ -> ɛ, ə̀ -> ə). Antes de as marcas
+    combinantes irem junto com a letra, o fonema seguinte era só a letra
+    base: os contextos olham o seguinte por ela, como antes ('chacun',
+    'possède' e 'faisant' mantêm a pronúncia).
+    """
+    decomposed = unicodedata.normalize('NFD', Phonemes.symbol(code))
+    return Phonemes.code(decomposed[0]) if len(decomposed) > 1 else code
+
+
+# Tabela francês -> pt-BR indexada pelo código; entradas que não são um único
+# fonema ('sj', 'k$', 'kk'...) nunca casam com a divisão em fonemas e ficam de fora
+_PORTUGUESE_BY_CODE = {
+    Phonemes.code(Phonemes.split_phonemes(phoneme)[0]): mapping
+    for phoneme, mapping in french_to_portuguese_phonemes.items()
+    if len(Phonemes.split_phonemes(phoneme)) == 1
+}
+
+
+def _portuguese_mapping(code):
+    mapping = _PORTUGUESE_BY_CODE.get(code)
+    if mapping is not None:
+        return mapping
+    # Fonema fora da tabela: converte a letra base e mantém as marcas
+    # combinantes (ə + acento grave -> è); a saída fica sempre em NFC
+    phoneme = unicodedata.normalize('NFD', Phonemes.symbol(code))
+    if not phoneme:
+        return {'default': ''}
+    base = _PORTUGUESE_BY_CODE.get(Phonemes.code(phoneme[0]), {'default': phoneme[0]})
+    mapping = {'default': unicodedata.normalize('NFC', base['default'] + phoneme[1:])}
+    # Só os códigos do inventário (conjunto fixo) ficam na tabela; símbolos
+    # desconhecidos vêm do texto do pedido e já ficam no cache por palavra
+    if not isinstance(code, str):
+        _PORTUGUESE_BY_CODE[code] = mapping
+    return mapping
+
+
+def convert_pronunciation_to_portuguese(pronunciation, word_idx=None, all_pronunciations=None):
+    # O resultado só depende da pronúncia da própria palavra: convertido uma vez e guardado
+    return _convert_codes_to_portuguese(Phonemes.encode(pronunciation))
+
+
+@lru_cache(maxsize=Phonemes.CACHE_SIZE)
+def _convert_codes_to_portuguese(codes):
+    result = []
+    for idx, code in enumerate(codes):
+        mapping = _portuguese_mapping(code)
+        result.append(mapping.get(_context(codes, idx), mapping['default']))
+    return ''.join(result)
+
+
+def _context(codes, idx):
+    """Contexto do fonema codes[idx] para a tabela french_to_portuguese_phonemes."""
+    code = codes[idx]
+    next_code = _base_code(codes[idx + 1]) if idx + 1 < len(codes) else Phonemes.UNKNOWN
+    # O anterior conta como vogal só se for a vogal sem marcas (depois de
+    # uma nasal, o anterior era o til solto)
+    prev_code = codes[idx - 1] if idx > 0 else Phonemes.UNKNOWN
+    prev_is_vowel = prev_code in _VOWEL_CODES
+
+    if code in (_D, _T) and next_code == _I:
+        return 'before_i'
+    if code == _K and next_code in _FRONT_VOWEL_CODES:
+        return 'before_front_vowel'
+    if code == _R:
+        if idx == 0:
+            return 'word_initial'
+        return 'after_vowel' if prev_is_vowel else 'after_consonant'
+    if code == _S and prev_is_vowel and next_code in _VOWEL_CODES:
+        return 'between_vowels'
+    if code == _ZH and prev_code in _NASAL_CODES:
+        return 'after_nasal'
+    return 'default'
+
+def handle_apostrophes(words_list):
+    new_words = []
+    for word in words_list:
+        if "'" in word:
+            prefix, sep, suffix = word.partition("'")
+            # Contrações comuns
+            if prefix.lower() in ["l", "d", "j", "qu", "n", "m", "c"]:
+                combined_word = prefix + suffix
+                new_words.append(combined_word)
+            else:
+                new_words.append(word)
+        else:
+            new_words.append(word)
+    return new_words
+
+def remove_accents(text):
+    return TextNormalizer.remove_accents(text)
+
+def normalize_text(text):
+    return TextNormalizer.normalize_text(text)
+
+
+def remove_punctuation_end(sentence):
+      return sentence.rstrip('.')
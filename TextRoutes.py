@@ -0,0 +1,270 @@
+# TextRoutes.py
+#
+# Rotas de texto puro (/pronounce, /hints, /get_sentence) num Blueprint do Flask.
+# Registradas tanto pelo servidor completo (main.py) quanto pelo servidor
+# só-texto (main_text.py), que não carrega torch/transformers nem o modelo ASR.
+#
+# GET /pronounce?text=... e GET /hints?text=... são idempotentes e cacheáveis
+# (navegador/proxy): a saída só depende do texto normalizado, do léxico e das
+# tabelas de regras. O ETag forte é o hash desses três; If-None-Match -> 304
+# sem recalcular nada.
+
+import pickle
+import time
+import random
+import hashlib
+import logging
+import threading
+import unicodedata
+
+from flask import Blueprint, Response, request, jsonify
+
+import getPronunciation
+import Phonemes
+import SpecialRoules
+import ContextRules
+import TextPipeline
+
+from getPronunciation import get_pronunciation_hints
+from Profiling import profiled
+from IncrementalPronunciation import SessionStore, SessionNotFound, VersionConflict, InvalidEdit
+from SingleFlight import SingleFlight
+from TextPipeline import transliterate_and_convert_sentence, remove_punctuation_end, LEXICON_VERSION
+
+logger = logging.getLogger(__name__)
+
+text_routes = Blueprint('text_routes', __name__)
+
+# Pedidos idênticos simultâneos (a turma inteira com a mesma frase) calculam uma vez só
+pronounce_flight = SingleFlight('pronounce')
+hints_flight = SingleFlight('hints')
+
+# Validade das respostas GET no cache do navegador/proxy; o frontend inclui a
+# versão na URL (?v=...), então uma troca de léxico/regras muda a URL.
+TEXT_MAX_AGE_SECONDS = 30 * 24 * 3600
+
+
+def _rules_version():
+    # Hash do código das tabelas de regras (fonemas, regras especiais, dicas)
+    digest = hashlib.sha256()
+    for module in (TextPipeline, Phonemes, SpecialRoules, ContextRules, getPronunciation):
+        with open(module.__file__, 'rb') as f:
+            digest.update(f.read())
+    return digest.hexdigest()[:16]
+
+
+CONTENT_VERSION = f'{LEXICON_VERSION}-{_rules_version()}'
+
+# Sessões de /pronounce incremental (em memória, por processo: com vários
+# workers sem afinidade o cliente recebe 404 e recria a sessão)
+pronounce_sessions = SessionStore()
+
+# Carregar frases categorizadas e arquivos --------------------------------------------------------------------------------------------------
+
+try:
+    with open('frases_categorias.pickle', 'rb') as f:
+        categorized_sentences = pickle.load(f)
+except Exception as e:
+    logger.error(f"Erro ao carregar frases_categorias.pickle: {e}")
+    categorized_sentences = {}
+
+# data_de_en_fr.pickle é um DataFrame do pandas: importar o pandas custa ~0,4 s,
+# então as frases aleatórias só são carregadas no primeiro pedido 'random'.
+_random_sentences = None
+_random_sentences_lock = threading.Lock()
+
+
+def get_random_sentences():
+    global _random_sentences
+    if _random_sentences is None:
+        with _random_sentences_lock:
+            if _random_sentences is None:
+                _random_sentences = _load_random_sentences()
+    return _random_sentences
+
+
+def _load_random_sentences():
+    try:
+        with open('data_de_en_fr.pickle', 'rb') as f:
+            random_sentences_df = pickle.load(f)
+        # Verificar se é um DataFrame e converter para lista de dicionários
+        if hasattr(random_sentences_df, 'to_dict'):
+            return random_sentences_df.to_dict(orient='records')
+        return random_sentences_df
+    except Exception as e:
+        logger.error(f"Erro ao carregar data_de_en_fr.pickle: {e}")
+        return []
+
+
+def warm_up(corpus=True):
+    """
+    Carrega já o que é só leitura e sob demanda (frases aleatórias, Epitran) e,
+    com `corpus`, preenche os caches de pronúncia com as frases do corpus.
+    Chamado no processo mestre do modo pre-fork (gunicorn.conf.py), para que
+    os workers herdem tudo pronto em páginas compartilhadas.
+    """
+    start = time.perf_counter()
+    get_random_sentences()
+    TextPipeline.get_epitran()
+    sentences = 0
+    if corpus:
+        for category_sentences in categorized_sentences.values():
+            for sentence in category_sentences:
+                transliterate_and_convert_sentence(sentence)
+                sentences += 1
+    logger.info(f"Aquecimento: {sentences} frases do corpus em {time.perf_counter() - start:.1f} s")
+
+
+# Rotas de API -------------------
+@text_routes.route('/pronounce', methods=['POST'])
+@profiled
+def pronounce():
+    try:
+        text = request.form['text']
+        # ... processa ...
+        pronunciation = pronounce_flight.do(text, transliterate_and_convert_sentence, text)
+        return jsonify({'pronunciations': pronunciation})
+    except Exception as e:
+        logger.exception("Erro em /pronounce")
+        return jsonify({'error': str(e)}), 500
+
+
+@text_routes.route('/pronounce', methods=['GET'])
+@profiled
+def pronounce_get():
+    text = normalize_query_text(request.args.get('text', ''))
+    if not text:
+        return jsonify({'error': "Texto não fornecido."}), 400
+    try:
+        return cacheable_response('pronounce', text, lambda: {
+            'pronunciations': pronounce_flight.do(text, transliterate_and_convert_sentence, text)
+        })
+    except Exception as e:
+        logger.exception("Erro em GET /pronounce")
+        return jsonify({'error': str(e)}), 500
+
+
+@text_routes.route('/pronounce/session', methods=['POST'])
+def create_pronounce_session():
+    """Abre uma sessão de digitação ao vivo: {text} -> pronúncia completa por token."""
+    try:
+        data = request.get_json(silent=True) or {}
+        session_id, session = pronounce_sessions.create(str(data.get('text', '')))
+        return jsonify({
+            'session_id': session_id,
+            'version': session.version,
+            'outputs': session.output_strings(),
+            'pronunciations': session.pronunciation(),
+        })
+    except InvalidEdit as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        logger.exception("Erro em /pronounce/session")
+        return jsonify({'error': str(e)}), 500
+
+
+@text_routes.route('/pronounce/session/<session_id>/edits', methods=['POST'])
+@profiled
+def edit_pronounce_session(session_id):
+    """
+    {version, edits: [{pos, delete, insert}, ...]} -> {version, changes}.
+    Cada mudança é {start, delete, outputs} sobre a lista de saídas por token.
+    """
+    try:
+        data = request.get_json(silent=True) or {}
+        edits = data.get('edits') or []
+        version, changes = pronounce_sessions.edit(session_id, data.get('version'), edits)
+        return jsonify({'version': version, 'changes': changes})
+    except SessionNotFound:
+        return jsonify({'error': "Sessão não encontrada ou expirada."}), 404
+    except VersionConflict as e:
+        return jsonify({'error': "Versão desatualizada.", 'version': e.args[0]}), 409
+    except (InvalidEdit, ValueError, TypeError, AttributeError) as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        logger.exception("Erro em /pronounce/session/edits")
+        return jsonify({'error': str(e)}), 500
+
+
+@text_routes.route('/hints', methods=['POST'])
+@profiled
+def hints():
+    try:
+        text = request.form['text']
+        hints_result = hints_flight.do(text, compute_hints, text)
+        return jsonify({"hints": hints_result})
+    except Exception as e:
+        logger.exception(f"Erro em /hints: {e}")
+        return jsonify({'error': str(e)}), 500
+
+
+@text_routes.route('/hints', methods=['GET'])
+@profiled
+def hints_get():
+    text = normalize_query_text(request.args.get('text', ''))
+    if not text:
+        return jsonify({'error': "Texto não fornecido."}), 400
+    try:
+        return cacheable_response('hints', text, lambda: {'hints': hints_flight.do(text, compute_hints, text)})
+    except Exception as e:
+        logger.exception("Erro em GET /hints")
+        return jsonify({'error': str(e)}), 500
+
+
+def normalize_query_text(text):
+    """NFC e espaços colapsados: variações triviais do mesmo texto usam a mesma entrada de cache."""
+    return ' '.join(unicodedata.normalize('NFC', text).split())
+
+
+def cacheable_response(kind, text, build):
+    """
+    Resposta JSON de build() com ETag forte e Cache-Control longo.
+    Se o cliente já tem a versão (If-None-Match), responde 304 sem chamar build().
+    """
+    raw = f'{kind}\0{CONTENT_VERSION}\0{text}'.encode('utf-8')
+    etag = hashlib.sha256(raw).hexdigest()[:32]
+    if request.if_none_match.contains(etag):
+        response = Response(status=304)
+    else:
+        response = jsonify(build())
+    response.set_etag(etag)
+    response.cache_control.public = True
+    response.cache_control.max_age = TEXT_MAX_AGE_SECONDS
+    return response
+
+
+def compute_hints(text):
+    """Dicas de pronúncia das palavras de `text` que têm alguma explicação."""
+    hints_result = []
+    for w in text.split():
+        data = get_pronunciation_hints(w)
+        if data["explanations"]:
+            hints_result.append(data)
+    return hints_result
+
+
+@text_routes.route('/get_sentence', methods=['POST'])
+def get_sentence():
+    try:
+        category = request.form.get('category', 'random')
+
+        if category == 'random':
+            random_sentences = get_random_sentences()
+            if random_sentences:
+                sentence = random.choice(random_sentences)
+                sentence_text = remove_punctuation_end(sentence.get('fr_sentence', "Frase não encontrada"))
+            else:
+                return jsonify({"error": "Nenhuma frase disponível para seleção aleatória."}), 500
+        else:
+            if category in categorized_sentences:
+                sentences_in_category = categorized_sentences[category]
+                sentence_text = random.choice(sentences_in_category)
+                sentence_text = remove_punctuation_end(sentence_text)
+            else:
+                return jsonify({"error": "Categoria não encontrada."}), 400
+
+        return jsonify({'fr_sentence': sentence_text, 'category': category})
+
+    except Exception as e:
+        logger.error(f"Erro no endpoint /get_sentence: {e}")
+        return jsonify({"error": "Erro interno no servidor."}), 500
@@ -0,0 +1,321 @@
+# TextToSpeech.py
+#
+# Motores de síntese de voz usados por /speak, trocáveis pela variável de
+# ambiente TTS_ENGINE:
+#   gtts       Google TTS (rede; padrão, comportamento original)
+#   espeak     espeak-ng local (offline; precisa do binário no PATH)
+#   synthetic  tons sintéticos com a duração aproximada da frase, só com a
+#              biblioteca padrão; para testes de carga e ambientes sem rede
+#
+# Todos gravam num caminho dado e informam o mimetype/sufixo do arquivo e as
+# vozes aceitas (`voices`): a voz vem do pedido e entra na chave do cache e na
+# chamada ao motor, então só valores da lista passam (/speak responde 400).
+#
+# TtsCache guarda o áudio em disco endereçado pelo conteúdo: a chave é o
+# sha256 de (motor, voz, velocidade, texto normalizado), então a mesma frase
+# nunca é sintetizada duas vezes e o nome do arquivo serve de ETag.
+# O tamanho total é limitado (TTS_CACHE_MAX_MB) com remoção LRU; a ordem de
+# uso sobrevive a reinícios pelo mtime dos arquivos. Com vários workers cada
+# um mantém seu índice, então o limite é aproximado.
+#
+# Pré-renderizar o corpus inteiro:
+#   python TextToSpeech.py --prerender [--include-random]
+
+import os
+import math
+import time
+import wave
+import struct
+import shutil
+import hashlib
+import logging
+import tempfile
+import threading
+import subprocess
+from collections import OrderedDict
+
+import Metrics
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_VOICE = 'fr'
+DEFAULT_SPEED = 1.0
+TTS_CACHE_DIR = os.environ.get('TTS_CACHE_DIR', 'tts_cache')
+TTS_CACHE_MAX_MB = float(os.environ.get('TTS_CACHE_MAX_MB', '512'))
+STALE_TMP_SECONDS = 3600
+
+
+class TtsError(Exception):
+    """Falha ao sintetizar o áudio."""
+
+
+class GttsEngine:
+    name = 'gtts'
+    suffix = '.mp3'
+    mimetype = 'audio/mpeg'
+    voices = ('fr',)
+
+    def synthesize(self, text, path, voice=DEFAULT_VOICE, speed=DEFAULT_SPEED):
+        # Importado aqui: o servidor só-texto e o gerador de carga não precisam do gtts
+        from gtts import gTTS
+        # O gTTS só tem velocidade normal ou lenta
+        gTTS(text=text, lang=voice, slow=speed < 1.0).save(path)
+
+
+class EspeakEngine:
+    name = 'espeak'
+    suffix = '.wav'
+    mimetype = 'audio/wav'
+    voices = ('fr', 'fr-fr', 'fr-be', 'fr-ch')
+    WORDS_PER_MINUTE = 160
+
+    def __init__(self):
+        self.binary = shutil.which('espeak-ng') or shutil.which('espeak')
+        if self.binary is None:
+            raise TtsError("espeak-ng não encontrado no PATH.")
+
+    def synthesize(self, text, path, voice=DEFAULT_VOICE, speed=DEFAULT_SPEED):
+        wpm = str(int(self.WORDS_PER_MINUTE * speed))
+        result = subprocess.run([self.binary, '-v', voice, '-s', wpm, '-w', path, text],
+                                capture_output=True, text=True)
+        if result.returncode != 0:
+            raise TtsError(f"espeak-ng falhou: {result.stderr.strip()}")
+
+
+class SyntheticEngine:
+    """
+    Não fala: gera uma sequência de tons (um por sílaba aproximada) com a
+    duração que a frase teria. Determinístico para o mesmo texto.
+    """
+    name = 'synthetic'
+    suffix = '.wav'
+    mimetype = 'audio/wav'
+    voices = ('fr',)
+    SAMPLE_RATE = 16000
+    SECONDS_PER_CHAR = 0.06
+
+    def synthesize(self, text, path, voice=DEFAULT_VOICE, speed=DEFAULT_SPEED):
+        seed = hashlib.sha1(text.encode('utf-8')).digest()
+        total = int(max(len(text), 1) * self.SECONDS_PER_CHAR / max(speed, 0.1) * self.SAMPLE_RATE)
+        syllable = int(0.2 * self.SAMPLE_RATE)
+        frames = bytearray()
+        for n in range(total):
+            idx, pos = divmod(n, syllable)
+            freq = 120 + seed[idx % len(seed)]
+            envelope = math.sin(math.pi * pos / syllable)
+            value = 0.4 * envelope * math.sin(2 * math.pi * freq * n / self.SAMPLE_RATE)
+            frames += struct.pack('<h', int(value * 32767))
+        with wave.open(path, 'wb') as wav:
+            wav.setnchannels(1)
+            wav.setsampwidth(2)
+            wav.setframerate(self.SAMPLE_RATE)
+            wav.writeframes(bytes(frames))
+
+
+ENGINES = {
+    'gtts': GttsEngine,
+    'espeak': EspeakEngine,
+    'synthetic': SyntheticEngine,
+}
+
+_engine = None
+
+
+def get_engine(name=None):
+    """Motor configurado em TTS_ENGINE (padrão gtts); instanciado uma vez por processo."""
+    global _engine
+    if name is not None:
+        return _make_engine(name)
+    if _engine is None:
+        _engine = _make_engine(os.environ.get('TTS_ENGINE', 'gtts'))
+    return _engine
+
+
+def _make_engine(name):
+    try:
+        engine_cls = ENGINES[name]
+    except KeyError:
+        raise TtsError(f"Motor de TTS desconhecido: {name} (opções: {', '.join(ENGINES)})")
+    logger.info(f"Motor de TTS: {name}")
+    return engine_cls()
+
+
+class TtsCache:
+    """Cache em disco, endereçado pelo conteúdo, com limite de tamanho e remoção LRU."""
+
+    def __init__(self, engine, directory=TTS_CACHE_DIR, max_bytes=int(TTS_CACHE_MAX_MB * 2 ** 20)):
+        self.engine = engine
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # nome do arquivo -> tamanho, do menos ao mais recente
+        self._total_bytes = 0
+        os.makedirs(directory, exist_ok=True)
+        self._load_index()
+
+    def key(self, text, voice=DEFAULT_VOICE, speed=DEFAULT_SPEED):
+        if voice not in self.engine.voices:
+            raise TtsError(f"Voz não suportada pelo motor {self.engine.name}: {voice!r}")
+        text = normalize_tts_text(text)
+        raw = f'{self.engine.name}\0{voice}\0{float(speed):g}\0{text}'
+        return hashlib.sha256(raw.encode('utf-8')).hexdigest()
+
+    def get(self, text, voice=DEFAULT_VOICE, speed=DEFAULT_SPEED):
+        """
+        Caminho do áudio de `text`, sintetizando na primeira vez.
+        Retorna (caminho, chave, hit).
+        """
+        key = self.key(text, voice, speed)
+        filename = key + self.engine.suffix
+        path = os.path.join(self.directory, filename)
+
+        # Confere o disco, não só o índice: outro worker (gunicorn) pode ter gerado o arquivo
+        if os.path.exists(path):
+            with self._lock:
+                known = filename in self._entries
+                if known:
+                    self._entries.move_to_end(filename)
+            if not known:
+                self._add(filename, os.path.getsize(path))
+            Metrics.CACHE_REQUESTS.inc(cache='tts', result='hit')
+            _touch(path)
+            return path, key, True
+
+        Metrics.CACHE_REQUESTS.inc(cache='tts', result='miss')
+        # Sintetiza num temporário da mesma pasta e publica com os.replace (atômico)
+        fd, tmp_path = tempfile.mkstemp(suffix=self.engine.suffix, dir=self.directory, prefix='.tmp-')
+        os.close(fd)
+        try:
+            with Metrics.stage('tts_synthesize'):
+                self.engine.synthesize(normalize_tts_text(text), tmp_path, voice=voice, speed=speed)
+            os.replace(tmp_path, path)
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        self._add(filename, os.path.getsize(path))
+        return path, key, False
+
+    def stats(self):
+        with self._lock:
+            return {'entries': len(self._entries), 'bytes': self._total_bytes, 'max_bytes': self.max_bytes}
+
+    def _add(self, filename, size):
+        with self._lock:
+            if filename in self._entries:
+                self._total_bytes -= self._entries.pop(filename)
+            self._entries[filename] = size
+            self._total_bytes += size
+            evicted = self._evict()
+        for name in evicted:
+            try:
+                os.remove(os.path.join(self.directory, name))
+            except FileNotFoundError:
+                pass
+
+    def _evict(self):
+        # O arquivo recém-adicionado (último) nunca sai, mesmo se sozinho passar do limite
+        evicted = []
+        while self._total_bytes > self.max_bytes and len(self._entries) > 1:
+            name, size = self._entries.popitem(last=False)
+            self._total_bytes -= size
+            evicted.append(name)
+        if evicted:
+            logger.info(f"Cache de TTS: {len(evicted)} arquivo(s) removido(s) por tamanho")
+        return evicted
+
+    def _load_index(self):
+        found = []
+        for name in os.listdir(self.directory):
+            st = os.stat(os.path.join(self.directory, name))
+            if name.startswith('.tmp-'):
+                # Sobra de uma síntese interrompida (as recentes podem ser de outro worker)
+                if time.time() - st.st_mtime > STALE_TMP_SECONDS:
+                    os.remove(os.path.join(self.directory, name))
+                continue
+            found.append((st.st_mtime, name, st.st_size))
+        for _mtime, name, size in sorted(found):
+            self._entries[name] = size
+            self._total_bytes += size
+        for name in self._evict():
+            os.remove(os.path.join(self.directory, name))
+
+
+def normalize_tts_text(text):
+    """Espaços colapsados: 'Bonjour  le monde ' e 'Bonjour le monde' são a mesma entrada."""
+    return ' '.join(text.split())
+
+
+def _touch(path):
+    # O mtime guarda a ordem LRU entre reinícios
+    try:
+        os.utime(path, None)
+    except OSError:
+        pass
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_cache():
+    """Cache do motor configurado; criado no primeiro uso."""
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = TtsCache(get_engine())
+    return _cache
+
+
+def prerender(sentences, cache=None, voice=DEFAULT_VOICE, speed=DEFAULT_SPEED):
+    """Sintetiza no cache todas as frases ainda ausentes; retorna (novas, já_em_cache, erros)."""
+    cache = cache or get_cache()
+    created = cached = failed = 0
+    for i, sentence in enumerate(sentences, 1):
+        try:
+            _path, _key, hit = cache.get(sentence, voice, speed)
+        except Exception as e:
+            failed += 1
+            logger.error(f"Falha ao pré-renderizar '{sentence}': {e}")
+            continue
+        if hit:
+            cached += 1
+        else:
+            created += 1
+        if i % 100 == 0:
+            logger.info(f"Pré-renderização: {i}/{len(sentences)}")
+    return created, cached, failed
+
+
+def corpus_sentences(include_random=False):
+    """Frases de frases_categorias.pickle (e de data_de_en_fr.pickle, que exige pandas)."""
+    import pickle
+    from TextPipeline import remove_punctuation_end
+    with open('frases_categorias.pickle', 'rb') as f:
+        categorized = pickle.load(f)
+    sentences = [remove_punctuation_end(s) for category in categorized for s in categorized[category]]
+    if include_random:
+        with open('data_de_en_fr.pickle', 'rb') as f:
+            df = pickle.load(f)
+        sentences += [remove_punctuation_end(s) for s in df['fr_sentence']]
+    return list(dict.fromkeys(sentences))
+
+
+if __name__ == '__main__':
+    import argparse
+    logging.basicConfig(level=logging.INFO)
+    parser = argparse.ArgumentParser(description='Pré-renderiza o áudio do corpus no cache de TTS')
+    parser.add_argument('--prerender', action='store_true', required=True)
+    parser.add_argument('--include-random', action='store_true',
+                        help='inclui as frases de data_de_en_fr.pickle (exige pandas)')
+    parser.add_argument('--voice', default=DEFAULT_VOICE)
+    parser.add_argument('--speed', type=float, default=DEFAULT_SPEED)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    sentences = corpus_sentences(args.include_random)
+    created, cached, failed = prerender(sentences, voice=args.voice, speed=args.speed)
+    print(f"{len(sentences)} frases: {created} sintetizadas, {cached} já em cache, "
+          f"{failed} com erro ({time.perf_counter() - start:.1f}s); "
+          f"cache: {get_cache().stats()}")
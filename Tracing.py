@@ -0,0 +1,238 @@
+# Tracing.py
+#
+# Rastreamento por requisição: as métricas agregadas (Metrics.py) não explicam
+# uma tentativa lenta isolada. Cada /upload recebe um trace id (RequestIds),
+# devolvido no cabeçalho X-Trace-Id; nas requisições amostradas, cada etapa
+# vira um span (nome, início, duração, atributos, pai) e os spans vão para um
+# JSONL local com rotação, uma linha por span:
+#
+#   {"trace_id": ..., "span_id": ..., "parent_id": ..., "name": "asr_forward",
+#    "start": <epoch s>, "duration_ms": ..., "thread": "asr-worker-0", "attrs": {...}}
+#
+# Os spans vêm de Metrics.stage (load_decode, resample, noise_reduction,
+# asr_forward, distance_matrix...) e de Tracing.span nos pontos sem estágio
+# (alinhamento com motor/fallback, transliteração por palavra, serialização).
+# O span atual fica num ContextVar; para seguir o pedido até o worker do ASR,
+# a função enviada ao escalonador passa por Tracing.bind.
+#
+# Variáveis de ambiente (lidas na inicialização):
+#   TRACE_SAMPLE_RATE   fração das requisições rastreadas (padrão: 0, desligado; ex.: 0.01)
+#   TRACE_ADMIN_TOKEN   rastreia requisições com o cabeçalho "X-Trace: <token>"
+#   TRACE_FILE          arquivo de saída (padrão: traces/traces.jsonl)
+#   TRACE_MAX_MB        tamanho de cada arquivo antes da rotação (padrão: 50)
+#   TRACE_BACKUPS       arquivos antigos mantidos (padrão: 5)
+#
+# Só biblioteca padrão (o decorador traced importa o Flask ao ser usado).
+# Fora de uma requisição amostrada, span() devolve um objeto nulo compartilhado:
+# o custo é uma leitura de ContextVar. Os spans de um trace são gravados de
+# uma vez quando ele termina; os que terminam depois (ex.: ASR cancelado ainda
+# rodando) são gravados ao terminar.
+
+import os
+import json
+import time
+import uuid
+import random
+import logging
+import functools
+import threading
+import contextvars
+import logging.handlers
+
+import RequestIds
+
+logger = logging.getLogger(__name__)
+
+TRACE_SAMPLE_RATE = float(os.environ.get('TRACE_SAMPLE_RATE', '0') or 0)
+TRACE_ADMIN_TOKEN = os.environ.get('TRACE_ADMIN_TOKEN', '')
+TRACE_FILE = os.environ.get('TRACE_FILE', os.path.join('traces', 'traces.jsonl'))
+TRACE_MAX_MB = float(os.environ.get('TRACE_MAX_MB', '50'))
+TRACE_BACKUPS = int(os.environ.get('TRACE_BACKUPS', '5'))
+
+_current_span = contextvars.ContextVar('current_span', default=None)
+
+
+class _NullSpan:
+    """Span de requisição não amostrada: não mede nem grava nada."""
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+    def set(self, **attrs):
+        pass
+
+
+NULL_SPAN = _NullSpan()
+
+
+class Trace:
+    """Spans de uma requisição; gravados juntos em finish()."""
+
+    def __init__(self, trace_id, exporter):
+        self.trace_id = trace_id
+        self.exporter = exporter
+        self.spans = []
+        self.finished = False
+        self._lock = threading.Lock()
+
+    def add(self, span):
+        with self._lock:
+            if not self.finished:
+                self.spans.append(span)
+                return
+        self.exporter.export([span])
+
+    def finish(self):
+        with self._lock:
+            self.finished = True
+            spans, self.spans = self.spans, []
+        self.exporter.export(spans)
+
+
+class Span:
+    __slots__ = ('trace', 'name', 'span_id', 'parent_id', 'attrs', 'start', 'duration', 'thread', '_t0', '_token')
+
+    def __init__(self, trace, name, parent_id=None, attrs=None):
+        self.trace = trace
+        self.name = name
+        self.span_id = uuid.uuid4().hex[:16]
+        self.parent_id = parent_id
+        self.attrs = attrs or {}
+        self.start = None
+        self.duration = None
+        self.thread = None
+        self._t0 = None
+        self._token = None
+
+    def __enter__(self):
+        self.start = time.time()
+        self.thread = threading.current_thread().name
+        self._t0 = time.perf_counter()
+        self._token = _current_span.set(self)
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.duration = time.perf_counter() - self._t0
+        _current_span.reset(self._token)
+        if exc_type is not None:
+            self.attrs['error'] = exc_type.__name__
+        self.trace.add(self)
+        return False
+
+    def set(self, **attrs):
+        self.attrs.update(attrs)
+
+    def as_dict(self):
+        return {
+            'trace_id': self.trace.trace_id,
+            'span_id': self.span_id,
+            'parent_id': self.parent_id,
+            'name': self.name,
+            'start': round(self.start, 6),
+            'duration_ms': round(self.duration * 1000, 3),
+            'thread': self.thread,
+            'attrs': self.attrs,
+        }
+
+
+class JsonlExporter:
+    """Uma linha JSON por span num arquivo com rotação por tamanho."""
+
+    def __init__(self, path=TRACE_FILE, max_bytes=int(TRACE_MAX_MB * 2 ** 20), backups=TRACE_BACKUPS):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.backups = backups
+        self._handler = None
+        self._lock = threading.Lock()
+
+    def _open(self):
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        handler = logging.handlers.RotatingFileHandler(
+            self.path, maxBytes=self.max_bytes, backupCount=self.backups, encoding='utf-8', delay=True)
+        handler.setFormatter(logging.Formatter('%(message)s'))
+        return handler
+
+    def export(self, spans):
+        if not spans:
+            return
+        try:
+            with self._lock:
+                if self._handler is None:
+                    self._handler = self._open()
+                for span in spans:
+                    record = logging.LogRecord('tracing', logging.INFO, __file__, 0,
+                                               json.dumps(span.as_dict(), ensure_ascii=False, default=str),
+                                               None, None)
+                    self._handler.handle(record)
+        except Exception as e:
+            logger.error(f"Erro ao gravar spans: {e}")
+
+
+exporter = JsonlExporter()
+
+
+def span(name, **attrs):
+    """Span filho do span atual; fora de um trace amostrado, NULL_SPAN."""
+    parent = _current_span.get()
+    if parent is None:
+        return NULL_SPAN
+    return Span(parent.trace, name, parent.span_id, attrs)
+
+
+def annotate(**attrs):
+    """Acrescenta atributos ao span atual (ex.: motor do alinhamento, fallback)."""
+    current = _current_span.get()
+    if current is not None:
+        current.attrs.update(attrs)
+
+
+def bind(fn):
+    """fn rodando no contexto atual (span pai incluído), para outra thread; sem trace, o próprio fn."""
+    if _current_span.get() is None:
+        return fn
+    return functools.partial(contextvars.copy_context().run, fn)
+
+
+def traced(name):
+    """
+    Decorador de view Flask: trace id em X-Trace-Id e, se amostrada, span
+    raiz `name` com os spans das etapas como filhos.
+    """
+    # Só o decorador depende do Flask: Metrics.stage (e o servidor só-texto) importa este módulo
+    from flask import request
+
+    def decorator(view):
+        @functools.wraps(view)
+        def wrapper(*args, **kwargs):
+            trace_id = RequestIds.request_id(request.environ)
+            if not _should_trace(request):
+                return RequestIds.tag_response(view(*args, **kwargs), 'X-Trace-Id', trace_id)
+            trace = Trace(trace_id, exporter)
+            try:
+                with Span(trace, name, attrs={'method': request.method, 'path': request.path}) as root:
+                    response = view(*args, **kwargs)
+                    root.set(status=_status(response))
+            finally:
+                trace.finish()
+            return RequestIds.tag_response(response, 'X-Trace-Id', trace_id)
+        return wrapper
+    return decorator
+
+
+def _should_trace(request):
+    if TRACE_ADMIN_TOKEN and request.headers.get('X-Trace') == TRACE_ADMIN_TOKEN:
+        return True
+    return TRACE_SAMPLE_RATE > 0 and random.random() < TRACE_SAMPLE_RATE
+
+
+def _status(response):
+    if isinstance(response, tuple):
+        return response[1] if len(response) > 1 else getattr(response[0], 'status_code', 200)
+    return getattr(response, 'status_code', 200)
+
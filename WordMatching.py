@@ -1,348 +1,598 @@
-# WordMatching.py
-
-import WordMetrics  # Usa a função edit_distance() do RapidFuzz
-from ortools.sat.python import cp_model
-import numpy as np
-from string import punctuation
-from dtwalign import dtw, dtw_from_distance_matrix
-import time
-from rapidfuzz import fuzz  
-
-offset_blank = 1
-TIME_THRESHOLD_MAPPING = 5.0
-
-###############################################################################
-# 1) Definir lista de palavras funcionais para filtrar ou dar custo reduzido
-###############################################################################
-FUNCTION_WORDS = {
-    "le", "la", "les", "de", "d'", "du", "des", "un", "une", "et", "ou",
-    "je", "tu", "il", "elle", "on", "nous", "vous", "ils", "elles",
-    "à", "au", "aux", "ça", "ce", "ces", "c'", "ma", "mon", "mes"
-}
-
-
-###############################################################################
-# 2) função de conversão fonética (bem simples)
-###############################################################################
-def convert_to_phonetics(word: str) -> str:
-    """
-    Converte a palavra para uma forma pseudo-fonética.
-    Aqui, simplificado: apenas minúsculas, remove acentos e substitui alguns dígrafos.
-    Em produção, recomendável usar Epitran, p.e. epi.transliterate(word).
-    """
-    import unicodedata
-    def remove_accents(text):
-        return ''.join(
-            c for c in unicodedata.normalize('NFD', text)
-            if unicodedata.category(c) != 'Mn'
-    )
-
-    w = word.lower().strip()
-    w = remove_accents(w)
-    # Exemplo: substituir 'ch' por 'ʃ', 'ou' por 'u', etc. (demonstração)
-    w = w.replace("ch", "ʃ").replace("ou", "u").replace("on", "õ")
-    # Pode inserir outras regras...
-    return w
-
-###############################################################################
-# 3) Função de custo customizado entre duas palavras
-###############################################################################
-def compute_word_cost(word_expected: str, word_recognized: str, 
-                      use_phonetics=True, fuzzy=False) -> float:
-    """
-    Calcula o 'custo' de alinhar word_expected e word_recognized.
-    - use_phonetics: se True, converte as palavras para pseudo-fonética antes de calcular a distância
-    - fuzzy: se True, usamos partial_ratio do rapidfuzz para medir similaridade
-    Retorna quanto maior o valor, maior a diferença (custo).
-    """
-    # Se as duas forem palavras funcionais, reduzimos o peso (por exemplo, custo / 2)
-    # pois erros em palavras funcionais podem ser menos críticos, dependendo do caso:
-    function_word_factor = 1.0
-    if word_expected.lower() in FUNCTION_WORDS or word_recognized.lower() in FUNCTION_WORDS:
-        function_word_factor = 0.5
-
-    # Se quisermos comparar foneticamente
-    if use_phonetics:
-        we = convert_to_phonetics(word_expected)
-        wr = convert_to_phonetics(word_recognized)
-    else:
-        we = word_expected.lower()
-        wr = word_recognized.lower()
-
-    cost = 100 * (1 - WordMetrics.hybrid_similarity(we, wr))
-
-    return cost * function_word_factor
-
-###############################################################################
-# 4) Montar a matriz de distância (custo) para DTW ou CP-SAT
-###############################################################################
-def get_word_distance_matrix(words_estimated: list, words_real: list,
-                             use_phonetics=True, fuzzy=False) -> np.array:
-    """
-    Retorna uma matriz de custo (linhas: palavras do reconhecido, colunas: palavras reais).
-    Se offset_blank == 1, adicionamos uma linha no final para "palavra vazia".
-    """
-    number_of_real_words = len(words_real)
-    number_of_estimated_words = len(words_estimated)
-
-    word_distance_matrix = np.zeros(
-        (number_of_estimated_words + offset_blank, number_of_real_words)
-    )
-
-    # Preenche a matriz com o custo customizado
-    for idx_estimated in range(number_of_estimated_words):
-        for idx_real in range(number_of_real_words):
-            cost = compute_word_cost(
-                words_estimated[idx_estimated],
-                words_real[idx_real],
-                use_phonetics=use_phonetics,
-                fuzzy=fuzzy
-            )
-            word_distance_matrix[idx_estimated, idx_real] = cost
-
-    # Linha de "palavra vazia" (BLANK)
-    if offset_blank == 1:
-        for idx_real in range(number_of_real_words):
-            # Ex: pode ser o tamanho da palavra. Aqui usamos 100 como custo "alto"
-            word_distance_matrix[number_of_estimated_words, idx_real] = 100.0
-
-    return word_distance_matrix
-
-###############################################################################
-# 5) Alinhamento via OR-Tools CP-SAT (como você já tinha)
-###############################################################################
-def get_best_path_from_distance_matrix(word_distance_matrix):
-    """
-    Usa um modelo de programação por restrições para alinhar.
-    Minimiza a soma dos custos.
-    """
-    modelCpp = cp_model.CpModel()
-    number_of_real_words = word_distance_matrix.shape[1]
-    number_of_estimated_words = word_distance_matrix.shape[0] - 1
-    number_words = max(number_of_real_words, number_of_estimated_words)
-
-    # estimated_words_order[i] = índice da palavra real correspondente ao i-ésimo tempo
-    estimated_words_order = [
-        modelCpp.NewIntVar(0, int(number_words - 1 + offset_blank), 'w%i' % i)
-        for i in range(number_words + offset_blank)
-    ]
-
-    # Garantir ordem não decrescente
-    for word_idx in range(number_words - 1):
-        modelCpp.Add(
-            estimated_words_order[word_idx + 1] >= estimated_words_order[word_idx]
-        )
-
-    total_phoneme_distance = 0
-    real_word_at_time = {}
-
-    # Vincular a variável estimated_words_order ao custo
-    for idx_estimated in range(number_of_estimated_words):
-        for idx_real in range(number_of_real_words):
-            real_word_at_time[idx_estimated, idx_real] = modelCpp.NewBoolVar(
-                'real_word_at_time_%d_%d' % (idx_estimated, idx_real)
-            )
-            modelCpp.Add(
-                estimated_words_order[idx_estimated] == idx_real
-            ).OnlyEnforceIf(real_word_at_time[idx_estimated, idx_real])
-
-            cost = word_distance_matrix[idx_estimated, idx_real]
-            total_phoneme_distance += cost * real_word_at_time[idx_estimated, idx_real]
-
-    # Se nenhuma palavra estimada corresponder à palavra real, usa a BLANK (última linha)
-    # Aqui soma o custo 'vazio' se não tiver correspondência
-    for idx_real in range(number_of_real_words):
-        word_has_a_match = modelCpp.NewBoolVar(
-            'word_has_a_match_%d' % (idx_real)
-        )
-        modelCpp.Add(
-            sum(real_word_at_time[idx_estimated, idx_real]
-                for idx_estimated in range(number_of_estimated_words)
-            ) == 1
-        ).OnlyEnforceIf(word_has_a_match)
-
-        cost_blank = word_distance_matrix[number_of_estimated_words, idx_real]
-        total_phoneme_distance += cost_blank * word_has_a_match.Not()
-
-    # Minimizar o custo total
-    modelCpp.Minimize(total_phoneme_distance)
-
-    solver = cp_model.CpSolver()
-    solver.parameters.max_time_in_seconds = TIME_THRESHOLD_MAPPING
-    status = solver.Solve(modelCpp)
-
-    mapped_indices = []
-    if status in [cp_model.OPTIMAL, cp_model.FEASIBLE]:
-        try:
-            for word_idx in range(number_words):
-                v = solver.Value(estimated_words_order[word_idx])
-                mapped_indices.append(v)
-        except:
-            return []
-    else:
-        return []
-
-    return np.array(mapped_indices, dtype=int)
-
-###############################################################################
-# 6) Reconstruir o alinhamento
-###############################################################################
-def get_resulting_string(mapped_indices: np.array, words_estimated: list, words_real: list):
-    """
-    Retorna uma lista de 'mapped_words' (palavra reconhecida que mais se aproxima
-    de cada palavra real) e também seus índices.
-    Caso não haja correspondência, preenche com '-'.
-    """
-    mapped_words = []
-    mapped_words_indices = []
-    WORD_NOT_FOUND_TOKEN = '-'
-    number_of_real_words = len(words_real)
-    number_of_estimated_words = len(words_estimated)
-
-    for word_idx in range(number_of_real_words):
-        position_of_real_word_indices = np.where(mapped_indices == word_idx)[0].astype(int)
-
-        if len(position_of_real_word_indices) == 0:
-            # Nenhuma correspondência => '-'
-            mapped_words.append(WORD_NOT_FOUND_TOKEN)
-            mapped_words_indices.append(-1)
-            continue
-
-        if len(position_of_real_word_indices) == 1:
-            # Correspondência exata
-            est_idx = position_of_real_word_indices[0]
-            if est_idx < number_of_estimated_words:
-                mapped_words.append(words_estimated[est_idx])
-                mapped_words_indices.append(est_idx)
-            else:
-                mapped_words.append(WORD_NOT_FOUND_TOKEN)
-                mapped_words_indices.append(-1)
-            continue
-
-        # Se houver mais de 1 estimativa mapeada à mesma palavra real, escolher a de menor custo
-        best_cost = float('inf')
-        best_word = WORD_NOT_FOUND_TOKEN
-        best_idx = -1
-        for single_word_idx in position_of_real_word_indices:
-            if single_word_idx >= number_of_estimated_words:
-                continue
-            cost = compute_word_cost(words_estimated[single_word_idx], words_real[word_idx])
-            if cost < best_cost:
-                best_cost = cost
-                best_word = words_estimated[single_word_idx]
-                best_idx = single_word_idx
-
-        mapped_words.append(best_word)
-        mapped_words_indices.append(best_idx)
-
-    return mapped_words, mapped_words_indices
-
-###############################################################################
-# 7) Função principal para mapear via CP-SAT e fallback para DTW
-###############################################################################
-def get_best_mapped_words(
-    words_estimated: list[str], 
-    words_real: list[str], 
-    use_phonetics: bool = True, 
-    fuzzy: bool = False
-) -> tuple[list[str], list[int]]:
-    """
-    Cria a matriz de custo, tenta resolver via OR-Tools. 
-    Se não convergir ou demorar, faz fallback em DTW com restrições (Sakoe-Chiba).
-    """
-    word_distance_matrix = get_word_distance_matrix(
-        words_estimated, words_real,
-        use_phonetics=use_phonetics, fuzzy=fuzzy
-    )
-
-    start = time.time()
-    mapped_indices = get_best_path_from_distance_matrix(word_distance_matrix)
-    duration_of_mapping = time.time() - start
-
-    # Fallback para dtwalign se o solver não convergir
-    if len(mapped_indices) == 0 or duration_of_mapping > (TIME_THRESHOLD_MAPPING + 0.5):
-        # Definindo parâmetros de DTW (janela de sakoe-chiba e step_pattern “symmetric2”)
-        alignment = dtw(
-            word_distance_matrix,
-            step_pattern="symmetric2",
-            window_type="sakoechiba",
-            window_size=3  # Ajuste para restringir o quão distante o caminho pode ficar da diagonal
-        )
-        path = alignment.path
-        # path é array Nx2 com (i, j). Precisamos extrair o mapeamento final
-        # Para simplificar: cada i em words_estimated se alinha a path[i, 1] => j
-        # mas lembre que a matriz tem offset_blank => shape[0] = number_of_estimated + 1
-        # Precisamos tomar cuidado:
-        min_len = min(len(words_estimated), len(path))
-        mapped_indices = path[:min_len, 1]
-
-    # Com base em mapped_indices, reconstruímos as strings
-    mapped_words, mapped_words_indices = get_resulting_string(
-        mapped_indices, words_estimated, words_real
-    )
-    return mapped_words, mapped_words_indices
-
-###############################################################################
-# 8) Funções auxiliares para comparação de letras, parse de erros, etc.
-###############################################################################
-def getWhichLettersWereTranscribedCorrectly(real_word, transcribed_word):
-    """
-    Retorna uma lista de 1 e 0 para cada letra da word_real,
-    indicando se bate com transcribed_word no índice correspondente.
-    Simplesmente comparando char a char, sem levar em conta fonética.
-    """
-    length = min(len(real_word), len(transcribed_word))
-    is_letter_correct = []
-    for idx in range(length):
-        if real_word[idx] == transcribed_word[idx] or real_word[idx] in punctuation:
-            is_letter_correct.append(1)
-        else:
-            is_letter_correct.append(0)
-    # Se a real_word for maior, anexa zeros
-    if len(real_word) > length:
-        is_letter_correct.extend([0]*(len(real_word)-length))
-    return is_letter_correct
-
-def parseLetterErrorsToHTML(word_real, is_letter_correct):
-    """
-    Destaca as letras corretas e incorretas, só para visualização.
-    """
-    word_colored = ''
-    correct_color_start = '<span style="color:green;">'
-    correct_color_end = '</span>'
-    wrong_color_start = '<span style="color:red;">'
-    wrong_color_end = '</span>'
-
-    for idx, letter in enumerate(word_real):
-        if idx < len(is_letter_correct) and is_letter_correct[idx] == 1:
-            word_colored += correct_color_start + letter + correct_color_end
-        else:
-            word_colored += wrong_color_start + letter + wrong_color_end
-    return word_colored
-
-###############################################################################
-# 9) DTW puro (caso queira um atalho) – usando Levenshtein do python-Levenshtein
-#    Mantido apenas a título de referência do seu código original.
-###############################################################################
-from Levenshtein import distance as levenshtein_distance
-
-def dtw_puro(words_expected, words_recognized):
-    """
-    Versão minimalista de DTW usando a distância Levenshtein pura, sem
-    step_pattern sofisticado nem sakoe-chiba. Apenas para referência.
-    """
-    n = len(words_expected)
-    m = len(words_recognized)
-    dtw_matrix = np.zeros((n+1, m+1))
-    dtw_matrix[0, 1:] = np.inf
-    dtw_matrix[1:, 0] = np.inf
-
-    for i in range(1, n+1):
-        for j in range(1, m+1):
-            cost = levenshtein_distance(words_expected[i-1], words_recognized[j-1])
-            dtw_matrix[i, j] = cost + min(
-                dtw_matrix[i-1, j],    # Inserção
-                dtw_matrix[i, j-1],    # Deleção
-                dtw_matrix[i-1, j-1]   # Substituição
-            )
-    return dtw_matrix
+# WordMatching.py
+
+import WordMetrics  # Usa a função edit_distance() do RapidFuzz
+from ortools.sat.python import cp_model
+import numpy as np
+from string import punctuation
+from dtwalign import dtw_from_distance_matrix
+import time
+import bisect
+from collections import Counter
+from rapidfuzz import fuzz  
+from Cancellation import check_cancelled
+import Metrics
+import Tracing
+import TextNormalizer
+
+offset_blank = 1
+
+# Acima deste número de palavras de referência a matriz densa + CP-SAT não
+# terminam a tempo (~3 s já com 40 palavras); usa-se get_anchored_mapped_words
+LONG_PASSAGE_WORDS = 40
+TIME_THRESHOLD_MAPPING = 5.0
+
+###############################################################################
+# 1) Definir lista de palavras funcionais para filtrar ou dar custo reduzido
+###############################################################################
+FUNCTION_WORDS = {
+    "le", "la", "les", "de", "d'", "du", "des", "un", "une", "et", "ou",
+    "je", "tu", "il", "elle", "on", "nous", "vous", "ils", "elles",
+    "à", "au", "aux", "ça", "ce", "ces", "c'", "ma", "mon", "mes"
+}
+
+
+###############################################################################
+# 2) função de conversão fonética (bem simples)
+###############################################################################
+def convert_to_phonetics(word: str) -> str:
+    """
+    Converte a palavra para uma forma pseudo-fonética.
+    Aqui, simplificado: apenas minúsculas, remove acentos e substitui alguns dígrafos
+    (regras em TextNormalizer.PSEUDO_PHONETIC_REWRITES).
+    Em produção, recomendável usar Epitran, p.e. epi.transliterate(word).
+    """
+    return TextNormalizer.pseudo_phonetic(word)
+
+###############################################################################
+# 3) Função de custo customizado entre duas palavras
+###############################################################################
+def compute_word_cost(word_expected: str, word_recognized: str, 
+                      use_phonetics=True, fuzzy=False) -> float:
+    """
+    Calcula o 'custo' de alinhar word_expected e word_recognized.
+    - use_phonetics: se True, converte as palavras para pseudo-fonética antes de calcular a distância
+    - fuzzy: se True, usamos partial_ratio do rapidfuzz para medir similaridade
+    Retorna quanto maior o valor, maior a diferença (custo).
+    """
+    # Se as duas forem palavras funcionais, reduzimos o peso (por exemplo, custo / 2)
+    # pois erros em palavras funcionais podem ser menos críticos, dependendo do caso:
+    function_word_factor = 1.0
+    if word_expected.lower() in FUNCTION_WORDS or word_recognized.lower() in FUNCTION_WORDS:
+        function_word_factor = 0.5
+
+    # Se quisermos comparar foneticamente
+    if use_phonetics:
+        we = convert_to_phonetics(word_expected)
+        wr = convert_to_phonetics(word_recognized)
+    else:
+        we = word_expected.lower()
+        wr = word_recognized.lower()
+
+    cost = 100 * (1 - WordMetrics.hybrid_similarity(we, wr))
+
+    return cost * function_word_factor
+
+###############################################################################
+# 4) Montar a matriz de distância (custo) para DTW ou CP-SAT
+###############################################################################
+def get_word_distance_matrix(words_estimated: list, words_real: list,
+                             use_phonetics=True, fuzzy=False, cancel_token=None) -> np.array:
+    """
+    Retorna uma matriz de custo (linhas: palavras do reconhecido, colunas: palavras reais).
+    Se offset_blank == 1, adicionamos uma linha no final para "palavra vazia".
+    cancel_token é verificado a cada linha.
+    """
+    number_of_real_words = len(words_real)
+    number_of_estimated_words = len(words_estimated)
+
+    word_distance_matrix = np.zeros(
+        (number_of_estimated_words + offset_blank, number_of_real_words)
+    )
+
+    # Preenche a matriz com o custo customizado
+    for idx_estimated in range(number_of_estimated_words):
+        check_cancelled(cancel_token)
+        for idx_real in range(number_of_real_words):
+            cost = compute_word_cost(
+                words_estimated[idx_estimated],
+                words_real[idx_real],
+                use_phonetics=use_phonetics,
+                fuzzy=fuzzy
+            )
+            word_distance_matrix[idx_estimated, idx_real] = cost
+
+    # Linha de "palavra vazia" (BLANK)
+    if offset_blank == 1:
+        for idx_real in range(number_of_real_words):
+            # Ex: pode ser o tamanho da palavra. Aqui usamos 100 como custo "alto"
+            word_distance_matrix[number_of_estimated_words, idx_real] = 100.0
+
+    return word_distance_matrix
+
+###############################################################################
+# 5) Alinhamento via OR-Tools CP-SAT (como você já tinha)
+###############################################################################
+def get_best_path_from_distance_matrix(word_distance_matrix, cancel_token=None):
+    """
+    Usa um modelo de programação por restrições para alinhar.
+    Minimiza a soma dos custos.
+    Se cancel_token for cancelado durante a busca, o solver é interrompido
+    e OperationCancelled é levantada.
+    """
+    modelCpp = cp_model.CpModel()
+    number_of_real_words = word_distance_matrix.shape[1]
+    number_of_estimated_words = word_distance_matrix.shape[0] - 1
+    number_words = max(number_of_real_words, number_of_estimated_words)
+
+    # estimated_words_order[i] = índice da palavra real correspondente ao i-ésimo tempo
+    estimated_words_order = [
+        modelCpp.NewIntVar(0, int(number_words - 1 + offset_blank), 'w%i' % i)
+        for i in range(number_words + offset_blank)
+    ]
+
+    # Garantir ordem não decrescente
+    for word_idx in range(number_words - 1):
+        modelCpp.Add(
+            estimated_words_order[word_idx + 1] >= estimated_words_order[word_idx]
+        )
+
+    total_phoneme_distance = 0
+    real_word_at_time = {}
+
+    # Vincular a variável estimated_words_order ao custo
+    for idx_estimated in range(number_of_estimated_words):
+        for idx_real in range(number_of_real_words):
+            real_word_at_time[idx_estimated, idx_real] = modelCpp.NewBoolVar(
+                'real_word_at_time_%d_%d' % (idx_estimated, idx_real)
+            )
+            modelCpp.Add(
+                estimated_words_order[idx_estimated] == idx_real
+            ).OnlyEnforceIf(real_word_at_time[idx_estimated, idx_real])
+
+            cost = word_distance_matrix[idx_estimated, idx_real]
+            total_phoneme_distance += cost * real_word_at_time[idx_estimated, idx_real]
+
+    # Se nenhuma palavra estimada corresponder à palavra real, usa a BLANK (última linha)
+    # Aqui soma o custo 'vazio' se não tiver correspondência
+    for idx_real in range(number_of_real_words):
+        word_has_a_match = modelCpp.NewBoolVar(
+            'word_has_a_match_%d' % (idx_real)
+        )
+        modelCpp.Add(
+            sum(real_word_at_time[idx_estimated, idx_real]
+                for idx_estimated in range(number_of_estimated_words)
+            ) == 1
+        ).OnlyEnforceIf(word_has_a_match)
+
+        cost_blank = word_distance_matrix[number_of_estimated_words, idx_real]
+        total_phoneme_distance += cost_blank * word_has_a_match.Not()
+
+    # Minimizar o custo total
+    modelCpp.Minimize(total_phoneme_distance)
+
+    check_cancelled(cancel_token)
+    solver = cp_model.CpSolver()
+    solver.parameters.max_time_in_seconds = TIME_THRESHOLD_MAPPING
+    if cancel_token is not None:
+        cancel_token.add_callback(solver.StopSearch)
+        try:
+            status = solver.Solve(modelCpp)
+        finally:
+            cancel_token.remove_callback(solver.StopSearch)
+        check_cancelled(cancel_token)
+    else:
+        status = solver.Solve(modelCpp)
+
+    mapped_indices = []
+    if status in [cp_model.OPTIMAL, cp_model.FEASIBLE]:
+        try:
+            for word_idx in range(number_words):
+                v = solver.Value(estimated_words_order[word_idx])
+                mapped_indices.append(v)
+        except:
+            return []
+    else:
+        return []
+
+    return np.array(mapped_indices, dtype=int)
+
+###############################################################################
+# 6) Reconstruir o alinhamento
+###############################################################################
+def get_resulting_string(mapped_indices: np.array, words_estimated: list, words_real: list):
+    """
+    Retorna uma lista de 'mapped_words' (palavra reconhecida que mais se aproxima
+    de cada palavra real) e também seus índices.
+    Caso não haja correspondência, preenche com '-'.
+    """
+    mapped_words = []
+    mapped_words_indices = []
+    WORD_NOT_FOUND_TOKEN = '-'
+    number_of_real_words = len(words_real)
+    number_of_estimated_words = len(words_estimated)
+
+    for word_idx in range(number_of_real_words):
+        position_of_real_word_indices = np.where(mapped_indices == word_idx)[0].astype(int)
+
+        if len(position_of_real_word_indices) == 0:
+            # Nenhuma correspondência => '-'
+            mapped_words.append(WORD_NOT_FOUND_TOKEN)
+            mapped_words_indices.append(-1)
+            continue
+
+        if len(position_of_real_word_indices) == 1:
+            # Correspondência exata
+            est_idx = position_of_real_word_indices[0]
+            if est_idx < number_of_estimated_words:
+                mapped_words.append(words_estimated[est_idx])
+                mapped_words_indices.append(est_idx)
+            else:
+                mapped_words.append(WORD_NOT_FOUND_TOKEN)
+                mapped_words_indices.append(-1)
+            continue
+
+        # Se houver mais de 1 estimativa mapeada à mesma palavra real, escolher a de menor custo
+        best_cost = float('inf')
+        best_word = WORD_NOT_FOUND_TOKEN
+        best_idx = -1
+        for single_word_idx in position_of_real_word_indices:
+            if single_word_idx >= number_of_estimated_words:
+                continue
+            cost = compute_word_cost(words_estimated[single_word_idx], words_real[word_idx])
+            if cost < best_cost:
+                best_cost = cost
+                best_word = words_estimated[single_word_idx]
+                best_idx = single_word_idx
+
+        mapped_words.append(best_word)
+        mapped_words_indices.append(best_idx)
+
+    return mapped_words, mapped_words_indices
+
+###############################################################################
+# 7) Função principal para mapear via CP-SAT e fallback para DTW
+###############################################################################
+def get_best_mapped_words(
+    words_estimated: list[str], 
+    words_real: list[str], 
+    use_phonetics: bool = True, 
+    fuzzy: bool = False,
+    cancel_token=None
+) -> tuple[list[str], list[int]]:
+    """
+    Atalho antes do solver: se a transcrição é igual à referência o
+    alinhamento é a identidade; senão as sequências iguais do começo e do
+    fim são casadas direto e só o miolo diferente vai para o alinhamento
+    (matriz de custo + OR-Tools, com fallback em DTW com restrições
+    Sakoe-Chiba; acima de LONG_PASSAGE_WORDS, âncoras + faixa).
+    Levanta OperationCancelled se cancel_token for cancelado no caminho.
+    """
+    n = len(words_real)
+    m = len(words_estimated)
+    real = [_anchor_key(w) for w in words_real]
+    est = [_anchor_key(w) for w in words_estimated]
+    if real == est:
+        Metrics.ALIGNMENT_FASTPATH.inc(result='exact')
+        Tracing.annotate(fastpath='exact')
+        return list(words_estimated), list(range(n))
+
+    prefix = 0
+    while prefix < min(n, m) and real[prefix] == est[prefix]:
+        prefix += 1
+    suffix = 0
+    while suffix < min(n, m) - prefix and real[n - 1 - suffix] == est[m - 1 - suffix]:
+        suffix += 1
+    Metrics.ALIGNMENT_FASTPATH.inc(result='trimmed' if prefix or suffix else 'none')
+    Tracing.annotate(fastpath='trimmed' if prefix or suffix else 'none', prefix=prefix, suffix=suffix)
+
+    mapped_words = list(words_estimated[:prefix])
+    mapped_words_indices = list(range(prefix))
+    real_middle = words_real[prefix:n - suffix]
+    est_middle = words_estimated[prefix:m - suffix]
+    if real_middle and est_middle:
+        middle_words, middle_indices = _solve_mapped_words(est_middle, real_middle, use_phonetics,
+                                                           fuzzy, cancel_token)
+        mapped_words += middle_words
+        mapped_words_indices += [idx + prefix if idx >= 0 else -1 for idx in middle_indices]
+    else:
+        mapped_words += ['-'] * len(real_middle)
+        mapped_words_indices += [-1] * len(real_middle)
+    mapped_words += words_estimated[m - suffix:]
+    mapped_words_indices += list(range(m - suffix, m))
+    return mapped_words, mapped_words_indices
+
+
+def _solve_mapped_words(words_estimated, words_real, use_phonetics, fuzzy, cancel_token):
+    # Alinhamento completo (sem atalho) das sequências dadas
+    if len(words_real) > LONG_PASSAGE_WORDS:
+        return get_anchored_mapped_words(words_estimated, words_real, use_phonetics=use_phonetics,
+                                         fuzzy=fuzzy, cancel_token=cancel_token)
+
+    with Metrics.stage('distance_matrix'):
+        word_distance_matrix = get_word_distance_matrix(
+            words_estimated, words_real,
+            use_phonetics=use_phonetics, fuzzy=fuzzy, cancel_token=cancel_token
+        )
+
+    start = time.time()
+    mapped_indices = get_best_path_from_distance_matrix(word_distance_matrix, cancel_token=cancel_token)
+    duration_of_mapping = time.time() - start
+    Metrics.ALIGNMENT_SECONDS.observe(duration_of_mapping, engine='cpsat')
+    Metrics.ALIGNMENT_RUNS.inc(engine='cpsat')
+    Tracing.annotate(engine='cpsat', cpsat_ms=round(duration_of_mapping * 1000, 1), fallback=False)
+
+    # Fallback para dtwalign se o solver não convergir
+    if len(mapped_indices) == 0 or duration_of_mapping > (TIME_THRESHOLD_MAPPING + 0.5):
+        Metrics.ALIGNMENT_RUNS.inc(engine='dtw')
+        Tracing.annotate(engine='dtw', fallback=True)
+        start = time.time()
+        # Definindo parâmetros de DTW (janela de sakoe-chiba e step_pattern “symmetric2”)
+        # dtw() espera duas séries; com a matriz já pronta é dtw_from_distance_matrix
+        alignment = dtw_from_distance_matrix(
+            word_distance_matrix,
+            step_pattern="symmetric2",
+            window_type="sakoechiba",
+            window_size=3  # Ajuste para restringir o quão distante o caminho pode ficar da diagonal
+        )
+        path = alignment.path
+        # path é array Nx2 com (i, j): i = palavra reconhecida (a última linha é
+        # a BLANK do offset_blank), j = palavra real. Cada palavra reconhecida
+        # fica com o primeiro j em que aparece no caminho.
+        mapped_indices = np.full(len(words_estimated), -1, dtype=int)
+        for i, j in path:
+            if i < len(words_estimated) and mapped_indices[i] == -1:
+                mapped_indices[i] = j
+        Metrics.ALIGNMENT_SECONDS.observe(time.time() - start, engine='dtw')
+
+    # Com base em mapped_indices, reconstruímos as strings
+    mapped_words, mapped_words_indices = get_resulting_string(
+        mapped_indices, words_estimated, words_real
+    )
+    return mapped_words, mapped_words_indices
+
+###############################################################################
+# 7.1) Alinhamento em faixa para textos longos (modo leitura)
+###############################################################################
+# A matriz densa + CP-SAT crescem com n·m e não cabem num parágrafo de
+# centenas de palavras. Aqui o alinhamento é uma programação dinâmica de
+# edição (casar / palavra real faltando / palavra extra) restrita a uma faixa
+# de BAND_WORDS palavras em torno da diagonal: tempo e memória O(n·faixa).
+# Usada nas lacunas entre âncoras de get_anchored_mapped_words.
+BAND_WORDS = 25
+GAP_COST = 100.0        # palavra real sem correspondência (= linha BLANK da matriz)
+INSERTION_COST = 50.0   # palavra reconhecida a mais (hesitação, repetição)
+
+
+def _banded_alignment(words_estimated, words_real, band, use_phonetics, fuzzy, cancel_token):
+    # Índice da palavra reconhecida casada com cada palavra real (-1 se nenhuma)
+    n = len(words_real)
+    m = len(words_estimated)
+    if n == 0 or m == 0:
+        return [-1] * n
+
+    slope = m / n
+    # A faixa precisa ser mais larga que o passo da diagonal para as linhas se tocarem
+    width = max(band, int(np.ceil(slope)) + 1)
+    costs = {}
+
+    def word_cost(i, j):
+        key = (words_real[i], words_estimated[j])
+        cost = costs.get(key)
+        if cost is None:
+            cost = costs[key] = compute_word_cost(key[0], key[1], use_phonetics=use_phonetics, fuzzy=fuzzy)
+        return cost
+
+    def bounds(i):
+        center = i * slope
+        return max(0, int(np.floor(center)) - width), min(m, int(np.ceil(center)) + width)
+
+    # rows[i] = (lo, custos, passos); passo 0 = casar, 1 = real faltando, 2 = palavra extra
+    lo, hi = bounds(0)
+    rows = [(lo, [j * INSERTION_COST for j in range(lo, hi + 1)], bytearray([2] * (hi - lo + 1)))]
+    for i in range(1, n + 1):
+        check_cancelled(cancel_token)
+        prev_lo, prev_cost, _ = rows[-1]
+        prev_hi = prev_lo + len(prev_cost) - 1
+        lo, hi = bounds(i)
+        cost_row = []
+        steps = bytearray(hi - lo + 1)
+        for j in range(lo, hi + 1):
+            best, step = np.inf, 1
+            if prev_lo <= j - 1 <= prev_hi:
+                best, step = prev_cost[j - 1 - prev_lo] + word_cost(i - 1, j - 1), 0
+            if prev_lo <= j <= prev_hi and prev_cost[j - prev_lo] + GAP_COST < best:
+                best, step = prev_cost[j - prev_lo] + GAP_COST, 1
+            if j > lo and cost_row[-1] + INSERTION_COST < best:
+                best, step = cost_row[-1] + INSERTION_COST, 2
+            cost_row.append(best)
+            steps[j - lo] = step
+        rows.append((lo, cost_row, steps))
+
+    # Caminho de volta a partir de (n, m)
+    mapped_words_indices = [-1] * n
+    i, j = n, m
+    while i > 0:
+        lo, _, steps = rows[i]
+        step = steps[j - lo] if j >= lo else 1
+        if step == 0:
+            mapped_words_indices[i - 1] = j - 1
+            i, j = i - 1, j - 1
+        elif step == 1:
+            i -= 1
+        else:
+            j -= 1
+    return mapped_words_indices
+
+###############################################################################
+# 7.2) Âncoras exatas + faixa nas lacunas (textos longos)
+###############################################################################
+# Como o patience diff: palavras que aparecem uma única vez na referência e
+# uma única vez na transcrição, e iguais, viram âncoras (a maior subsequência
+# crescente delas, para não cruzar). Repete-se dentro de cada lacuna entre
+# âncoras, onde palavras antes repetidas podem passar a ser únicas. Só as
+# lacunas vão para a programação dinâmica em faixa; com uma leitura razoável
+# elas são curtas e o custo fica perto de O(n).
+
+
+def _anchor_key(word):
+    return word.lower().strip(punctuation)
+
+
+def find_anchors(words_estimated: list[str], words_real: list[str]) -> list[tuple[int, int]]:
+    """Pares (índice_real, índice_reconhecido) de palavras iguais, crescentes nos dois índices."""
+    real = [_anchor_key(w) for w in words_real]
+    est = [_anchor_key(w) for w in words_estimated]
+    anchors = []
+    stack = [(0, len(real), 0, len(est))]
+    while stack:
+        a0, a1, b0, b1 = stack.pop()
+        # Pontas iguais entram direto
+        while a0 < a1 and b0 < b1 and real[a0] == est[b0]:
+            anchors.append((a0, b0))
+            a0, b0 = a0 + 1, b0 + 1
+        while a0 < a1 and b0 < b1 and real[a1 - 1] == est[b1 - 1]:
+            a1, b1 = a1 - 1, b1 - 1
+            anchors.append((a1, b1))
+        if a0 == a1 or b0 == b1:
+            continue
+
+        real_counts = Counter(real[a0:a1])
+        est_counts = Counter(est[b0:b1])
+        est_position = {est[j]: j for j in range(b0, b1) if est_counts[est[j]] == 1}
+        pairs = [(i, est_position[real[i]]) for i in range(a0, a1)
+                 if real_counts[real[i]] == 1 and real[i] in est_position]
+        unique_anchors = _longest_increasing(pairs)
+        if not unique_anchors:
+            continue
+        anchors.extend(unique_anchors)
+        prev_i, prev_j = a0, b0
+        for i, j in unique_anchors:
+            stack.append((prev_i, i, prev_j, j))
+            prev_i, prev_j = i + 1, j + 1
+        stack.append((prev_i, a1, prev_j, b1))
+    anchors.sort()
+    return anchors
+
+
+def _longest_increasing(pairs):
+    # Maior subsequência com o segundo índice crescente (pairs já vem ordenado pelo primeiro)
+    tails = []       # menor j final de uma subsequência de cada tamanho
+    tails_idx = []
+    previous = [-1] * len(pairs)
+    for k, (_, j) in enumerate(pairs):
+        pos = bisect.bisect_left(tails, j)
+        if pos == len(tails):
+            tails.append(j)
+            tails_idx.append(k)
+        else:
+            tails[pos] = j
+            tails_idx[pos] = k
+        previous[k] = tails_idx[pos - 1] if pos > 0 else -1
+    result = []
+    k = tails_idx[-1] if tails_idx else -1
+    while k >= 0:
+        result.append(pairs[k])
+        k = previous[k]
+    return result[::-1]
+
+
+def get_anchored_mapped_words(
+    words_estimated: list[str],
+    words_real: list[str],
+    band: int = BAND_WORDS,
+    use_phonetics: bool = True,
+    fuzzy: bool = False,
+    cancel_token=None
+) -> tuple[list[str], list[int]]:
+    """
+    Fixa as âncoras exatas (find_anchors) e alinha só as lacunas entre elas
+    com a programação dinâmica em faixa. Tempo e memória O(n·faixa).
+    Mesmo retorno de get_best_mapped_words.
+    """
+    start = time.time()
+    Metrics.ALIGNMENT_RUNS.inc(engine='anchored')
+    Tracing.annotate(engine='anchored')
+    n = len(words_real)
+    mapped_words_indices = [-1] * n
+    anchors = find_anchors(words_estimated, words_real)
+
+    prev_i, prev_j = 0, 0
+    for i, j in anchors + [(n, len(words_estimated))]:
+        if i > prev_i and j > prev_j:
+            gap = _banded_alignment(words_estimated[prev_j:j], words_real[prev_i:i], band,
+                                    use_phonetics, fuzzy, cancel_token)
+            for k, est_idx in enumerate(gap):
+                if est_idx >= 0:
+                    mapped_words_indices[prev_i + k] = prev_j + est_idx
+        if i < n:
+            mapped_words_indices[i] = j
+        prev_i, prev_j = i + 1, j + 1
+
+    mapped_words = [words_estimated[j] if j >= 0 else '-' for j in mapped_words_indices]
+    Metrics.ALIGNMENT_SECONDS.observe(time.time() - start, engine='anchored')
+    return mapped_words, mapped_words_indices
+
+###############################################################################
+# 8) Funções auxiliares para comparação de letras, parse de erros, etc.
+###############################################################################
+def getWhichLettersWereTranscribedCorrectly(real_word, transcribed_word):
+    """
+    Retorna uma lista de 1 e 0 para cada letra da word_real,
+    indicando se bate com transcribed_word no índice correspondente.
+    Simplesmente comparando char a char, sem levar em conta fonética.
+    """
+    length = min(len(real_word), len(transcribed_word))
+    is_letter_correct = []
+    for idx in range(length):
+        if real_word[idx] == transcribed_word[idx] or real_word[idx] in punctuation:
+            is_letter_correct.append(1)
+        else:
+            is_letter_correct.append(0)
+    # Se a real_word for maior, anexa zeros
+    if len(real_word) > length:
+        is_letter_correct.extend([0]*(len(real_word)-length))
+    return is_letter_correct
+
+def parseLetterErrorsToHTML(word_real, is_letter_correct):
+    """
+    Destaca as letras corretas e incorretas, só para visualização.
+    """
+    word_colored = ''
+    correct_color_start = '<span style="color:green;">'
+    correct_color_end = '</span>'
+    wrong_color_start = '<span style="color:red;">'
+    wrong_color_end = '</span>'
+
+    for idx, letter in enumerate(word_real):
+        if idx < len(is_letter_correct) and is_letter_correct[idx] == 1:
+            word_colored += correct_color_start + letter + correct_color_end
+        else:
+            word_colored += wrong_color_start + letter + wrong_color_end
+    return word_colored
+
+###############################################################################
+# 9) DTW puro (caso queira um atalho) – usando Levenshtein do python-Levenshtein
+#    Mantido apenas a título de referência do seu código original.
+###############################################################################
+from Levenshtein import distance as levenshtein_distance
+
+def dtw_puro(words_expected, words_recognized):
+    """
+    Versão minimalista de DTW usando a distância Levenshtein pura, sem
+    step_pattern sofisticado nem sakoe-chiba. Apenas para referência.
+    """
+    n = len(words_expected)
+    m = len(words_recognized)
+    dtw_matrix = np.zeros((n+1, m+1))
+    dtw_matrix[0, 1:] = np.inf
+    dtw_matrix[1:, 0] = np.inf
+
+    for i in range(1, n+1):
+        for j in range(1, m+1):
+            cost = levenshtein_distance(words_expected[i-1], words_recognized[j-1])
+            dtw_matrix[i, j] = cost + min(
+                dtw_matrix[i-1, j],    # Inserção
+                dtw_matrix[i, j-1],    # Deleção
+                dtw_matrix[i-1, j-1]   # Substituição
+            )
+    return dtw_matrix
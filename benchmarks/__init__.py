@@ -0,0 +1 @@
+# Suíte de benchmarks dos caminhos quentes. Ver benchmarks/run.py.
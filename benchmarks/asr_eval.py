@@ -0,0 +1,170 @@
+# benchmarks/asr_eval.py
+#
+# Precisão e latência de cada modelo de ASR (AsrModels, ASR_MODELS) num
+# conjunto de avaliação local: uma pasta com pares clipe.wav + clipe.txt
+# (transcrição de referência), ou um manifest TSV "caminho<TAB>texto".
+#
+# Para cada modelo, todos os clipes passam pelo pipeline de main
+# (load_waveform -> redução de ruído -> wav2vec2 -> CTC), um por vez, e o
+# relatório traz WER e CER (texto normalizado por TextNormalizer), latência
+# p50/p95 e fator tempo-real, no total e por faixa de duração. A linha
+# "routed" aplica a política de roteamento (asr_routing, sem pressão de fila)
+# a cada clipe: é o resultado esperado com ASR_SMALL_MAX_SECONDS e
+# ASR_SMALL_CATEGORIES atuais (a categoria vem de --category).
+#
+#   ASR_MODELS=large=jonatasgrosman/wav2vec2-xls-r-1b-french,base=<checkpoint> \
+#       python -m benchmarks.asr_eval --eval-dir eval_fr/ --out asr_eval.json
+
+import os
+import sys
+import json
+import time
+import argparse
+
+from Levenshtein import distance as levenshtein_distance
+
+from benchmarks.harness import REPO_ROOT
+from benchmarks.loadgen import _percentile
+
+DURATION_BUCKETS = ((0.0, 2.0), (2.0, 5.0), (5.0, 10.0), (10.0, float('inf')))
+
+
+def load_eval_set(eval_dir=None, manifest=None):
+    """[(caminho do áudio, transcrição de referência)]."""
+    pairs = []
+    if manifest:
+        base = os.path.dirname(os.path.abspath(manifest))
+        with open(manifest, encoding='utf-8') as f:
+            for line in f:
+                path, sep, text = line.rstrip('\n').partition('\t')
+                if sep and text.strip():
+                    pairs.append((os.path.join(base, path), text.strip()))
+    if eval_dir:
+        for name in sorted(os.listdir(eval_dir)):
+            stem, ext = os.path.splitext(name)
+            transcript = os.path.join(eval_dir, stem + '.txt')
+            if ext.lower() == '.wav' and os.path.exists(transcript):
+                with open(transcript, encoding='utf-8') as f:
+                    pairs.append((os.path.join(eval_dir, name), f.read().strip()))
+    return pairs
+
+
+def error_counts(reference, hypothesis, normalize):
+    """(erros de palavra, palavras na referência, erros de caractere, caracteres na referência)."""
+    ref, hyp = normalize(reference), normalize(hypothesis)
+    ref_words, hyp_words = ref.split(), hyp.split()
+    ref_chars, hyp_chars = ''.join(ref_words), ''.join(hyp_words)
+    return (levenshtein_distance(ref_words, hyp_words), len(ref_words),
+            levenshtein_distance(ref_chars, hyp_chars), len(ref_chars))
+
+
+def summarize(rows):
+    """WER/CER agregados (erros / tamanho da referência) e latência de um grupo de clipes."""
+    if not rows:
+        return None
+    latencies = sorted(r['latency_s'] for r in rows)
+    audio = sum(r['duration_s'] for r in rows)
+    return {
+        'clips': len(rows),
+        'wer': round(sum(r['word_errors'] for r in rows) / max(sum(r['words'] for r in rows), 1), 4),
+        'cer': round(sum(r['char_errors'] for r in rows) / max(sum(r['chars'] for r in rows), 1), 4),
+        'p50_ms': round(_percentile(latencies, 0.50) * 1000, 1),
+        'p95_ms': round(_percentile(latencies, 0.95) * 1000, 1),
+        'rtf': round(sum(latencies) / audio, 4) if audio else None,
+    }
+
+
+def report(rows):
+    """Resumo total e por faixa de duração."""
+    by_bucket = {}
+    for low, high in DURATION_BUCKETS:
+        label = f"{low:g}-{high:g}s" if high != float('inf') else f">{low:g}s"
+        summary = summarize([r for r in rows if low <= r['duration_s'] < high])
+        if summary:
+            by_bucket[label] = summary
+    return {'all': summarize(rows), 'by_duration': by_bucket}
+
+
+def evaluate(main, asr_model, eval_set):
+    from TextNormalizer import normalize_text
+    rows = []
+    for path, reference in eval_set:
+        waveform = main.load_waveform(path)
+        start = time.perf_counter()
+        logits = main.logits_from_waveform(waveform, asr_model=asr_model)
+        hypothesis = main.decode_transcription(logits, asr_model)
+        latency = time.perf_counter() - start
+        word_errors, words, char_errors, chars = error_counts(reference, hypothesis, normalize_text)
+        rows.append({
+            'clip': os.path.basename(path),
+            'duration_s': round(waveform.shape[-1] / 16000, 3),
+            'latency_s': latency,
+            'reference': reference,
+            'hypothesis': hypothesis,
+            'word_errors': word_errors, 'words': words,
+            'char_errors': char_errors, 'chars': chars,
+        })
+    return rows
+
+
+def _print_summary(label, summary):
+    print(f"  {label:<12}{summary['clips']:>6}{summary['wer']:>8.3f}{summary['cer']:>8.3f}"
+          f"{summary['p50_ms']:>10.0f}{summary['p95_ms']:>10.0f}{summary['rtf']:>8.3f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Precisão e latência por modelo de ASR')
+    parser.add_argument('--eval-dir', help='pasta com pares .wav + .txt')
+    parser.add_argument('--manifest', help='TSV: caminho do áudio<TAB>transcrição')
+    parser.add_argument('--category', help='categoria de exercício para a linha "routed"')
+    parser.add_argument('--limit', type=int, help='usa só os N primeiros clipes')
+    parser.add_argument('--out', help='grava o relatório (e as transcrições) em JSON')
+    args = parser.parse_args()
+
+    for path in (args.eval_dir, args.manifest):
+        if path and not os.path.exists(path):
+            sys.exit(f"Não encontrado: {path}")
+    eval_set = load_eval_set(args.eval_dir, args.manifest)[:args.limit]
+    if not eval_set:
+        sys.exit("Conjunto de avaliação vazio: use --eval-dir (pares .wav + .txt) ou --manifest")
+
+    os.chdir(REPO_ROOT)
+    sys.path.insert(0, REPO_ROOT)
+    import main as app_main
+
+    results = {}
+    for asr_model in app_main.asr_models.models.values():
+        # Aquecimento fora da medição
+        app_main.logits_from_waveform(app_main.load_waveform(eval_set[0][0]), asr_model=asr_model)
+        results[asr_model.name] = evaluate(app_main, asr_model, eval_set)
+
+    # Política de roteamento aplicada clipe a clipe sobre os resultados já medidos
+    routed = []
+    for i, _ in enumerate(eval_set):
+        duration = results[app_main.asr_models.default.name][i]['duration_s']
+        asr_model, reason = app_main.asr_routing.choose(duration, args.category)
+        routed.append(dict(results[asr_model.name][i], model=asr_model.name, reason=reason))
+
+    summary = {name: report(rows) for name, rows in results.items()}
+    summary['routed'] = report(routed)
+
+    print(f"{len(eval_set)} clipes; modelos: {', '.join(results)}")
+    for name, rep in summary.items():
+        print(f"\n{name}")
+        print(f"  {'faixa':<12}{'clipes':>6}{'WER':>8}{'CER':>8}{'p50 ms':>10}{'p95 ms':>10}{'RTF':>8}")
+        _print_summary('total', rep['all'])
+        for label, bucket in rep['by_duration'].items():
+            _print_summary(label, bucket)
+
+    if args.out:
+        with open(args.out, 'w', encoding='utf-8') as f:
+            json.dump({
+                'models': app_main.asr_models.stats(),
+                'routing': app_main.asr_routing.as_dict(),
+                'summary': summary,
+                'clips': {**results, 'routed': routed},
+            }, f, indent=2, ensure_ascii=False)
+
+
+if __name__ == '__main__':
+    main()
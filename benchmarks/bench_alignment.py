@@ -0,0 +1,96 @@
+# benchmarks/bench_alignment.py
+#
+# Alinhamento palavra a palavra: montagem da matriz de distância em vários
+# tamanhos e cada motor (CP-SAT, dtwalign, dtw_puro) sobre a mesma matriz.
+#
+# Passagens longas (LONG_SIZES, com erros de ASR injetados) só no motor sem
+# matriz densa: âncoras + faixa (modo leitura). alignment.*_misaligned
+# mede a qualidade: % das palavras que o "ASR" manteve intactas e que o
+# motor não casou com a posição certa (menor é melhor).
+
+from benchmarks.harness import benchmark, measurement
+from benchmarks.synthetic import corpus_words, asr_like_transcription, asr_like_alignment
+
+SIZES = (5, 10, 20, 40)
+LONG_SIZES = (500, 2000)
+
+
+def _case(size, seed=0):
+    words_real = corpus_words(limit=size, seed=seed)
+    words_estimated = asr_like_transcription(words_real, seed=seed)
+    return words_estimated, words_real
+
+
+def _register_size(size):
+    @benchmark(f'alignment.distance_matrix[{size}w]')
+    def bench_matrix():
+        import WordMatching
+        words_estimated, words_real = _case(size)
+        return lambda: WordMatching.get_word_distance_matrix(words_estimated, words_real)
+
+    @benchmark(f'alignment.cpsat[{size}w]', repeat=3)
+    def bench_cpsat():
+        import WordMatching
+        matrix = WordMatching.get_word_distance_matrix(*_case(size))
+        return lambda: WordMatching.get_best_path_from_distance_matrix(matrix)
+
+    @benchmark(f'alignment.dtwalign[{size}w]')
+    def bench_dtwalign():
+        import WordMatching
+        matrix = WordMatching.get_word_distance_matrix(*_case(size))
+        # dtw() do dtwalign espera duas séries; para matriz pronta é dtw_from_distance_matrix
+        return lambda: WordMatching.dtw_from_distance_matrix(matrix, step_pattern="symmetric2",
+                                                             window_type="sakoechiba", window_size=3)
+
+    @benchmark(f'alignment.dtw_puro[{size}w]')
+    def bench_dtw_puro():
+        import WordMatching
+        words_estimated, words_real = _case(size)
+        return lambda: WordMatching.dtw_puro(words_real, words_estimated)
+
+    @benchmark(f'alignment.best_mapped_words[{size}w]', repeat=3)
+    def bench_best_mapped():
+        import WordMatching
+        words_estimated, words_real = _case(size)
+        return lambda: WordMatching.get_best_mapped_words(words_estimated, words_real)
+
+    # Atalho antes do solver: leitura perfeita e leitura com uma palavra errada no meio
+    @benchmark(f'alignment.best_mapped_words_exact[{size}w]')
+    def bench_best_mapped_exact():
+        import WordMatching
+        words_real = corpus_words(limit=size)
+        return lambda: WordMatching.get_best_mapped_words(list(words_real), words_real)
+
+    @benchmark(f'alignment.best_mapped_words_one_error[{size}w]', repeat=3)
+    def bench_best_mapped_one_error():
+        import WordMatching
+        words_real = corpus_words(limit=size)
+        words_estimated = list(words_real)
+        words_estimated[size // 2] = words_estimated[size // 2][:-1] or 'x'
+        return lambda: WordMatching.get_best_mapped_words(words_estimated, words_real)
+
+
+def _misaligned_percent(mapped_indices, truth):
+    kept = [(got, expected) for got, expected in zip(mapped_indices, truth) if expected >= 0]
+    return 100.0 * sum(got != expected for got, expected in kept) / max(len(kept), 1)
+
+
+def _register_long_size(size):
+    @benchmark(f'alignment.anchored[{size}w]', repeat=3)
+    def bench_anchored():
+        import WordMatching
+        words_estimated, words_real = _case(size)
+        return lambda: WordMatching.get_anchored_mapped_words(words_estimated, words_real)
+
+    @measurement(f'alignment.anchored_misaligned[{size}w]', unit='%')
+    def measure_anchored():
+        import WordMatching
+        words_real = corpus_words(limit=size)
+        words_estimated, truth = asr_like_alignment(words_real)
+        return _misaligned_percent(WordMatching.get_anchored_mapped_words(words_estimated, words_real)[1], truth)
+
+
+for _size in SIZES:
+    _register_size(_size)
+for _size in LONG_SIZES:
+    _register_long_size(_size)
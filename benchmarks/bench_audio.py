@@ -0,0 +1,181 @@
+# benchmarks/bench_audio.py
+#
+# Etapas de process_audio (main.py) sobre áudio sintético: decodificação,
+# resample 48k -> 16k, redução de ruído, forward do wav2vec2 e o pipeline inteiro.
+# A carga é medida para o formato do gravador (WAV PCM16 mono 16 kHz,
+# AudioInput) e para o caminho antigo (WAV 48 kHz estéreo pelo torchaudio).
+# O pré-processamento (AudioPreprocess) é comparado com uma referência que
+# reproduz as cópias do pipeline antigo: pico de alocação (tracemalloc, que
+# vê as alocações do NumPy) e diferença máxima da saída. Precisa só do
+# noisereduce, não do torch.
+# Importar main carrega o modelo ASR; sem torch os benchmarks são pulados.
+
+import os
+import shutil
+import importlib
+import tracemalloc
+
+import numpy as np
+
+import AudioInput
+from benchmarks.harness import benchmark, measurement, SkipBenchmark
+from benchmarks.synthetic import synthetic_wav
+
+CLIP_SECONDS = 5
+
+_main = None
+
+
+def _load_main():
+    global _main
+    if _main is None:
+        try:
+            _main = importlib.import_module('main')
+        except ImportError as e:
+            raise SkipBenchmark(f'pilha de ASR indisponível ({e.name})')
+    return _main
+
+
+@benchmark(f'audio.load_decode[{CLIP_SECONDS}s,48k,stereo]')
+def bench_load_decode():
+    main = _load_main()
+    path = synthetic_wav(CLIP_SECONDS, sample_rate=48000, channels=2)
+
+    def run():
+        waveform, _ = main.torchaudio.load(path)
+        return waveform.mean(dim=0, keepdim=True)
+    return run
+
+
+@benchmark(f'audio.load_pcm16[{CLIP_SECONDS}s,16k,mono]')
+def bench_load_pcm16():
+    with open(synthetic_wav(CLIP_SECONDS), 'rb') as f:
+        data = f.read()
+    return lambda: AudioInput.pcm16_samples(data)
+
+
+@benchmark(f'audio.load_waveform[{CLIP_SECONDS}s,16k,mono]')
+def bench_load_waveform_fast():
+    main = _load_main()
+    path = synthetic_wav(CLIP_SECONDS)
+    return lambda: main.load_waveform(path)
+
+
+@benchmark(f'audio.load_waveform[{CLIP_SECONDS}s,48k,stereo]')
+def bench_load_waveform_fallback():
+    main = _load_main()
+    path = synthetic_wav(CLIP_SECONDS, sample_rate=48000, channels=2)
+    return lambda: main.load_waveform(path)
+
+
+@benchmark(f'audio.resample[{CLIP_SECONDS}s,48k->16k]')
+def bench_resample():
+    main = _load_main()
+    waveform, sample_rate = main.torchaudio.load(synthetic_wav(CLIP_SECONDS, sample_rate=48000))
+    return lambda: main.resample_waveform(waveform, sample_rate, 16000)
+
+
+@benchmark(f'audio.noise_reduction[{CLIP_SECONDS}s]')
+def bench_noise_reduction():
+    main = _load_main()
+    waveform, sample_rate = main.torchaudio.load(synthetic_wav(CLIP_SECONDS))
+    return lambda: main.remove_noise_and_normalize(waveform, sample_rate)
+
+
+@benchmark(f'audio.asr_forward[{CLIP_SECONDS}s]', repeat=3)
+def bench_asr_forward():
+    main = _load_main()
+    waveform, sample_rate = main.torchaudio.load(synthetic_wav(CLIP_SECONDS))
+    inputs = main.processor_asr(waveform.squeeze(0), sampling_rate=sample_rate, return_tensors="pt")
+    return lambda: main.run_asr_model(inputs.input_values)
+
+
+@benchmark(f'audio.process_audio[{CLIP_SECONDS}s,48k]', repeat=3)
+def bench_process_audio():
+    main = _load_main()
+    source = synthetic_wav(CLIP_SECONDS, sample_rate=48000)
+
+    def run():
+        # process_audio apaga o arquivo ao final
+        path = source + '.run.wav'
+        shutil.copyfile(source, path)
+        main.process_audio(path)
+    return run
+
+
+###############################################################################
+# Pré-processamento: buffer único x cópias do pipeline antigo
+###############################################################################
+def _load_preprocess():
+    try:
+        return importlib.import_module('AudioPreprocess')
+    except ImportError as e:
+        raise SkipBenchmark(f'noisereduce indisponível ({e.name})')
+
+
+def reference_preprocess(data, sample_rate=16000):
+    """As cópias de load_waveform + remove_noise_and_normalize + processor_asr antes do AudioPreprocess."""
+    import noisereduce as nr
+    samples = AudioInput.pcm16_samples(data)                                  # torchaudio.load
+    reduced = nr.reduce_noise(y=samples, sr=sample_rate, prop_decrease=0.8)
+    wf_clean = np.array(reduced, dtype=np.float32)                            # torch.tensor(reduced)
+    rms = np.sqrt(np.mean(wf_clean ** 2))
+    if rms > 0:
+        wf_clean = wf_clean / rms
+    normed = (wf_clean - wf_clean.mean()) / np.sqrt(wf_clean.var() + 1e-7)    # zero_mean_unit_var_norm
+    return np.array(normed, dtype=np.float32)                                 # convert_to_tensors
+
+
+def new_preprocess(data, sample_rate=16000):
+    preprocess = _load_preprocess()
+    samples = AudioInput.pcm16_samples(data, preprocess.scratch().take)
+    reduced = preprocess.denoise_and_normalize(samples, sample_rate)
+    return preprocess.zero_mean_unit_var_(reduced)
+
+
+def _clip_bytes():
+    with open(synthetic_wav(CLIP_SECONDS), 'rb') as f:
+        return f.read()
+
+
+def _peak_mb(fn, data):
+    fn(data)  # aquecimento: buffer de rascunho da thread já alocado, como num worker
+    tracemalloc.start()
+    try:
+        fn(data)
+        return round(tracemalloc.get_traced_memory()[1] / 2 ** 20, 2)
+    finally:
+        tracemalloc.stop()
+
+
+@measurement(f'audio.preprocess_peak[{CLIP_SECONDS}s]', unit='MB')
+def measure_preprocess_peak():
+    _load_preprocess()
+    return _peak_mb(new_preprocess, _clip_bytes())
+
+
+@measurement(f'audio.preprocess_peak_reference[{CLIP_SECONDS}s]', unit='MB')
+def measure_preprocess_peak_reference():
+    _load_preprocess()
+    return _peak_mb(reference_preprocess, _clip_bytes())
+
+
+@measurement(f'audio.preprocess_max_abs_diff[{CLIP_SECONDS}s]', unit='abs')
+def measure_preprocess_diff():
+    _load_preprocess()
+    data = _clip_bytes()
+    return float(np.max(np.abs(new_preprocess(data) - reference_preprocess(data))))
+
+
+@benchmark(f'audio.preprocess[{CLIP_SECONDS}s]')
+def bench_preprocess():
+    _load_preprocess()
+    data = _clip_bytes()
+    return lambda: new_preprocess(data)
+
+
+@benchmark(f'audio.preprocess_reference[{CLIP_SECONDS}s]')
+def bench_preprocess_reference():
+    _load_preprocess()
+    data = _clip_bytes()
+    return lambda: reference_preprocess(data)
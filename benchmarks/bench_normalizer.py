@@ -0,0 +1,37 @@
+# benchmarks/bench_normalizer.py
+#
+# TextNormalizer (tabela de translate + uma passada de regex) contra as
+# cadeias sequenciais que ele substituiu: tempo das versões novas e das de
+# referência. As referências e as entradas ficam em TextNormalizerReference;
+# que as saídas são iguais é verificado em test_TextNormalizer.py.
+
+from benchmarks.harness import benchmark
+from TextNormalizerReference import CASES
+
+
+def _register(case):
+    make_inputs, name, reference = CASES[case]
+
+    @benchmark(f'normalizer.{case}[x2000]')
+    def bench_new():
+        import TextNormalizer
+        normalize = getattr(TextNormalizer, name)
+        inputs = make_inputs()[:2000]
+
+        def run():
+            for text in inputs:
+                normalize(text)
+        return run
+
+    @benchmark(f'normalizer.{case}_reference[x2000]')
+    def bench_reference():
+        inputs = make_inputs()[:2000]
+
+        def run():
+            for text in inputs:
+                reference(text)
+        return run
+
+
+for _case in CASES:
+    _register(_case)
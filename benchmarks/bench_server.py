@@ -0,0 +1,51 @@
+# benchmarks/bench_server.py
+#
+# Inicialização a frio (processo novo) e memória residente por processo
+# de cada servidor. O servidor completo só é medido se o torch estiver instalado.
+
+import sys
+import json
+import subprocess
+import importlib.util
+
+from benchmarks.harness import REPO_ROOT, benchmark, measurement, SkipBenchmark
+from benchmarks.bench_startup import measure_startup
+
+SERVERS = ('main_text', 'main')
+
+RSS_PROBE = '''
+import {module}, json
+status = dict(line.split(':', 1) for line in open('/proc/self/status'))
+print(json.dumps({{"rss_kb": int(status["VmRSS"].split()[0]), "hwm_kb": int(status["VmHWM"].split()[0])}}))
+'''
+
+
+def _require(module):
+    if module == 'main' and importlib.util.find_spec('torch') is None:
+        raise SkipBenchmark('torch não instalado')
+
+
+def _rss(module, field):
+    _require(module)
+    out = subprocess.run([sys.executable, '-c', RSS_PROBE.format(module=module)],
+                         cwd=REPO_ROOT, capture_output=True, text=True, check=True)
+    return json.loads(out.stdout.strip().splitlines()[-1])[field] * 1024
+
+
+def _register_server(module):
+    @measurement(f'server.cold_start[{module}]', unit='s')
+    def cold_start():
+        _require(module)
+        return measure_startup(module, runs=3)['wall_s_median']
+
+    @measurement(f'server.rss_after_import[{module}]', unit='bytes')
+    def rss():
+        return _rss(module, 'rss_kb')
+
+    @measurement(f'server.rss_peak_import[{module}]', unit='bytes')
+    def rss_peak():
+        return _rss(module, 'hwm_kb')
+
+
+for _module in SERVERS:
+    _register_server(_module)
@@ -0,0 +1,78 @@
+# benchmarks/bench_startup.py
+#
+# Mede o tempo de inicialização (interpretador + imports + criação do app)
+# do servidor só-texto e confere que nenhum módulo da pilha de ML foi importado.
+#
+#   python benchmarks/bench_startup.py [--module main_text] [--runs 5]
+
+import os
+import sys
+import json
+import time
+import argparse
+import statistics
+import subprocess
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+HEAVY_MODULES = ['torch', 'torchaudio', 'transformers', 'noisereduce', 'webrtcvad', 'ortools', 'epitran', 'pandas']
+
+# Executado num processo novo a cada rodada, para medir o "cold start" real.
+PROBE = '''
+import sys, time, json
+t0 = time.perf_counter()
+import {module}
+t1 = time.perf_counter()
+heavy = [m for m in {heavy!r} if m in sys.modules]
+print(json.dumps({{"import_s": t1 - t0, "heavy_modules": heavy}}))
+'''
+
+
+def measure_startup(module, runs=5):
+    """
+    Roda `import <module>` em `runs` processos novos.
+    Retorna o tempo total (processo) e o tempo só do import, em segundos.
+    """
+    wall_times, import_times = [], []
+    heavy = []
+    code = PROBE.format(module=module, heavy=HEAVY_MODULES)
+    for _ in range(runs):
+        start = time.perf_counter()
+        out = subprocess.run(
+            [sys.executable, '-c', code],
+            cwd=REPO_ROOT, capture_output=True, text=True, check=True
+        )
+        wall_times.append(time.perf_counter() - start)
+        probe = json.loads(out.stdout.strip().splitlines()[-1])
+        import_times.append(probe['import_s'])
+        heavy = probe['heavy_modules']
+    return {
+        'module': module,
+        'runs': runs,
+        'wall_s_median': statistics.median(wall_times),
+        'import_s_median': statistics.median(import_times),
+        'heavy_modules': heavy,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Tempo de inicialização do servidor só-texto')
+    parser.add_argument('--module', default='main_text')
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--budget', type=float, default=1.0,
+                        help='tempo máximo aceitável de inicialização (s)')
+    args = parser.parse_args()
+
+    result = measure_startup(args.module, args.runs)
+    print(json.dumps(result, indent=2))
+
+    if result['heavy_modules']:
+        print(f"FALHA: módulos pesados importados: {result['heavy_modules']}")
+        sys.exit(1)
+    if result['wall_s_median'] > args.budget:
+        print(f"FALHA: inicialização {result['wall_s_median']:.3f}s > {args.budget:.3f}s")
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
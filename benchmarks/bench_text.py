@@ -0,0 +1,97 @@
+# benchmarks/bench_text.py
+#
+# Pipeline de texto: transliteração/conversão (/pronounce), dicas (/hints),
+# similaridade fonética entre palavras e a pontuação completa de uma
+# transcrição (sem o ASR).
+
+from benchmarks.harness import benchmark
+from benchmarks.synthetic import corpus_sentences, corpus_words, asr_like_transcription
+
+
+@benchmark('text.transliterate_sentence[x50]')
+def bench_transliterate():
+    from TextPipeline import transliterate_and_convert_sentence
+    sentences = corpus_sentences(limit=50)
+
+    def run():
+        for sentence in sentences:
+            transliterate_and_convert_sentence(sentence)
+    return run
+
+
+@benchmark('text.context_rules[x500]')
+def bench_context_rules():
+    from SpecialRoules import FRENCH_CONTEXT_RULES
+    from TextPipeline import handle_apostrophes
+    sentences = [handle_apostrophes(s.split()) for s in corpus_sentences(limit=500)]
+
+    def run():
+        for words in sentences:
+            FRENCH_CONTEXT_RULES.apply(words)
+    return run
+
+
+@benchmark('text.pronunciation_hints[x200]')
+def bench_hints():
+    from getPronunciation import get_pronunciation_hints
+    words = corpus_words(limit=200)
+
+    def run():
+        for word in words:
+            get_pronunciation_hints(word)
+    return run
+
+
+@benchmark('text.hybrid_similarity[x1000]')
+def bench_hybrid_similarity():
+    import random
+    from WordMetrics import hybrid_similarity
+    from TextPipeline import transliterate_and_convert_sentence
+    words = corpus_words(limit=200)
+    pronunciations = [transliterate_and_convert_sentence(word) for word in words]
+    rng = random.Random(0)
+    pairs = [(rng.choice(pronunciations), rng.choice(pronunciations)) for _ in range(1000)]
+
+    def run():
+        for a, b in pairs:
+            hybrid_similarity(a, b)
+    return run
+
+
+@benchmark('text.score_transcription[x20]')
+def bench_score_transcription():
+    from Scoring import score_transcription
+    cases = []
+    for seed, sentence in enumerate(corpus_sentences(limit=20)):
+        transcription = ' '.join(asr_like_transcription(sentence.split(), seed=seed))
+        cases.append((transcription, sentence))
+
+    def run():
+        for transcription, sentence in cases:
+            score_transcription(transcription, sentence)
+    return run
+
+
+@benchmark('text.pronounce_full_keystroke[40w]', repeat=20)
+def bench_pronounce_full():
+    from TextPipeline import transliterate_and_convert_sentence
+    text = ' '.join(corpus_words(limit=40))
+    return lambda: transliterate_and_convert_sentence(text + 's')
+
+
+@benchmark('text.pronounce_incremental_keystroke[40w]', repeat=20)
+def bench_pronounce_incremental():
+    from IncrementalPronunciation import SessionStore
+    store = SessionStore()
+    session_id, _session = store.create(' '.join(corpus_words(limit=40)))
+    state = {'version': 0}
+
+    def run():
+        # Digita e apaga um caractere no meio da frase
+        session = store.get(session_id)
+        middle = len(session.text) // 2
+        state['version'], _ = store.edit(session_id, state['version'], [
+            {'pos': middle, 'delete': 0, 'insert': 'x'},
+            {'pos': middle, 'delete': 1, 'insert': ''},
+        ])
+    return run
@@ -0,0 +1,143 @@
+# benchmarks/harness.py
+#
+# Registro de benchmarks, medição e comparação com um resultado anterior.
+#
+# Um benchmark é uma função decorada com @benchmark que recebe nada e retorna
+# a função a ser medida (o preparo fica fora da medição). Se ela levantar
+# SkipBenchmark (ex.: torch não instalado), o resultado é marcado como 'skipped'.
+# Benchmarks de memória usam @measurement e retornam o valor já medido.
+
+import os
+import sys
+import json
+import time
+import platform
+import statistics
+import subprocess
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+_benchmarks = []
+
+
+class SkipBenchmark(Exception):
+    """Dependência ausente ou dados indisponíveis para o benchmark."""
+
+
+def benchmark(name, repeat=5, number=1):
+    """Registra uma função de preparo; a função retornada é medida `repeat` x `number` vezes."""
+    def decorator(setup):
+        _benchmarks.append({'name': name, 'setup': setup, 'repeat': repeat,
+                            'number': number, 'kind': 'time'})
+        return setup
+    return decorator
+
+
+def measurement(name, unit):
+    """Registra uma função que mede algo diretamente (ex.: RSS) e retorna o valor."""
+    def decorator(fn):
+        _benchmarks.append({'name': name, 'setup': fn, 'unit': unit, 'kind': 'value'})
+        return fn
+    return decorator
+
+
+def registered():
+    return list(_benchmarks)
+
+
+def run_benchmark(entry):
+    try:
+        if entry['kind'] == 'value':
+            value = entry['setup']()
+            return {'median': value, 'min': value, 'max': value, 'runs': 1, 'unit': entry['unit']}
+
+        fn = entry['setup']()
+        fn()  # aquecimento (imports preguiçosos, caches, JIT do torch)
+        times = []
+        for _ in range(entry['repeat']):
+            start = time.perf_counter()
+            for _ in range(entry['number']):
+                fn()
+            times.append((time.perf_counter() - start) / entry['number'])
+        times.sort()
+        return {
+            'median': statistics.median(times),
+            'min': times[0],
+            'max': times[-1],
+            'runs': entry['repeat'] * entry['number'],
+            'unit': 's',
+        }
+    except SkipBenchmark as e:
+        return {'skipped': str(e)}
+
+
+def run_all(pattern=None, log=print):
+    results = {}
+    for entry in registered():
+        if pattern and pattern not in entry['name']:
+            continue
+        result = run_benchmark(entry)
+        results[entry['name']] = result
+        if 'skipped' in result:
+            log(f"{entry['name']:<55} skipped: {result['skipped']}")
+        else:
+            log(f"{entry['name']:<55} {_format_value(result['median'], result['unit'])}")
+    return results
+
+
+def metadata():
+    try:
+        rev = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=REPO_ROOT,
+                             capture_output=True, text=True).stdout.strip()
+    except OSError:
+        rev = ''
+    return {
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'git_rev': rev,
+        'python': sys.version.split()[0],
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+    }
+
+
+def save_results(path, results):
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump({'meta': metadata(), 'results': results}, f, indent=2)
+
+
+def load_results(path):
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)['results']
+
+
+def compare(baseline, current, tolerance):
+    """
+    Compara as medianas. Retorna lista de (nome, antes, depois, razão,
+    regrediu, unidade). Regressão = depois > antes * (1 + tolerance); vale
+    para tempo e memória. Com linha de base 0, 0 -> 0 é razão 1 e qualquer
+    valor acima de 0 é regressão (razão infinita).
+    """
+    rows = []
+    for name, result in current.items():
+        before = baseline.get(name)
+        if not before or 'skipped' in result or 'skipped' in before:
+            continue
+        if before['median']:
+            ratio = result['median'] / before['median']
+        else:
+            ratio = float('inf') if result['median'] > 0 else 1.0
+        rows.append((name, before['median'], result['median'], ratio,
+                     ratio > 1 + tolerance, result['unit']))
+    return rows
+
+
+def _format_value(value, unit):
+    if unit == 's':
+        if value < 1e-3:
+            return f'{value * 1e6:10.1f} us'
+        if value < 1:
+            return f'{value * 1e3:10.2f} ms'
+        return f'{value:10.3f} s'
+    if unit == 'bytes':
+        return f'{value / 2 ** 20:10.1f} MiB'
+    return f'{value:10.3f} {unit}'
@@ -0,0 +1,299 @@
+# benchmarks/loadgen.py
+#
+# Gerador de carga em malha fechada: cada usuário virtual repete a sessão
+#
+#     /get_sentence -> /pronounce -> /hints -> /upload (clipe local) -> /speak
+#
+# sem pausa (ou com --think s) até acabar o tempo. Relata vazão e p50/p95/p99
+# por endpoint para cada nível de concorrência e o ponto de saturação.
+# Nada vai para a rede: o áudio é sintético (ou de --audio-dir) e, em modo
+# local, /speak usa TTS_ENGINE=synthetic.
+#
+# Alvos:
+#   --app main | main_text   app Flask no mesmo processo (test client; padrão)
+#   --url http://host:porta  servidor já rodando (inicie-o com TTS_ENGINE=synthetic
+#                            e ASR_WORKERS=N para variar os workers)
+#
+#   python -m benchmarks.loadgen --users 1,2,4,8 --duration 30
+#   python -m benchmarks.loadgen --app main --users 2,4,8 --asr-workers 1,2,4
+#   python -m benchmarks.loadgen --url http://127.0.0.1:3000 --users 4 --out load.json
+#
+# Com --app main_text não há /upload nem /speak; as sessões param em /hints.
+
+import io
+import os
+import sys
+import json
+import time
+import uuid
+import pickle
+import random
+import argparse
+import threading
+import importlib
+import importlib.util
+import urllib.error
+import urllib.parse
+import urllib.request
+from collections import defaultdict
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+os.chdir(REPO_ROOT)
+if REPO_ROOT not in sys.path:
+    sys.path.insert(0, REPO_ROOT)
+# Antes de importar o app: /speak offline
+os.environ.setdefault('TTS_ENGINE', 'synthetic')
+
+from benchmarks.synthetic import synthetic_wav  # noqa: E402
+
+# Ganho mínimo de vazão ao dobrar os usuários para não considerar saturado
+SATURATION_GAIN = 0.10
+
+
+class InProcessClient:
+    """Test client do Flask; um por thread."""
+
+    def __init__(self, app):
+        self.client = app.test_client()
+        self.routes = {rule.rule for rule in app.url_map.iter_rules()}
+
+    def post(self, path, form, files=None):
+        data = dict(form)
+        for name, (filename, content) in (files or {}).items():
+            data[name] = (io.BytesIO(content), filename)
+        response = self.client.post(path, data=data)
+        return response.status_code, response.get_data()
+
+
+class HttpClient:
+    """urllib puro (multipart montado à mão) para não depender de requests."""
+
+    def __init__(self, base_url, timeout=180):
+        self.base_url = base_url.rstrip('/')
+        self.timeout = timeout
+        self.routes = {'/get_sentence', '/pronounce', '/hints', '/upload', '/speak'}
+
+    def post(self, path, form, files=None):
+        if files:
+            body, content_type = _multipart(form, files)
+        else:
+            body = urllib.parse.urlencode(form).encode('utf-8')
+            content_type = 'application/x-www-form-urlencoded'
+        req = urllib.request.Request(self.base_url + path, data=body,
+                                     headers={'Content-Type': content_type})
+        try:
+            with urllib.request.urlopen(req, timeout=self.timeout) as response:
+                return response.status, response.read()
+        except urllib.error.HTTPError as e:
+            return e.code, e.read()
+        except (urllib.error.URLError, OSError):
+            return 0, b''
+
+
+def _multipart(form, files):
+    boundary = uuid.uuid4().hex
+    parts = []
+    for name, value in form.items():
+        parts.append(f'--{boundary}\r\nContent-Disposition: form-data; name="{name}"\r\n\r\n{value}\r\n'
+                     .encode('utf-8'))
+    for name, (filename, content) in files.items():
+        parts.append(f'--{boundary}\r\nContent-Disposition: form-data; name="{name}"; '
+                     f'filename="{filename}"\r\nContent-Type: audio/wav\r\n\r\n'.encode('utf-8')
+                     + content + b'\r\n')
+    parts.append(f'--{boundary}--\r\n'.encode('utf-8'))
+    return b''.join(parts), f'multipart/form-data; boundary={boundary}'
+
+
+class Recorder:
+    def __init__(self):
+        self.latencies = defaultdict(list)
+        self.statuses = defaultdict(lambda: defaultdict(int))
+        self.sessions = 0
+        self._lock = threading.Lock()
+
+    def record(self, endpoint, seconds, status):
+        with self._lock:
+            self.latencies[endpoint].append(seconds)
+            self.statuses[endpoint][status] += 1
+
+    def session_done(self):
+        with self._lock:
+            self.sessions += 1
+
+
+def run_session(client, rng, clips, categories, recorder, think):
+    def call(endpoint, form, files=None):
+        start = time.perf_counter()
+        status, body = client.post(endpoint, form, files)
+        recorder.record(endpoint, time.perf_counter() - start, status)
+        if think:
+            time.sleep(think)
+        return status, body
+
+    status, body = call('/get_sentence', {'category': rng.choice(categories)})
+    sentence = json.loads(body).get('fr_sentence') if status == 200 else None
+    if not sentence:
+        return
+    call('/pronounce', {'text': sentence})
+    call('/hints', {'text': sentence})
+    if '/upload' in client.routes:
+        filename, content = rng.choice(clips)
+        call('/upload', {'text': sentence, 'category': 'load'}, {'audio': (filename, content)})
+    if '/speak' in client.routes:
+        call('/speak', {'text': sentence})
+    recorder.session_done()
+
+
+def run_level(make_client, users, duration, clips, categories, think, seed=0):
+    """Roda `users` sessões concorrentes por `duration` s; retorna o relatório do nível."""
+    recorder = Recorder()
+    deadline = time.monotonic() + duration
+
+    def user(idx):
+        client = make_client()
+        rng = random.Random(seed * 1000 + idx)
+        while time.monotonic() < deadline:
+            run_session(client, rng, clips, categories, recorder, think)
+
+    threads = [threading.Thread(target=user, args=(i,), daemon=True) for i in range(users)]
+    start = time.monotonic()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.monotonic() - start
+
+    endpoints = {}
+    for endpoint, values in recorder.latencies.items():
+        values.sort()
+        statuses = dict(recorder.statuses[endpoint])
+        endpoints[endpoint] = {
+            'requests': len(values),
+            'throughput_rps': round(len(values) / elapsed, 3),
+            'p50_ms': round(_percentile(values, 0.50) * 1000, 2),
+            'p95_ms': round(_percentile(values, 0.95) * 1000, 2),
+            'p99_ms': round(_percentile(values, 0.99) * 1000, 2),
+            'errors': sum(n for code, n in statuses.items() if code != 200),
+            'statuses': {str(code): n for code, n in sorted(statuses.items())},
+        }
+    return {
+        'users': users,
+        'elapsed_s': round(elapsed, 2),
+        'sessions': recorder.sessions,
+        'sessions_per_s': round(recorder.sessions / elapsed, 3),
+        'endpoints': endpoints,
+    }
+
+
+def saturation_point(levels):
+    """
+    Primeiro nível de usuários a partir do qual mais concorrência não aumenta
+    a vazão de sessões em pelo menos SATURATION_GAIN. None se não saturou.
+    """
+    for previous, current in zip(levels, levels[1:]):
+        if previous['sessions_per_s'] == 0:
+            continue
+        gain = current['sessions_per_s'] / previous['sessions_per_s'] - 1
+        if gain < SATURATION_GAIN:
+            return previous['users']
+    return None
+
+
+def load_clips(audio_dir, count, seconds):
+    """Clipes de --audio-dir (.wav) ou `count` clipes sintéticos de `seconds` s."""
+    clips = []
+    if audio_dir:
+        for name in sorted(os.listdir(audio_dir)):
+            if name.lower().endswith('.wav'):
+                with open(os.path.join(audio_dir, name), 'rb') as f:
+                    clips.append((name, f.read()))
+    if not clips:
+        for seed in range(count):
+            path = synthetic_wav(seconds, seed=seed)
+            with open(path, 'rb') as f:
+                clips.append((f'synthetic-{seed}.wav', f.read()))
+            os.remove(path)
+    return clips
+
+
+def _percentile(sorted_values, q):
+    if not sorted_values:
+        return 0.0
+    idx = min(len(sorted_values) - 1, int(round(q * (len(sorted_values) - 1))))
+    return sorted_values[idx]
+
+
+def _print_level(level):
+    print(f"\nusuários={level['users']}  sessões={level['sessions']}  "
+          f"{level['sessions_per_s']:.2f} sessões/s")
+    print(f"  {'endpoint':<14}{'req':>7}{'req/s':>9}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'erros':>7}")
+    for endpoint, e in level['endpoints'].items():
+        print(f"  {endpoint:<14}{e['requests']:>7}{e['throughput_rps']:>9.2f}"
+              f"{e['p50_ms']:>10.1f}{e['p95_ms']:>10.1f}{e['p99_ms']:>10.1f}{e['errors']:>7}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Gerador de carga em malha fechada')
+    target = parser.add_mutually_exclusive_group()
+    target.add_argument('--app', help='módulo do app Flask no mesmo processo (main ou main_text)')
+    target.add_argument('--url', help='URL base de um servidor já rodando')
+    parser.add_argument('--users', default='1,2,4,8', help='níveis de concorrência, ex.: 1,2,4,8')
+    parser.add_argument('--asr-workers', default='',
+                        help='workers do ASR a testar (só com --app main), ex.: 1,2,4')
+    parser.add_argument('--duration', type=float, default=20.0, help='segundos por nível')
+    parser.add_argument('--think', type=float, default=0.0, help='pausa entre requisições (s)')
+    parser.add_argument('--audio-dir', help='pasta com .wav locais para /upload')
+    parser.add_argument('--clip-seconds', type=float, default=3.0, help='duração dos clipes sintéticos')
+    parser.add_argument('--out', help='grava o relatório em JSON')
+    args = parser.parse_args()
+
+    users_levels = [int(u) for u in args.users.split(',') if u]
+    clips = load_clips(args.audio_dir, count=4, seconds=args.clip_seconds)
+    with open(os.path.join(REPO_ROOT, 'frases_categorias.pickle'), 'rb') as f:
+        categories = sorted(pickle.load(f))
+
+    if args.url:
+        make_client = lambda: HttpClient(args.url)  # noqa: E731
+        app_module = None
+    else:
+        module_name = args.app
+        if module_name is None:
+            module_name = 'main' if importlib.util.find_spec('torch') else 'main_text'
+        app_module = importlib.import_module(module_name)
+        make_client = lambda: InProcessClient(app_module.app)  # noqa: E731
+
+    worker_levels = [int(w) for w in args.asr_workers.split(',') if w]
+    if worker_levels and not hasattr(app_module, 'asr_scheduler'):
+        parser.error('--asr-workers exige --app main')
+
+    # Aquecimento fora da medição: Epitran, pickles e caches carregam no primeiro pedido
+    run_session(make_client(), random.Random(-1), clips, categories, Recorder(), 0)
+
+    report = {'target': args.url or app_module.__name__, 'duration_s': args.duration, 'runs': []}
+    for workers in worker_levels or [None]:
+        if workers is not None:
+            # As rotas leem o escalonador global a cada requisição
+            from AsrScheduler import AsrScheduler
+            app_module.asr_scheduler = AsrScheduler(workers=workers,
+                                                    max_queued_seconds=app_module.ASR_MAX_QUEUED_SECONDS)
+            print(f"\n=== ASR workers: {workers} ===")
+        levels = []
+        for users in users_levels:
+            level = run_level(make_client, users, args.duration, clips, categories, args.think)
+            _print_level(level)
+            levels.append(level)
+        saturated = saturation_point(levels)
+        if saturated:
+            print(f"\nPonto de saturação: {saturated} usuário(s)")
+        else:
+            print("\nPonto de saturação: não atingido")
+        report['runs'].append({'asr_workers': workers, 'levels': levels, 'saturation_users': saturated})
+
+    if args.out:
+        with open(args.out, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+        print(f"Relatório gravado em {args.out}")
+
+
+if __name__ == '__main__':
+    main()
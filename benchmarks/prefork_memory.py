@@ -0,0 +1,178 @@
+# benchmarks/prefork_memory.py
+#
+# Memória compartilhada x privada por worker no modo pre-fork
+# (gunicorn.conf.py) ao longo de um período de carga.
+#
+# Sobe `gunicorn -c gunicorn.conf.py main_text:app`, roda sessões de
+# benchmarks.loadgen contra ele (/get_sentence -> /pronounce -> /hints) e, a
+# cada --interval s, lê /proc/<pid>/smaps_rollup do mestre e de cada worker:
+#   shared  = Shared_Clean + Shared_Dirty  (páginas ainda herdadas do mestre)
+#   private = Private_Clean + Private_Dirty (páginas que o worker copiou/criou)
+#   pss     = rateio proporcional (soma dos PSS = memória real do grupo)
+#
+#   python -m benchmarks.prefork_memory --workers 4 --duration 3600 --out prefork.json
+#   python -m benchmarks.prefork_memory --no-freeze ...   # comparação sem gc.freeze()
+#
+# Só Linux (smaps_rollup, kernel >= 4.14).
+
+import os
+import sys
+import json
+import time
+import pickle
+import argparse
+import threading
+import subprocess
+import urllib.request
+
+from benchmarks.loadgen import REPO_ROOT, HttpClient, run_level
+
+SMAPS_FIELDS = ('Rss', 'Pss', 'Shared_Clean', 'Shared_Dirty', 'Private_Clean', 'Private_Dirty')
+TEXT_ROUTES = {'/get_sentence', '/pronounce', '/hints'}
+
+
+def smaps_rollup(pid):
+    """Campos de /proc/<pid>/smaps_rollup, em bytes, mais shared/private."""
+    values = {}
+    with open(f'/proc/{pid}/smaps_rollup') as f:
+        for line in f:
+            name, _, rest = line.partition(':')
+            if name in SMAPS_FIELDS:
+                values[name] = int(rest.split()[0]) * 1024
+    return {
+        'rss': values['Rss'],
+        'pss': values['Pss'],
+        'shared': values['Shared_Clean'] + values['Shared_Dirty'],
+        'private': values['Private_Clean'] + values['Private_Dirty'],
+    }
+
+
+def children(pid):
+    """PIDs dos filhos diretos de `pid` (workers do gunicorn)."""
+    found = []
+    for entry in os.listdir('/proc'):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f'/proc/{entry}/stat') as f:
+                # O nome do processo (2º campo) pode ter espaços: o ppid vem depois do ')'
+                ppid = int(f.read().rsplit(')', 1)[1].split()[1])
+        except (OSError, IndexError, ValueError):
+            continue
+        if ppid == pid:
+            found.append(int(entry))
+    return sorted(found)
+
+
+def sample(master_pid, elapsed):
+    workers = []
+    for pid in children(master_pid):
+        try:
+            workers.append({'pid': pid, **smaps_rollup(pid)})
+        except OSError:
+            continue  # worker reciclado entre a listagem e a leitura
+    return {'t_s': round(elapsed, 1), 'master': smaps_rollup(master_pid), 'workers': workers}
+
+
+def wait_ready(url, timeout):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            urllib.request.urlopen(url + '/metrics', timeout=2).read()
+            return
+        except OSError:
+            time.sleep(0.5)
+    raise RuntimeError(f"servidor não respondeu em {timeout} s")
+
+
+def _mean(values):
+    return sum(values) / len(values) if values else 0
+
+
+def summarize(samples):
+    """Média por worker no primeiro e no último ponto, e o PSS total do grupo."""
+    def point(s):
+        w = s['workers']
+        return {
+            't_s': s['t_s'],
+            'workers': len(w),
+            'shared_mb': round(_mean([x['shared'] for x in w]) / 2 ** 20, 1),
+            'private_mb': round(_mean([x['private'] for x in w]) / 2 ** 20, 1),
+            'group_pss_mb': round((s['master']['pss'] + sum(x['pss'] for x in w)) / 2 ** 20, 1),
+        }
+    first, last = point(samples[0]), point(samples[-1])
+    return {'first': first, 'last': last,
+            'private_growth_mb': round(last['private_mb'] - first['private_mb'], 1)}
+
+
+def _print_sample(s):
+    w = s['workers']
+    print(f"t={s['t_s']:>7.0f}s  workers={len(w)}  "
+          f"shared/worker={_mean([x['shared'] for x in w]) / 2 ** 20:7.1f} MB  "
+          f"private/worker={_mean([x['private'] for x in w]) / 2 ** 20:7.1f} MB  "
+          f"mestre rss={s['master']['rss'] / 2 ** 20:7.1f} MB", flush=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Memória compartilhada x privada no modo pre-fork')
+    parser.add_argument('--app', default='main_text:app')
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--port', type=int, default=3101)
+    parser.add_argument('--duration', type=float, default=3600.0, help='segundos de carga')
+    parser.add_argument('--interval', type=float, default=60.0, help='segundos entre amostras')
+    parser.add_argument('--users', type=int, default=8, help='sessões concorrentes')
+    parser.add_argument('--no-freeze', action='store_true', help='PREFORK_GC_FREEZE=0')
+    parser.add_argument('--no-warm-corpus', action='store_true', help='PREFORK_WARM_CORPUS=0')
+    parser.add_argument('--out', help='grava amostras e resumo em JSON')
+    args = parser.parse_args()
+
+    env = dict(os.environ,
+               WEB_CONCURRENCY=str(args.workers),
+               GUNICORN_BIND=f'127.0.0.1:{args.port}',
+               PREFORK_GC_FREEZE='0' if args.no_freeze else '1',
+               PREFORK_WARM_CORPUS='0' if args.no_warm_corpus else '1')
+    url = f'http://127.0.0.1:{args.port}'
+    server = subprocess.Popen([sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py', args.app],
+                              cwd=REPO_ROOT, env=env)
+    try:
+        wait_ready(url, timeout=300)
+        with open(os.path.join(REPO_ROOT, 'frases_categorias.pickle'), 'rb') as f:
+            categories = sorted(pickle.load(f))
+
+        def make_client():
+            client = HttpClient(url)
+            client.routes = TEXT_ROUTES
+            return client
+
+        load = {}
+        loader = threading.Thread(target=lambda: load.update(
+            run_level(make_client, args.users, args.duration, [], categories, 0)), daemon=True)
+        start = time.monotonic()
+        loader.start()
+        samples = [sample(server.pid, 0.0)]
+        _print_sample(samples[-1])
+        while loader.is_alive():
+            loader.join(args.interval)
+            samples.append(sample(server.pid, time.monotonic() - start))
+            _print_sample(samples[-1])
+    finally:
+        server.terminate()
+        server.wait(timeout=30)
+
+    report = {
+        'app': args.app,
+        'workers': args.workers,
+        'gc_freeze': not args.no_freeze,
+        'warm_corpus': not args.no_warm_corpus,
+        'summary': summarize(samples),
+        'load': load,
+        'samples': samples,
+    }
+    print(json.dumps(report['summary'], indent=2))
+    if args.out:
+        with open(args.out, 'w') as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
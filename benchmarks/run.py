@@ -0,0 +1,64 @@
+# benchmarks/run.py
+#
+# Roda a suíte de benchmarks dos caminhos quentes e opcionalmente compara com
+# um resultado anterior, falhando (código 1) se algo regrediu além da tolerância.
+#
+#   python -m benchmarks.run                              # tudo
+#   python -m benchmarks.run -k alignment                 # só nomes contendo "alignment"
+#   python -m benchmarks.run --out baseline.json
+#   python -m benchmarks.run --compare baseline.json --tolerance 0.15
+#
+# Grupos: text.* (transliteração, dicas, pontuação), alignment.* (matriz e
+# motores em 5/10/20/40 palavras), audio.* (etapas do process_audio, exige
+# torch e o modelo), server.* (cold start e RSS por processo).
+# Compare sempre resultados da mesma máquina.
+
+import os
+import sys
+import argparse
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# Os módulos do app leem dic.json, pickles etc. por caminho relativo
+os.chdir(REPO_ROOT)
+if REPO_ROOT not in sys.path:
+    sys.path.insert(0, REPO_ROOT)
+
+from benchmarks import harness
+from benchmarks import bench_text, bench_normalizer, bench_alignment, bench_audio, bench_server  # noqa: F401 (registro)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmarks dos caminhos quentes')
+    parser.add_argument('-k', dest='pattern', help='roda só benchmarks cujo nome contém o texto')
+    parser.add_argument('--out', help='grava os resultados em JSON')
+    parser.add_argument('--compare', metavar='BASELINE', help='JSON de um resultado anterior')
+    parser.add_argument('--tolerance', type=float, default=0.15,
+                        help='piora relativa aceitável na mediana (padrão: 0.15 = 15%%)')
+    parser.add_argument('--list', action='store_true', help='lista os benchmarks e sai')
+    args = parser.parse_args()
+
+    if args.list:
+        for entry in harness.registered():
+            print(entry['name'])
+        return
+
+    results = harness.run_all(args.pattern)
+    if args.out:
+        harness.save_results(args.out, results)
+        print(f"Resultados gravados em {args.out}")
+
+    if args.compare:
+        rows = harness.compare(harness.load_results(args.compare), results, args.tolerance)
+        regressions = [row for row in rows if row[4]]
+        print(f"\nComparação com {args.compare} (tolerância {args.tolerance:.0%}):")
+        for name, before, after, ratio, regressed, unit in rows:
+            flag = 'REGRESSÃO' if regressed else ''
+            print(f"{name:<55} {harness._format_value(before, unit)} -> "
+                  f"{harness._format_value(after, unit)}  x{ratio:.2f} {flag}")
+        if regressions:
+            print(f"FALHA: {len(regressions)} benchmark(s) regrediram")
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,117 @@
+# benchmarks/synthetic.py
+#
+# Dados dos benchmarks, gerados localmente (sem rede):
+#   - frases do corpus (frases_categorias.pickle, que não depende do pandas)
+#   - áudio sintético: vogais com formantes + ruído, gravado como WAV PCM16
+
+import os
+import math
+import wave
+import pickle
+import random
+import struct
+import tempfile
+
+from benchmarks.harness import REPO_ROOT
+
+
+def corpus_sentences(limit=None, seed=0):
+    """Frases de todas as categorias, em ordem estável."""
+    with open(os.path.join(REPO_ROOT, 'frases_categorias.pickle'), 'rb') as f:
+        categorized = pickle.load(f)
+    sentences = [s for category in sorted(categorized) for s in categorized[category]]
+    if limit is not None:
+        random.Random(seed).shuffle(sentences)
+        sentences = sentences[:limit]
+    return sentences
+
+
+def corpus_words(limit=None, seed=0):
+    words = []
+    for sentence in corpus_sentences():
+        words.extend(sentence.split())
+    if limit is not None:
+        random.Random(seed).shuffle(words)
+        words = words[:limit]
+    return words
+
+
+def synthetic_speech(seconds, sample_rate=16000, seed=0):
+    """
+    Sinal parecido com fala: sequência de "sílabas" de 150-300 ms com
+    frequência fundamental e dois formantes, envelope e ruído de fundo.
+    Retorna lista de floats em [-1, 1].
+    """
+    rng = random.Random(seed)
+    total = int(seconds * sample_rate)
+    samples = []
+    while len(samples) < total:
+        length = int(rng.uniform(0.15, 0.3) * sample_rate)
+        f0 = rng.uniform(100, 220)
+        f1 = rng.uniform(300, 900)
+        f2 = rng.uniform(900, 2500)
+        voiced = rng.random() > 0.15
+        for n in range(length):
+            t = n / sample_rate
+            envelope = math.sin(math.pi * n / length)
+            value = 0.0
+            if voiced:
+                value = (0.5 * math.sin(2 * math.pi * f0 * t)
+                         + 0.3 * math.sin(2 * math.pi * f1 * t)
+                         + 0.2 * math.sin(2 * math.pi * f2 * t))
+            samples.append(0.6 * envelope * value + rng.gauss(0, 0.02))
+    return samples[:total]
+
+
+def write_wav(samples, sample_rate=16000, channels=1, path=None):
+    """Grava PCM16; com channels=2 duplica o canal (para medir o downmix)."""
+    if path is None:
+        fd, path = tempfile.mkstemp(suffix='.wav')
+        os.close(fd)
+    frames = bytearray()
+    for value in samples:
+        packed = struct.pack('<h', max(-32768, min(32767, int(value * 32767))))
+        frames += packed * channels
+    with wave.open(path, 'wb') as wav:
+        wav.setnchannels(channels)
+        wav.setsampwidth(2)
+        wav.setframerate(sample_rate)
+        wav.writeframes(bytes(frames))
+    return path
+
+
+def synthetic_wav(seconds, sample_rate=16000, channels=1, seed=0):
+    return write_wav(synthetic_speech(seconds, sample_rate, seed), sample_rate, channels)
+
+
+def asr_like_transcription(words, error_rate=0.15, seed=0):
+    """
+    Simula a saída do ASR para a referência `words`: troca, apaga ou insere
+    palavras com probabilidade `error_rate`.
+    """
+    return asr_like_alignment(words, error_rate, seed)[0]
+
+
+def asr_like_alignment(words, error_rate=0.15, seed=0):
+    """
+    Como asr_like_transcription, mas retorna também o gabarito: para cada
+    palavra de `words`, o índice na saída onde ela ficou intacta (-1 se foi
+    apagada ou trocada).
+    """
+    rng = random.Random(seed)
+    out = []
+    truth = []
+    for word in words:
+        r = rng.random()
+        if r < error_rate / 3:
+            truth.append(-1)
+            continue  # apagada
+        if r < 2 * error_rate / 3:
+            truth.append(-1)
+            out.append(word[:-1] or word)  # erro de pronúncia/transcrição
+            continue
+        truth.append(len(out))
+        out.append(word)
+        if r < error_rate:
+            out.append(rng.choice(words))  # inserção
+    return out, truth
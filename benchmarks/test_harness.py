@@ -0,0 +1,23 @@
+from benchmarks import harness
+
+
+def _results(**medians):
+    return {name: {'median': value, 'unit': 's'} for name, value in medians.items()}
+
+
+def test_compare_flags_regressions_over_tolerance():
+    rows = harness.compare(_results(a=1.0, b=1.0), _results(a=1.05, b=1.5), tolerance=0.1)
+    assert [(name, regressed) for name, _, _, _, regressed, _ in rows] == [('a', False), ('b', True)]
+    assert rows[1][3] == 1.5
+
+
+def test_compare_zero_baseline():
+    rows = harness.compare(_results(a=0, b=0), _results(a=0, b=0.001), tolerance=0.1)
+    assert rows[0][3:5] == (1.0, False)
+    assert rows[1][3:5] == (float('inf'), True)
+
+
+def test_compare_skips_missing_and_skipped():
+    baseline = dict(_results(a=1.0), b={'skipped': 'sem torch'})
+    current = dict(_results(a=1.0, b=1.0, c=1.0))
+    assert [row[0] for row in harness.compare(baseline, current, tolerance=0.1)] == ['a']
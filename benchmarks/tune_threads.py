@@ -0,0 +1,202 @@
+# benchmarks/tune_threads.py
+#
+# Varre combinações de threads do servidor de áudio (CpuTopology) e recomenda
+# a melhor para a máquina. Cada combinação roda num processo novo (as threads
+# inter-op do torch só podem ser definidas uma vez por processo), que importa
+# main com ASR_WORKERS / ASR_INTRA_OP_THREADS / ASR_INTER_OP_THREADS /
+# BLAS_NUM_THREADS no ambiente e mantém `users` pedidos em malha fechada pelo
+# AsrScheduler (redução de ruído + forward do wav2vec2 sobre clipes sintéticos
+# ou de --audio-dir) durante --duration s.
+#
+# Recomendação: maior vazão entre as combinações com p95 até --latency-slack
+# acima do menor p95 medido (a de menor latência e a de maior vazão também
+# são listadas).
+#
+#   python -m benchmarks.tune_threads
+#   python -m benchmarks.tune_threads --workers 1,2,4 --intra 1,2,4,8 --duration 60 --out threads.json
+
+import os
+import sys
+import json
+import time
+import argparse
+import threading
+import subprocess
+
+from benchmarks.harness import REPO_ROOT
+from benchmarks.loadgen import load_clips, _percentile
+
+CHILD_FLAG = '--child'
+
+
+def run_child(users, duration, clip_paths):
+    """No processo filho: carga fechada no AsrScheduler de main; imprime o resultado em JSON."""
+    os.chdir(REPO_ROOT)
+    sys.path.insert(0, REPO_ROOT)
+    import main
+    waveforms = [main.load_waveform(path) for path in clip_paths]
+    seconds = [w.shape[-1] / 16000 for w in waveforms]
+    # Aquecimento: um forward por worker fora da medição
+    for future in [main.asr_scheduler.submit(main.logits_from_waveform, waveforms[0],
+                                             audio_seconds=seconds[0])
+                   for _ in range(main.ASR_WORKERS)]:
+        future.result()
+
+    latencies = []
+    lock = threading.Lock()
+    deadline = time.monotonic() + duration
+
+    def user(idx):
+        i = idx
+        while time.monotonic() < deadline:
+            k = i % len(waveforms)
+            start = time.perf_counter()
+            main.asr_scheduler.submit(main.logits_from_waveform, waveforms[k],
+                                      audio_seconds=seconds[k]).result()
+            with lock:
+                latencies.append(time.perf_counter() - start)
+            i += users
+
+    threads = [threading.Thread(target=user, args=(i,), daemon=True) for i in range(users)]
+    start = time.monotonic()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.monotonic() - start
+    latencies.sort()
+    audio = sum(seconds) / len(seconds) * len(latencies)
+    print(json.dumps({
+        'threads': main.THREAD_CONFIG.as_dict(),
+        'requests': len(latencies),
+        'throughput_rps': round(len(latencies) / elapsed, 3),
+        'audio_seconds_per_s': round(audio / elapsed, 3),
+        'p50_ms': round(_percentile(latencies, 0.50) * 1000, 1),
+        'p95_ms': round(_percentile(latencies, 0.95) * 1000, 1),
+        'p99_ms': round(_percentile(latencies, 0.99) * 1000, 1),
+    }))
+
+
+def measure(workers, intra, inter, blas, users, duration, clip_paths, affinity=None):
+    env = dict(os.environ,
+               ASR_WORKERS=str(workers),
+               ASR_INTRA_OP_THREADS=str(intra),
+               ASR_INTER_OP_THREADS=str(inter),
+               BLAS_NUM_THREADS=str(blas))
+    # Os limites de BLAS vêm de BLAS_NUM_THREADS, não do ambiente de quem chamou
+    for variable in ('OMP_NUM_THREADS', 'MKL_NUM_THREADS', 'OPENBLAS_NUM_THREADS',
+                     'NUMEXPR_NUM_THREADS', 'VECLIB_MAXIMUM_THREADS'):
+        env.pop(variable, None)
+    if affinity:
+        env['ASR_CPU_AFFINITY'] = affinity
+    out = subprocess.run(
+        [sys.executable, '-m', 'benchmarks.tune_threads', CHILD_FLAG,
+         '--users', str(users), '--duration', str(duration), *clip_paths],
+        cwd=REPO_ROOT, env=env, capture_output=True, text=True)
+    if out.returncode != 0:
+        raise RuntimeError(out.stderr.strip().splitlines()[-1] if out.stderr.strip() else 'falhou')
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def recommend(results, latency_slack):
+    """Maior vazão com p95 <= (1 + latency_slack) * menor p95."""
+    best_p95 = min(r['p95_ms'] for r in results)
+    eligible = [r for r in results if r['p95_ms'] <= best_p95 * (1 + latency_slack)]
+    return {
+        'recommended': max(eligible, key=lambda r: r['throughput_rps']),
+        'best_throughput': max(results, key=lambda r: r['throughput_rps']),
+        'best_latency': min(results, key=lambda r: r['p95_ms']),
+    }
+
+
+def _env_line(result):
+    t = result['threads']
+    return (f"ASR_WORKERS={t['workers']} ASR_INTRA_OP_THREADS={t['intra_op_threads']} "
+            f"ASR_INTER_OP_THREADS={t['inter_op_threads']} BLAS_NUM_THREADS={t['blas_threads']}")
+
+
+def _ints(spec):
+    return [int(x) for x in spec.split(',') if x.strip()]
+
+
+def main():
+    if CHILD_FLAG in sys.argv:
+        parser = argparse.ArgumentParser()
+        parser.add_argument(CHILD_FLAG, action='store_true')
+        parser.add_argument('--users', type=int)
+        parser.add_argument('--duration', type=float)
+        parser.add_argument('clips', nargs='+')
+        args = parser.parse_args()
+        run_child(args.users, args.duration, args.clips)
+        return
+
+    cpus = len(os.sched_getaffinity(0)) if hasattr(os, 'sched_getaffinity') else (os.cpu_count() or 1)
+    powers = [n for n in (1, 2, 4, 8, 16, 32, 64) if n <= cpus]
+    parser = argparse.ArgumentParser(description='Autoajuste das threads do ASR')
+    parser.add_argument('--workers', default=','.join(str(n) for n in powers[:3]),
+                        help='valores de ASR_WORKERS')
+    parser.add_argument('--intra', default=','.join(str(n) for n in powers),
+                        help='valores de ASR_INTRA_OP_THREADS')
+    parser.add_argument('--inter', default='1', help='valores de ASR_INTER_OP_THREADS')
+    parser.add_argument('--blas', default='1', help='valores de BLAS_NUM_THREADS')
+    parser.add_argument('--oversubscribe', action='store_true',
+                        help='inclui combinações com workers x intra > CPUs')
+    parser.add_argument('--affinity', help='ASR_CPU_AFFINITY para todas as rodadas, ex.: 0-7')
+    parser.add_argument('--users-per-worker', type=int, default=2, help='pedidos concorrentes por worker')
+    parser.add_argument('--duration', type=float, default=30.0, help='segundos por combinação')
+    parser.add_argument('--clips', type=int, default=4)
+    parser.add_argument('--clip-seconds', type=float, default=5.0)
+    parser.add_argument('--audio-dir', help='pasta com .wav locais')
+    parser.add_argument('--latency-slack', type=float, default=0.2,
+                        help='p95 aceito acima do menor p95 (fração)')
+    parser.add_argument('--out', help='grava os resultados em JSON')
+    args = parser.parse_args()
+
+    clip_dir = os.path.join(REPO_ROOT, '.tune_threads_clips')
+    os.makedirs(clip_dir, exist_ok=True)
+    clip_paths = []
+    for name, content in load_clips(args.audio_dir, args.clips, args.clip_seconds):
+        path = os.path.join(clip_dir, name)
+        with open(path, 'wb') as f:
+            f.write(content)
+        clip_paths.append(path)
+
+    results = []
+    try:
+        for workers in _ints(args.workers):
+            for intra in _ints(args.intra):
+                if workers * intra > cpus and not args.oversubscribe:
+                    continue
+                for inter in _ints(args.inter):
+                    for blas in _ints(args.blas):
+                        users = workers * args.users_per_worker
+                        label = f"workers={workers} intra={intra} inter={inter} blas={blas}"
+                        try:
+                            result = measure(workers, intra, inter, blas, users,
+                                             args.duration, clip_paths, args.affinity)
+                        except RuntimeError as e:
+                            print(f"{label}: erro ({e})", flush=True)
+                            continue
+                        results.append(result)
+                        print(f"{label}: {result['throughput_rps']:.2f} req/s  "
+                              f"p50={result['p50_ms']:.0f} ms  p95={result['p95_ms']:.0f} ms  "
+                              f"p99={result['p99_ms']:.0f} ms", flush=True)
+    finally:
+        for path in clip_paths:
+            os.remove(path)
+        os.rmdir(clip_dir)
+
+    if not results:
+        sys.exit("Nenhuma combinação rodou (torch/transformers instalados?)")
+    picks = recommend(results, args.latency_slack)
+    print(f"\nCPUs disponíveis: {cpus}")
+    for kind in ('recommended', 'best_throughput', 'best_latency'):
+        r = picks[kind]
+        print(f"{kind:<16} {_env_line(r)}  ({r['throughput_rps']:.2f} req/s, p95 {r['p95_ms']:.0f} ms)")
+    if args.out:
+        with open(args.out, 'w') as f:
+            json.dump({'cpus': cpus, 'results': results, **picks}, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
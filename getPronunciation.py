@@ -1,5 +1,5 @@
 import re
-import random
+import zlib
 
 COLOR_LIST = [
     '#FF0000', '#FF6600', '#CC00FF', '#FFCC00', '#0099FF',
@@ -15,6 +15,15 @@ COLOR_LIST = [
 ]
 
 
+def pick_color(word, start_position, matched_text):
+    """
+    Cor do trecho destacado, fixa para a mesma palavra/trecho: a resposta de
+    /hints fica determinística e pode ser cacheada (ETag).
+    """
+    key = f'{word}\0{start_position}\0{matched_text}'.encode('utf-8')
+    return COLOR_LIST[zlib.crc32(key) % len(COLOR_LIST)]
+
+
 def get_pronunciation_hints(word):
     """
     Analisa a palavra em francês e retorna a palavra com trechos destacados
@@ -44,7 +53,7 @@ def get_pronunciation_hints(word):
         start_position = match_object.start()
         end_position = match_object.end()
         matched_text = match_object.group(0)
-        chosen_color = random.choice(COLOR_LIST)
+        chosen_color = pick_color(word, start_position, matched_text)
 
         explanation_formatted = explanation_template.format(
             match=f'<span style="color:{chosen_color}; font-weight:bold">{matched_text}</span>'
@@ -391,7 +400,7 @@ def get_pronunciation_hints(word):
             start_position = match_object.start()
             end_position = match_object.end()
             matched_text = match_object.group(0)
-            chosen_color = random.choice(COLOR_LIST)
+            chosen_color = pick_color(word, match_object.start(), matched_text)
 
             explanation_formatted = explanation_template.format(
                 match=f'<span style="color:{chosen_color}">{matched_text}</span>'
@@ -408,7 +417,7 @@ def get_pronunciation_hints(word):
     match_object_e_consonants = re.search(r'e' + all_consonants + '{2,}', word)
     if match_object_e_consonants:
         matched_text = match_object_e_consonants.group(0)
-        chosen_color = random.choice(COLOR_LIST)
+        chosen_color = pick_color(word, match_object_e_consonants.start(), matched_text)
         explanation_text = (
             f'Quando "e" é seguido de 2 ou mais consoantes '
             f'(<span style="color:{chosen_color}">{matched_text}</span>), '
@@ -426,7 +435,7 @@ def get_pronunciation_hints(word):
     if 'ph' in word:
         for match_object in re.finditer(r'(ph)', word):
             matched_text = match_object.group(0)
-            chosen_color = random.choice(COLOR_LIST)
+            chosen_color = pick_color(word, match_object.start(), matched_text)
             explanation_text = (
                 f'"<span style="color:{chosen_color}">{matched_text}</span>" '
                 'soa como "f". Exemplo: "photo" → "fôto".'
@@ -443,7 +452,7 @@ def get_pronunciation_hints(word):
     if 'th' in word:
         for match_object in re.finditer(r'(th)', word):
             matched_text = match_object.group(0)
-            chosen_color = random.choice(COLOR_LIST)
+            chosen_color = pick_color(word, match_object.start(), matched_text)
             explanation_text = (
                 f'"<span style="color:{chosen_color}">{matched_text}</span>" '
                 'soa como "t".'
@@ -514,7 +523,7 @@ def get_pronunciation_hints(word):
         # Adiciona o pedaço do texto antes do match atual
         result_string += word[previous_end_position:start_position]
 
-        highlight_color = chosen_color or random.choice(COLOR_LIST)
+        highlight_color = chosen_color or pick_color(word, start_position, matched_text)
         # Destaca o trecho correspondente
         result_string += (
             f'<span style="color:{highlight_color}">'
@@ -0,0 +1,58 @@
+# gunicorn.conf.py
+#
+# Modo pre-fork do servidor só-texto:
+#
+#   gunicorn -c gunicorn.conf.py main_text:app
+#
+# O mestre importa o app (preload_app: dic.json, frases_categorias.pickle,
+# tabelas de fonemas e de regras, regexes compiladas), carrega o que seria
+# preguiçoso (data_de_en_fr.pickle, Epitran) e os caches de pronúncia do
+# corpus (TextRoutes.warm_up), e só então cria os workers por fork: esses
+# dados ficam em páginas compartilhadas entre todos eles.
+#
+# Com o GC desligado no mestre até o fork e gc.freeze() logo antes, os objetos
+# carregados vão para a geração permanente: as coletas dos workers não passam
+# por eles nem escrevem nos seus cabeçalhos, o que desfaria o compartilhamento
+# página a página. As contagens de referência ainda escrevem nos objetos que o
+# worker usa; medir com python -m benchmarks.prefork_memory.
+#
+# O servidor de áudio (main.py) não é fork-safe: as threads do escalonador de
+# ASR e dos jobs de pontuação não sobrevivem ao fork. Ele roda num processo só.
+#
+# Variáveis de ambiente:
+#   WEB_CONCURRENCY       número de workers (padrão: 4)
+#   GUNICORN_BIND         endereço (padrão: 0.0.0.0:3001, o mesmo de main_text.py)
+#   PREFORK_WARM_CORPUS   0 para não pré-calcular as pronúncias do corpus
+#   PREFORK_GC_FREEZE     0 para não congelar o heap (comparação de memória)
+
+import gc
+import os
+import threading
+
+bind = os.environ.get('GUNICORN_BIND', '0.0.0.0:3001')
+workers = int(os.environ.get('WEB_CONCURRENCY', '4'))
+preload_app = True
+
+PREFORK_WARM_CORPUS = os.environ.get('PREFORK_WARM_CORPUS', '1') != '0'
+PREFORK_GC_FREEZE = os.environ.get('PREFORK_GC_FREEZE', '1') != '0'
+
+# Sem coletas no mestre durante a carga: objetos liberados deixariam buracos
+# nas páginas que os workers preencheriam depois (cópia na escrita)
+if PREFORK_GC_FREEZE:
+    gc.disable()
+
+
+def when_ready(server):
+    # Roda no mestre depois do preload e antes do primeiro fork
+    import TextRoutes
+    TextRoutes.warm_up(corpus=PREFORK_WARM_CORPUS)
+    if threading.active_count() > 1:
+        server.log.warning("O app pré-carregado iniciou threads; elas não existirão nos workers")
+    if PREFORK_GC_FREEZE:
+        gc.freeze()
+        server.log.info(f"gc.freeze(): {gc.get_freeze_count()} objetos na geração permanente")
+
+
+def post_fork(server, worker):
+    if PREFORK_GC_FREEZE:
+        gc.enable()
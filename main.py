@@ -1,640 +1,87 @@
+import os
 import sys
-from SpecialRoules import handle_est_ce_que, handle_est_pronunciation, handle_plus_pronunciation
-from getPronunciation import get_pronunciation_hints
+# Threads e CPUs antes de carregar torch/NumPy (as bibliotecas de BLAS leem o ambiente ao carregar)
+import CpuTopology
+ASR_WORKERS = int(os.environ.get('ASR_WORKERS', '2'))
+THREAD_CONFIG = CpuTopology.ThreadConfig.from_env(ASR_WORKERS)
+CpuTopology.configure_process(THREAD_CONFIG)
 import torch
 import torchaudio
 sys.setrecursionlimit(10000)
-import unicodedata
 from transformers import Wav2Vec2Processor, Wav2Vec2ForCTC
-from flask import Flask, request, render_template, jsonify, send_file
-import re
-import os
+from flask import Flask, Response, request, render_template, jsonify, send_file, stream_with_context
+import time
 import tempfile
-import pickle
-import random
-import pandas as pd
-from gtts import gTTS
-import epitran
-import noisereduce as nr
-from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import CancelledError, TimeoutError as FuturesTimeout
 import logging
-import json
-# Importar os módulos WordMatching e WordMetrics
-import WordMatching
-import WordMetrics
-import re
-import random
 import webrtcvad
+# Pipeline de texto e rotas só-texto (compartilhados com main_text.py)
+from TextRoutes import text_routes, CONTENT_VERSION as TEXT_CONTENT_VERSION
+# Alinhamento (WordMatching) + métricas (WordMetrics) da tentativa
+from Scoring import score_transcription, DEFAULT_SIMILARITY_THRESHOLD
+from LogitsStore import LogitsStore, AttemptNotFound
+import Metrics
+import Tracing
+import AudioInput
+import AudioPreprocess
+from Profiling import profiled
+from TextToSpeech import get_cache as get_tts_cache, DEFAULT_VOICE, DEFAULT_SPEED
+from SingleFlight import SingleFlight
+from ScoringJobs import (JobStore, ScoringJobQueue, JobQueueFull, sse_event_stream,
+                         JOB_QUEUED, JOB_TRANSCRIBING, JOB_TRANSCRIBED, JOB_DONE, JOB_ERROR,
+                         JOB_CANCELLED, FINAL_STATES)
+from AsrScheduler import AsrScheduler, SchedulerOverloaded
+from AsrModels import ModelRegistry, RoutingPolicy, ASR_MODEL_REQUESTS
+from ReadingMode import voiced_frames, plan_chunks, stitch_transcripts, ChunkedTranscription
+import Cancellation
+from Cancellation import CancelToken, OperationCancelled, DisconnectWatcher, check_cancelled, cancellation_counts
 app = Flask(__name__, template_folder="templates", static_folder="static")
+app.register_blueprint(text_routes)
 
 # Configuração do logger
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
+CpuTopology.configure_torch(torch, THREAD_CONFIG)
 
 # Variáveis globais para modelos
 model_asr, processor_asr = None, None
 
-# Executor para processamento assíncrono
-executor = ThreadPoolExecutor(max_workers=2)
+# Escalonador do ASR: clipes curtos primeiro (SJF com envelhecimento) e
+# limite de segundos na fila; acima do limite respondemos 503 + Retry-After.
+# Threads do torch por worker: CpuTopology (ASR_INTRA_OP_THREADS etc.)
+ASR_MAX_QUEUED_SECONDS = 60.0
+asr_scheduler = AsrScheduler(workers=ASR_WORKERS, max_queued_seconds=ASR_MAX_QUEUED_SECONDS,
+                             initializer=CpuTopology.worker_initializer(torch, THREAD_CONFIG))
 
 # Limite de tempo para mapeamento
 TIME_THRESHOLD_MAPPING = 5.0
 
-# Carregar frases categorizadas e arquivos --------------------------------------------------------------------------------------------------
-
-# Carregar frases aleatórias
-try:
-    with open('data_de_en_fr.pickle', 'rb') as f:
-        random_sentences_df = pickle.load(f)
-    # Verificar se é um DataFrame e converter para lista de dicionários
-    if isinstance(random_sentences_df, pd.DataFrame):
-        random_sentences = random_sentences_df.to_dict(orient='records')
-    else:
-        random_sentences = random_sentences_df
-except Exception as e:
-    logger.error(f"Erro ao carregar data_de_en_fr.pickle: {e}")
-    random_sentences = []
-
-try:
-    with open('frases_categorias.pickle', 'rb') as f:
-        categorized_sentences = pickle.load(f)
-except Exception as e:
-    logger.error(f"Erro ao carregar frases_categorias.pickle: {e}")
-    categorized_sentences = {}
-
-# Carregar o Modelo ASR Wav2Vec2 para Francês
-processor_asr = Wav2Vec2Processor.from_pretrained("jonatasgrosman/wav2vec2-xls-r-1b-french")
-model_asr = Wav2Vec2ForCTC.from_pretrained("jonatasgrosman/wav2vec2-xls-r-1b-french")
-#--------------------------------------------------------------------------------------------------
-# Iniciar o Epitran e funções de tradução --------------------------------------------------------------------------------------------------
-# Inicializar Epitran para Francês
-epi = epitran.Epitran('fra-Latn')
-
-# Carregar o dic.json
-with open('dic.json', 'r', encoding='utf-8') as f:
-    ipa_dictionary = json.load(f)
-
-# Mapeamento de fonemas francês para português com regras contextuais aprimoradas
-# Cada entrada deve ser um dicionário com, no mínimo, a chave 'default'.
-# Se houver contextos adicionais (ex.: 'before_front_vowel', 'word_initial', etc.),
-# mantenha também o 'default' para evitar KeyError.
-
-french_to_portuguese_phonemes = {
-    # VOGAIS ORAIS
-    'i': { 'default': 'i' },
-    'e': { 'default': 'e' },
-    'ɛ': { 'default': 'é' },
-    'a': { 'default': 'a' },
-    'ɑ': { 'default': 'a' },    # se não quiser “á” aberto
-    'ɔ': { 'default': 'ó' },
-    'o': { 'default': 'ô' },
-    'u': { 'default': 'u' },
-    'y': { 'default': 'u' },
-    'ø': { 'default': 'eu' },   # ou 'ô', se preferir "vou" ~ "vô"
-    'œ': { 'default': 'eu' },   # ou 'é'
-    'ə': { 'default': 'e'  },   # TROCA IMPORTANTE: schwa -> “e”
-
-    # VOGAIS NASAIS
-    'ɛ̃': { 'default': 'ẽ' },
-    'ɑ̃': { 'default': 'ã' },
-    'ɔ̃': { 'default': 'õ' },
-    'œ̃': { 'default': 'ũ' },
-    'ð':  { 'default': 'd'  },
-
-    # SEMIVOGAIS
-    'w': { 'default': 'u' },
-    'ɥ': { 'default': 'u', 'after_vowel': 'w' },
-
-    # CONSOANTES
-    'b':  { 'default': 'b' },
-    'd':  { 'default': 'd', 'before_i': 'dj' },
-    'f':  { 'default': 'f' },
-    'g':  { 'default': 'g', 'before_front_vowel': 'j' },
-    'ʒ':  { 'default': 'j' },
-    'k':  { 'default': 'k', 'before_front_vowel': 'qu' },
-    'l':  { 'default': 'l' },
-    'm':  { 'default': 'm' },
-    'n':  { 'default': 'n' },
-    'p':  { 'default': 'p' },
-    # REMOVE o "rr" e "h" aqui:
-    'ʁ':  { 'default': 'r' }, 
-    's':  { 
-        'default': 's',
-        'between_vowels': 'z',
-        'word_final': 's'
-    },
-    't':  { 'default': 't', 'before_i': 'tch' },
-    'v':  { 'default': 'v' },
-    'z':  { 'default': 'z' },
-    'ʃ':  { 'default': 'ch' },
-    'dʒ': { 'default': 'dj' },
-    'tʃ': { 'default': 'tch' },
-    'ɲ':  { 'default': 'nh' },
-    'ŋ':  { 'default': 'ng' },
-    'ç':  { 'default': 's' },
-    'ʎ':  { 'default': 'lh' },
-    'ʔ':  { 'default': '' },
-    'θ':  { 'default': 't' },
-    'ɾ':  { 'default': 'r' },
-    'ʕ':  { 'default': 'r' },
-
-    # FONEMAS COMPOSTOS
-    'sj': { 'default': 'si' },  
-    'ks': { 'default': 'x' },
-    'gz': { 'default': 'gz' },
-    'x':  { 'default': 'x' },
-    'ʃj': { 'default': 'chi' },
-    'ʒʁ':{ 'default': 'jr' },
-
-    # H aspirado ou mudo
-    'h':  {
-        'default': '',
-        'aspirated': 'h',
-        'mute': ''
-    },
-
-    # Consoantes duplas
-    'kk': { 'default': 'c' },
-    'tt': { 'default': 't' },
-    'pp': { 'default': 'p' },
-    'bb': { 'default': 'b' },
-    'gg': { 'default': 'g' },
-
-    # Finais
-    'k$': { 'default': 'c' },
-    'g$': { 'default': 'g' },
-    'p$': { 'default': 'p' },
-    't$': { 'default': 't' },
-
-    # Outros
-    'ɡə': { 'default': 'gue' },
-    'ɡi': { 'default': 'gi' },
-    'ʧ': { 'default': 'tch' },
-    'ʤ': { 'default': 'dj' }
-}
-
-# Características fonéticas
-
-# Lista de palavras com 'h' aspirado
-h_aspirate_words = [
-    "hache", "hagard", "haie", "haillon", "haine", "haïr", "hall", "halo", "halte", "hamac",
-    "hamburger", "hameau", "hamster", "hanche", "handicap", "hangar", "hanter", "happer",
-    "harceler", "hardi", "harem", "hareng", "harfang", "hargne", "haricot", "harnais", "harpe",
-    "hasard", "hâte", "hausse", "haut", "havre", "hennir", "hérisser", "hernie", "héron",
-    "héros", "hêtre", "heurter", "hibou", "hic", "hideur", "hiérarchie", "hiéroglyphe", "hippie",
-    "hisser", "hocher", "hockey", "hollande", "homard", "honte", "hoquet", "horde", "hors",
-    "hotte", "houblon", "houle", "housse", "huard", "hublot", "huche", "huer", "huit", "humer",
-    "hurler", "huron", "husky", "hutte", "hyène"
-]
+# Logits das tentativas recentes, para /rescore sem rodar o modelo
+logits_store = LogitsStore()
 
-#--------------------------------------------------------------------------------------------------
+# Tempo máximo de espera pelo ASR em /upload
+UPLOAD_TIMEOUT_SECONDS = 120
+UPLOAD_MAX_BYTES = 10 * 1024 * 1024
 
-# Funções de pronúncia e transcrição --------------------------------------------------------------------------------------------------
-# 
-def get_pronunciation(word):
-    word_normalized = word.lower()
-    # Tratar casos especiais para artigos definidos e pronomes tonicos
-    if word_normalized == 'le':
-        return 'luh'
-    elif word_normalized == 'la':
-        return 'lá'
-    elif word_normalized == 'les':
-        return 'lê'
-    elif word_normalized== 'moi':
-        return 'mwa'
-    elif word_normalized== 'toi':
-        return 'twa'
-    elif word_normalized== 'lui':
-        return 'lui'
-    elif word_normalized== 'elle':
-        return 'él'
-    elif word_normalized== 'nous':
-        return 'nu'
-    elif word_normalized== 'vous':
-        return 'vu'
-    elif word_normalized== 'eux':
-        return 'ø'
-    elif word_normalized== 'elles':
-        return 'él'
-    elif word_normalized=='une':
-        return  'úne'
-    elif word_normalized=='un':
-        return  'ãn'
-    elif word_normalized=="Il est":
-        return 'il ét'
-    else:
-        try:
-            # Tentar obter a pronúncia do dic.json
-            pronunciation = ipa_dictionary.get(word_normalized)
-            if pronunciation:
-                return pronunciation
-            else:
-                # Se não encontrado, usar Epitran como fallback
-                pronunciation = epi.transliterate(word)
-                return pronunciation
-        except Exception as e:
-            logger.error(f"Erro ao obter pronúncia para '{word}': {e}")
-            return word  # Retorna a palavra original como fallback
-
-
-def remove_silent_endings(pronunciation, word):
-    # Verificar se a palavra termina com 'ent' e a pronúncia termina com 't'
-    if word.endswith('ent') and pronunciation.endswith('t'):
-        pronunciation = pronunciation[:-1]
-    # Adicionar outras regras conforme necessário
-    return pronunciation
-
-
-# Ajustar listas conforme sua necessidade
-vogais_orais = ['a', 'e', 'i', 'o', 'u', 'é', 'ê', 'í', 'ó', 'ô', 'ú', 'ø', 'œ', 'ə']
-vogais_nasais = ['ã', 'ẽ', 'ĩ', 'õ', 'ũ']
-semivogais = ['j', 'w', 'ɥ']
-grupos_consonantais_especiais = ['tch', 'dj', 'sj', 'dʒ', 'ks']
-consoantes_base = [
-    'b','d','f','g','k','l','m','n','p','ʁ','r','s','t','v','z','ʃ','ʒ','ɲ','ŋ','ç'
-]
-
-excecoes_semivogais = {
-    # Exemplos de exceções: padrão -> substituição
-    # Caso queira ajustar manualmente certos clusters após a primeira passagem.
-    # Por exemplo, se "sós.jó" sempre deveria ficar "sósjó"
-    ("sós","jó"): ["sósjó"],
-    ("próm","uv"): ["pró","muv"],  # exemplo hipotético
-}
-
-def e_vogal(c):
-    return (c in vogais_orais) or (c in vogais_nasais)
-
-def e_vogal_nasal(c):
-    return c in vogais_nasais
-
-def e_semivogal(c):
-    return c in semivogais
-
-def e_consoante(c):
-    return c in consoantes_base
-
-def e_grupo_consonantal(seq):
-    return seq in grupos_consonantais_especiais
-
-def tokenizar_palavra(palavra):
-    i = 0
-    tokens = []
-    while i < len(palavra):
-        matched = False
-        for gc in grupos_consonantais_especiais:
-            length = len(gc)
-            if palavra[i:i+length] == gc:
-                tokens.append(gc)
-                i += length
-                matched = True
-                break
-        if not matched:
-            tokens.append(palavra[i])
-            i += 1
-    return tokens
-
-def ajustar_semivogais(silabas):
-    # Primeiro, mover semivogais do final da sílaba se a próxima inicia com vogal
-    novas_silabas = []
-    i = 0
-    while i < len(silabas):
-        s = silabas[i]
-        if i < len(silabas)-1:
-            ultima_letra = s[-1]
-            proxima_silaba = silabas[i+1]
-            if ultima_letra in semivogais and e_vogal(proxima_silaba[0]):
-                # Move a semivogal para a próxima sílaba
-                s = s[:-1]
-                proxima_silaba = ultima_letra + proxima_silaba
-                novas_silabas.append(s)
-                silabas[i+1] = proxima_silaba
-            else:
-                novas_silabas.append(s)
-        else:
-            # Última sílaba, apenas adiciona
-            novas_silabas.append(s)
-        i += 1
-
-    silabas = novas_silabas
-
-    # Agora, tentar mesclar semivogais do início de uma sílaba anterior se a anterior terminou em vogal
-    # Exemplo: se anterior terminar em vogal e a atual começar com semivogal + vogal, podemos unir.
-    # Cuidado para não bagunçar a lógica já aplicada. Faça testes com frases reais.
-    novas_silabas = []
-    i = 0
-    while i < len(silabas):
-        if i > 0:
-            # Verifica se a sílaba atual começa com semivogal e a anterior termina em vogal
-            si = silabas[i]
-            anterior = novas_silabas[-1]
-            if si and e_semivogal(si[0]) and e_vogal(anterior[-1]):
-                # Une a semivogal com a sílaba anterior
-                novas_silabas[-1] = novas_silabas[-1] + si
-            else:
-                novas_silabas.append(si)
-        else:
-            novas_silabas.append(silabas[i])
-        i += 1
-
-    silabas = novas_silabas
-
-    # Aplicar exceções específicas de semivogais:
-    # Procurar padrões em pares de sílabas e substituir caso encontre
-    i = 0
-    refinadas = []
-    while i < len(silabas):
-        if i < len(silabas)-1:
-            par = (silabas[i], silabas[i+1])
-            if par in excecoes_semivogais:
-                # Substituir pelo padrão definido
-                refinadas.extend(excecoes_semivogais[par])
-                i += 2
-                continue
-        refinadas.append(silabas[i])
-        i += 1
-
-    return refinadas
-
-def silabificar_refinado(palavra):
-    tokens = tokenizar_palavra(palavra)
-    silabas = []
-    silaba_atual = []
-    encontrou_vogal = False
-
-    for t in tokens:
-        if e_vogal(t):
-            if encontrou_vogal and silaba_atual:
-                silabas.append(''.join(silaba_atual))
-                silaba_atual = [t]
-            else:
-                silaba_atual.append(t)
-                encontrou_vogal = True
-        else:
-            silaba_atual.append(t)
-
-    if silaba_atual:
-        silabas.append(''.join(silaba_atual))
-
-    # Ajustar semivogais após a primeira criação de sílabas
-    silabas = ajustar_semivogais(silabas)
-
-    return silabas
-
-def unir_silabas_com_pontos(silabas):
-    return '.'.join(silabas)
-
-def aplicar_regras_de_liaison(texto):
-    # Adicione aqui quaisquer substituições adicionais finais.
-    # Se quiser remover esta função, pode, mas ela pode ser útil
-    # caso queira ajustar casos específicos de liaison.
-    # Exemplo:
-    texto = texto.replace("nu a", "nu.z a")
-    return texto
-
-def gerar_versao_usuario(frase_com_pontos):
-    # Remove os pontos para o usuário final e reagrupa as palavras
-    # Supondo que as palavras já estão separadas por espaços, basta remover os pontos
-    palavras = frase_com_pontos.split()
-    palavras_sem_pontos = [p.replace('.', '') for p in palavras]
-    return ' '.join(palavras_sem_pontos)
-
-
-
-def transliterate_and_convert_sentence(sentence):
-    words = sentence.split()
-    words = handle_apostrophes(words)
-
-    # 1) TRATAMENTO DE "est-ce que"
-    words = handle_est_ce_que(words)
-
-    # 2) TRATAMENTO ESPECIAL PARA "plus"
-    for i, w in enumerate(words):
-        if w.lower() == "plus":
-            special_plus = handle_plus_pronunciation(i, words)
-            words[i] = special_plus
-    
-    # 3) TRATAMENTO ESPECIAL PARA "est" (verbo x direção), se quiser
-    for i, w in enumerate(words):
-        if w.lower() == "est":
-            special_est = handle_est_pronunciation(i, words)
-            words[i] = special_est
-
-    # 4) Converter cada palavra em pronúncia (Epitran + dicionário)
-    pronunciations = [get_pronunciation(word) for word in words]
-
-    # 5) Liaisons, removendo finais mudos, etc.
-    pronunciations = apply_liaisons(words, pronunciations)
-    pronunciations = [remove_silent_endings(pron, word)
-                      for pron, word in zip(pronunciations, words)]
-
-    # 6) Converte fonemas para "pt-BR"
-    palavras_convertidas = [
-        convert_pronunciation_to_portuguese(pron, idx, pronunciations)
-        for idx, pron in enumerate(pronunciations)
-    ]
+# Modo leitura (/reading): parágrafos inteiros, transcritos por trechos
+READING_MAX_BYTES = 50 * 1024 * 1024
 
-    # 7) Silabifica e une com pontos
-    palavras_silabificadas = []
-    for p in palavras_convertidas:
-        silabas = silabificar_refinado(p)
-        palavras_silabificadas.append(unir_silabas_com_pontos(silabas))
-
-    frase_com_pontos = ' '.join(palavras_silabificadas)
-    frase_com_pontos = aplicar_regras_de_liaison(frase_com_pontos)
-
-    # 8) Gerar versão amigável para usuário (remover pontos)
-    frase_usuario = gerar_versao_usuario(frase_com_pontos)
-
-    return frase_usuario
-
-
-
-
-  
-
-def split_into_phonemes(pronunciation):
-    phonemes = []
-    idx = 0
-    while idx < len(pronunciation):
-        matched = False
-        # Lista de fonemas ordenada para priorizar fonemas individuais
-        phoneme_list = [
-            # Fonemas individuais
-            'a', 'e', 'i', 'o', 'u', 'y', 'ɛ', 'ɔ', 'ɑ', 'ø', 'œ', 'ə',
-            'ɛ̃', 'ɑ̃', 'ɔ̃', 'œ̃',
-            'j', 'w', 'ɥ',
-            'b', 'd', 'f', 'g', 'k', 'l', 'm', 'n', 'p', 'ʁ', 's', 't',
-            'v', 'z', 'ʃ', 'ʒ', 'ɲ', 'ŋ', 'ç',
-            # Fonemas compostos (depois)
-            'dʒ', 'tʃ', 'ks', 'sj', 'ʎ', 'ʔ', 'θ', 'ð', 'ɾ', 'ʕ'
-        ]
-        for phoneme in phoneme_list:
-            length = len(phoneme)
-            if pronunciation[idx:idx+length] == phoneme:
-                phonemes.append(phoneme)
-                idx += length
-                matched = True
-                break
-        if not matched:
-            phonemes.append(pronunciation[idx])
-            logger.warning(f"Fonema não mapeado: '{pronunciation[idx]}' na pronúncia '{pronunciation}'")
-            idx += 1
-    return phonemes
-
-
-def convert_pronunciation_to_portuguese(pronunciation, word_idx, all_pronunciations):
-    phonemes = split_into_phonemes(pronunciation)
-    result = []
-    idx = 0
-    length = len(phonemes)
-    word_start = idx == 0
-    while idx < length:
-        phoneme = phonemes[idx]
-        mapping = french_to_portuguese_phonemes.get(phoneme, {'default': phoneme})
-        context = 'default'
-
-        next_phoneme = phonemes[idx + 1] if idx + 1 < length else ''
-        prev_phoneme = phonemes[idx - 1] if idx > 0 else ''
-
-        # Definir listas de vogais
-        vowels = ['a', 'e', 'i', 'o', 'u', 'ɛ', 'ɔ', 'ɑ', 'ø', 'œ', 'ə']
-        front_vowels = ['i', 'e', 'ɛ', 'ɛ̃', 'œ', 'ø', 'y']
-
-        next_is_i = next_phoneme == 'i'
-        prev_is_vowel = prev_phoneme in vowels
-        next_is_vowel = next_phoneme in vowels
-        next_is_front_vowel = next_phoneme in front_vowels
-
-        # Definir o contexto
-        if phoneme == 'd' and next_is_i:
-            context = 'before_i'
-        elif phoneme == 't' and next_is_i:
-            context = 'before_i'
-        elif phoneme == 'k' and next_is_front_vowel:
-            context = 'before_front_vowel'
-        elif phoneme == 'ʁ':
-            if word_start:
-                context = 'word_initial'
-            elif prev_is_vowel:
-                context = 'after_vowel'
-            else:
-                context = 'after_consonant'
-        elif phoneme == 's' and prev_is_vowel and next_is_vowel:
-            context = 'between_vowels'
-        elif phoneme == 'ʒ' and phonemes[idx - 1] in ['ɛ̃', 'ɑ̃', 'ɔ̃', 'œ̃']:
-            context = 'after_nasal'
-
-        # Obter o mapeamento
-        mapped_phoneme = mapping.get(context, mapping['default'])
-        result.append(mapped_phoneme)
-        idx += 1
-        word_start = False  # Apenas a primeira iteração é o início da palavra
-
-    return ''.join(result)
-
-def handle_apostrophes(words_list):
-    new_words = []
-    for word in words_list:
-        if "'" in word:
-            prefix, sep, suffix = word.partition("'")
-            # Contrações comuns
-            if prefix.lower() in ["l", "d", "j", "qu", "n", "m", "c"]:
-                combined_word = prefix + suffix
-                new_words.append(combined_word)
-            else:
-                new_words.append(word)
-        else:
-            new_words.append(word)
-    return new_words
-
-def apply_liaisons(words_list, pronunciations):
-    nasal_words = {'un','mon','ton','son','en'}
-    new_pronunciations = []
-    for i in range(len(words_list) - 1):
-        current_word = words_list[i]
-        next_word = words_list[i + 1]
-        current_pron = pronunciations[i]
-
-        # Verificar se a próxima palavra começa com "h" aspirado
-        next_word_clean = re.sub(r"[^a-zA-Z']", '', next_word).lower()
-        h_aspirate = next_word_clean in h_aspirate_words
-
-        # Verificar se a próxima palavra começa com vogal ou 'h' mudo
-        if re.match(r"^[aeiouyâêîôûéèëïüÿæœ]", next_word, re.IGNORECASE) and not h_aspirate:
-            # --- REGRAS DE LIAISON EXISTENTES ---
-            if current_word.lower() == "les":
-                current_pron = current_pron.rstrip('e') + 'z'
-            elif current_word[-1] in ['s', 'x', 'z']:
-                current_pron = current_pron + 'z'
-            elif current_word[-1] == 'd':
-                current_pron = current_pron + 't'
-            elif current_word[-1] == 'g':
-                current_pron = current_pron + 'k'
-            elif current_word[-1] == 't':
-                current_pron = current_pron + 't'
-            elif current_word[-1] == 'n':
-                current_pron = current_pron + 'n'
-            elif current_word[-1] == 'p':
-                current_pron = current_pron + 'p'
-            elif current_word[-1] == 'r':
-                current_pron = current_pron + 'r'
-            elif current_word.lower() == "d'" and re.match(r"^[aeiouyâêîôûéèëïüÿæœ]", next_word, re.IGNORECASE):
-                current_pron = current_pron.rstrip('e') + 'z'
-            
-            # --- REGRAS ESPECIAIS PARA "un" ---
-            # Se a palavra for "un" E a próxima inicia por vogal (ou h mudo),
-            # a nasal final ("ã" ou "ẽ") volta a ter som de "n" => "ãn" / "ẽn"
-            if current_word.lower() == 'un':
-                # Supondo que 'un' foi transliterado como "ẽ" ou "œ̃":
-                # Exemplo: se get_pronunciation("un") => "œ̃", que mapeia p/ "ãn" ou "ẽ"
-                # Precisamos reintroduzir o /n/.
-                # Só se o final for 'ã'/'ẽ' (ou algo nasal). Ajuste se o seu mapeamento for diferente!
-                if current_pron.endswith('ã'):
-                    # vira "ãn"
-                    current_pron = current_pron[:-1] + 'ãn'
-                elif current_pron.endswith('ẽ'):
-                    # vira "ẽn"
-                    current_pron = current_pron[:-1] + 'ẽn'
-                elif current_pron.endswith('õ'):
-                    # "õn"? raríssimo pra "un", mas se você quiser cobrir "on"...
-                    current_pron = current_pron[:-1] + 'õn'
-                if current_word.lower() in nasal_words:
-                    # reintroduz 'n'
-                    if current_pron.endswith('ã'):
-                        current_pron = current_pron[:-1] + 'ãn'
-    
-        new_pronunciations.append(current_pron)
-    # Adicionar a última pronúncia (não esqueça)
-    new_pronunciations.append(pronunciations[-1])
-    return new_pronunciations
-
-
-def remove_accents(text):
-    return ''.join(
-        c for c in unicodedata.normalize('NFD', text)
-        if unicodedata.category(c) != 'Mn'
-    )
+# Validade do áudio de /speak no cache do navegador (revalidado pelo ETag depois)
+TTS_MAX_AGE_SECONDS = 24 * 3600
+speak_flight = SingleFlight('speak')
 
-def normalize_text(text):
-    text = text.lower()
-    text = text.replace("’", "'")
-    text = remove_accents(text)
-    text = re.sub(r"[^\w\s']", '', text)
-    text = re.sub(r"\s+'", "'", text)
-    text = re.sub(r"'\s+", "'", text)
-    return text.strip()
+# Carregar os Modelos ASR Wav2Vec2 para Francês (ASR_MODELS; o primeiro é o padrão,
+# xls-r 1B). A política de roteamento manda clipes curtos, categorias
+# configuradas e a carga de pico para o modelo leve, se houver (AsrModels.py).
+def load_asr_checkpoint(checkpoint):
+    return Wav2Vec2Processor.from_pretrained(checkpoint), Wav2Vec2ForCTC.from_pretrained(checkpoint)
 
-
-def remove_punctuation_end(sentence):
-      return sentence.rstrip('.')
+asr_models = ModelRegistry.from_env(load_asr_checkpoint)
+asr_routing = RoutingPolicy.from_env(asr_models)
+processor_asr, model_asr = asr_models.default.processor, asr_models.default.model
+#--------------------------------------------------------------------------------------------------
 
 # Funções para comparação fonética e Processamento de áudio -------------------------------------------------------
-def compare_phonetics(phonetic1, phonetic2, threshold=0.8):
-    """Usa similaridade híbrida melhorada"""
-    similarity = WordMetrics.hybrid_similarity(phonetic1, phonetic2)
-    return similarity >= threshold
-
 def apply_vad(waveform: torch.Tensor, sample_rate: int, frame_ms: int = 30) -> torch.Tensor:
     """
     Aplica WebRTC VAD para remover partes sem fala no áudio.
@@ -674,18 +121,23 @@ def apply_vad(waveform: torch.Tensor, sample_rate: int, frame_ms: int = 30) -> t
 
 def remove_noise_and_normalize(waveform: torch.Tensor, sr: int) -> torch.Tensor:
     """
-    Remove ruído (noisereduce) e normaliza RMS
+    Remove ruído (noisereduce) e normaliza RMS (AudioPreprocess, sem cópias
+    além da saída do noisereduce; o tensor retornado compartilha essa memória)
     """
-    waveform_np = waveform.squeeze().numpy()
-    # Redução de ruído
-    reduced = nr.reduce_noise(y=waveform_np, sr=sr, prop_decrease=0.8)
-    wf_clean = torch.tensor(reduced, dtype=torch.float32).unsqueeze(0)
+    return torch.from_numpy(AudioPreprocess.denoise_and_normalize(waveform.squeeze(0).numpy(), sr)).unsqueeze(0)
 
-    # Normalização RMS
-    rms = wf_clean.pow(2).mean().sqrt()
-    if rms > 0:
-        wf_clean = wf_clean / rms
-    return wf_clean
+def estimate_audio_duration(file_path: str) -> float:
+    """
+    Duração do áudio em segundos, lida do cabeçalho (sem decodificar).
+    Se o formato não permitir, estima pelo tamanho como PCM 16 kHz 16 bits.
+    """
+    try:
+        info = torchaudio.info(file_path)
+        if info.sample_rate > 0 and info.num_frames > 0:
+            return info.num_frames / info.sample_rate
+    except Exception as e:
+        logger.debug(f"torchaudio.info falhou para {file_path}: {e}")
+    return os.path.getsize(file_path) / (16000 * 2)
 
 def resample_waveform(waveform: torch.Tensor, orig_sr: int, target_sr=16000) -> torch.Tensor:
     if orig_sr != target_sr:
@@ -693,208 +145,580 @@ def resample_waveform(waveform: torch.Tensor, orig_sr: int, target_sr=16000) ->
         waveform = resampler(waveform)
     return waveform
 
-def process_audio(file_path: str) -> str:
+def run_asr_model(input_values: torch.Tensor, cancel_token=None, asr_model=None) -> torch.Tensor:
+    """
+    Forward do wav2vec2 (`asr_model`, padrão: o primeiro de ASR_MODELS) sobre
+    o áudio inteiro. O cancelamento é verificado entre as camadas do modelo
+    (AsrModels.install_cancel_checks), sem cortar o áudio em blocos.
+    """
+    asr_model = asr_model or asr_models.default
+    check_cancelled(cancel_token)
+    start_time = time.perf_counter()
+    with torch.inference_mode(), Cancellation.active(cancel_token):
+        logits = asr_model.model(input_values).logits
+    asr_model.observe(input_values.shape[-1] / 16000, time.perf_counter() - start_time)
+    return logits
+
+def process_audio(file_path: str, cancel_token=None) -> str:
     """
     Pipeline: Carregar -> Mono -> Resample(16k) -> VAD -> NoiseReduce+Normalize -> ASR -> transcrição
+    Entre as etapas (e entre as camadas do modelo) verifica cancel_token.
     """
-    try:
-        waveform, sample_rate = torchaudio.load(file_path)
-
-        # Mono
-        if waveform.shape[0] > 1:
-            waveform = waveform.mean(dim=0, keepdim=True)
+    return decode_transcription(compute_logits(file_path, cancel_token))
 
-        # Resample para 16k
-        waveform = resample_waveform(waveform, sample_rate, 16000)
-        sample_rate = 16000
+def transcribe_and_retain(file_path: str, text: str, cancel_token=None, asr_model=None):
+    """
+    Como process_audio, mas guarda os logits no logits_store para re-pontuar
+    depois sem o modelo (POST /rescore). Retorna (transcrição, attempt_id, nome do modelo).
+    """
+    asr_model = asr_model or asr_models.default
+    with Tracing.span('transcribe', model=asr_model.name):
+        logits = compute_logits(file_path, cancel_token, asr_model)
+        transcription = decode_transcription(logits, asr_model)
+        attempt_id = logits_store.put(logits.numpy(), text, transcription, model=asr_model.name)
+    return transcription, attempt_id, asr_model.name
+
+def compute_logits(file_path: str, cancel_token=None, asr_model=None) -> torch.Tensor:
+    """
+    Carregar -> Mono -> Resample(16k) -> NoiseReduce+Normalize -> wav2vec2.
+    Retorna as emissões do CTC (frames x vocabulário) e apaga o arquivo.
+    """
+    try:
+        # Amostras no buffer de rascunho do worker: só vivem até o fim deste pedido
+        waveform = load_waveform(file_path, cancel_token, out=AudioPreprocess.scratch().take)
 
         # VAD audios curtos de 1-10 segundos nao precisam da redução de silencio do fundo
        # waveform = apply_vad(waveform, sample_rate, frame_ms=30)
 
-        # Noise reduction e normalize
-        waveform = remove_noise_and_normalize(waveform, sample_rate)
-
-        # ASR
-        inputs = processor_asr(waveform.squeeze(0), sampling_rate=sample_rate, return_tensors="pt")
-        with torch.inference_mode():
-            logits = model_asr(inputs.input_values).logits
-        pred_ids = torch.argmax(logits, dim=-1)
-        transcription = processor_asr.decode(pred_ids[0], skip_special_tokens=True)
-        return transcription
+        return logits_from_waveform(waveform, cancel_token, asr_model)
 
+    except OperationCancelled:
+        logger.info(f"Processamento de áudio cancelado: {file_path}")
+        raise
+    except AudioInput.EmptyAudio:
+        # Erro do upload (400), não do servidor
+        raise
     except Exception as e:
         logger.exception(f"Erro ao processar áudio: {e}")
         raise e
     finally:
         if os.path.exists(file_path):
             os.remove(file_path)
+
+def load_waveform(file_path: str, cancel_token=None, out=None) -> torch.Tensor:
+    """
+    Carregar -> Mono -> Resample(16k). Retorna o tensor (1 x amostras) a 16 kHz.
+    `out` (n -> array float32) recebe as amostras do formato do gravador.
+    """
+    check_cancelled(cancel_token)
+    with open(file_path, 'rb') as f:
+        data = f.read()
+    audio_format = AudioInput.sniff_format(data)
+    Metrics.UPLOAD_FORMATS.inc(format=audio_format)
+    if AudioInput.is_empty_wav(data):
+        raise AudioInput.EmptyAudio("Arquivo de áudio vazio.")
+    with Metrics.AUDIO_LOAD_SECONDS.time(format=audio_format):
+        # Formato do gravador (WAV PCM16 mono 16 kHz): sem decodificação nem reamostragem
+        if audio_format == AudioInput.FAST_FORMAT:
+            with Metrics.stage('load_pcm16'):
+                return torch.from_numpy(AudioInput.pcm16_samples(data, out)).unsqueeze(0)
+
+        with Metrics.stage('load_decode'):
+            waveform, sample_rate = torchaudio.load(file_path)
+
+            # Mono
+            if waveform.shape[0] > 1:
+                waveform = waveform.mean(dim=0, keepdim=True)
+
+        # Resample para 16k
+        check_cancelled(cancel_token)
+        with Metrics.stage('resample'):
+            waveform = resample_waveform(waveform, sample_rate, 16000)
+        return waveform
+
+def logits_from_waveform(waveform: torch.Tensor, cancel_token=None, asr_model=None) -> torch.Tensor:
+    """NoiseReduce+Normalize -> wav2vec2 sobre áudio 16 kHz (1 x amostras)."""
+    asr_model = asr_model or asr_models.default
+    sample_rate = 16000
+
+    # Noise reduction e normalize
+    check_cancelled(cancel_token)
+    with Metrics.stage('noise_reduction'):
+        waveform = remove_noise_and_normalize(waveform, sample_rate)
+
+    # ASR
+    check_cancelled(cancel_token)
+    with Metrics.stage('asr_forward'):
+        Tracing.annotate(model=asr_model.name, audio_seconds=round(waveform.shape[-1] / sample_rate, 3))
+        # Normalização do processor_asr no lugar, sem as cópias de processor_asr(...)
+        AudioPreprocess.model_input(waveform.squeeze(0).numpy(), asr_model.processor.feature_extractor)
+        logits = run_asr_model(waveform, cancel_token, asr_model)
+    return logits[0]
+
+def transcribe_chunk(waveform: torch.Tensor, cancel_token=None) -> str:
+    """Transcrição de um trecho do modo leitura, já carregado a 16 kHz."""
+    return decode_transcription(logits_from_waveform(waveform, cancel_token))
+
+def decode_transcription(logits, asr_model=None) -> str:
+    """
+    Decodificação gulosa do CTC: logits (frames x vocabulário, tensor ou
+    ndarray) -> texto, com o vocabulário do modelo que gerou os logits.
+    """
+    asr_model = asr_model or asr_models.default
+    with Metrics.stage('ctc_decode'):
+        pred_ids = torch.argmax(torch.as_tensor(logits), dim=-1)
+        return asr_model.processor.decode(pred_ids, skip_special_tokens=True)
 #---------------------------------------------------------------------------------
 # Rotas de API -------------------
 @app.route('/')
 def index():
-    return render_template('index.html')
+    return render_template('index.html', text_version=TEXT_CONTENT_VERSION)
+
+def save_uploaded_audio(max_size=UPLOAD_MAX_BYTES):
+    """
+    Valida o áudio (até `max_size` bytes) e o texto de referência do formulário
+    e salva o áudio num arquivo temporário (process_audio apaga o arquivo ao terminar).
+    Retorna (caminho, texto, None) ou (None, None, resposta_de_erro).
+    """
+    file = request.files.get('audio')
+    if not file:
+        return None, None, (jsonify({"error": "Nenhum arquivo de áudio enviado."}), 400)
 
-@app.route('/pronounce', methods=['POST'])
-def pronounce():
+    # Verificação de tamanho
+    file.seek(0, os.SEEK_END)
+    file_length = file.tell()
+    if file_length > max_size:
+        return None, None, (jsonify({"error": "Arquivo de áudio muito grande."}), 400)
+    file.seek(0)
+
+    text = request.form.get('text')
+    if not text:
+        return None, None, (jsonify({"error": "Texto de referência não fornecido."}), 400)
+
+    # Salva o arquivo temporário
+    with tempfile.NamedTemporaryFile(delete=False, suffix=".wav") as tmp_file:
+        tmp_file.write(file.read())
+        tmp_file_path = tmp_file.name
+    return tmp_file_path, text, None
+
+
+@app.route('/upload', methods=['POST'])
+@profiled
+@Tracing.traced('upload')
+def upload():
+    """
+    Rota que recebe o áudio do usuário, processa e retorna o feedback em JSON.
+    """
     try:
-        text = request.form['text']
-        # ... processa ...
-        pronunciation = transliterate_and_convert_sentence(text)
-        return jsonify({'pronunciations': pronunciation})
+        tmp_file_path, text, error_response = save_uploaded_audio()
+        if error_response:
+            return error_response
+
+        category = request.form.get('category', 'random')
+        Tracing.annotate(category=category, text_words=len(text.split()))
+
+        # Se o cliente desconectar ou o tempo esgotar, o token interrompe o
+        # ASR (entre etapas/camadas) e o CP-SAT, liberando o worker.
+        cancel_token = CancelToken()
+        with DisconnectWatcher(request.environ, cancel_token):
+            # Processa o áudio de forma assíncrona
+            future = submit_asr(tmp_file_path, transcribe_and_retain, tmp_file_path, text, cancel_token,
+                                category=category)
+            cancel_token.add_callback(lambda: cancel_queued_asr(future, tmp_file_path))
+            try:
+                transcription, attempt_id, model_name = future.result(timeout=UPLOAD_TIMEOUT_SECONDS)
+            except FuturesTimeout:
+                cancel_token.cancel('timeout')
+                raise OperationCancelled('timeout')
+            except CancelledError:
+                raise OperationCancelled(cancel_token.reason)
+
+            Tracing.annotate(model=model_name)
+            with Tracing.span('scoring'):
+                result = score_transcription(transcription, text, cancel_token)
+            result.update({'attempt_id': attempt_id, 'model': model_name})
+            with Tracing.span('serialize'):
+                return jsonify(result)
+    except SchedulerOverloaded as e:
+        return overloaded_response(e)
+    except AudioInput.EmptyAudio as e:
+        return jsonify({'error': str(e)}), 400
+    except OperationCancelled as e:
+        logger.info(f"/upload cancelado: {e}")
+        if str(e) == 'timeout':
+            return jsonify({'error': "Tempo de processamento esgotado."}), 504
+        return jsonify({'error': "Requisição cancelada."}), 499
     except Exception as e:
-        logger.exception("Erro em /pronounce")
+        print(f"Erro em /upload: {e}")
         return jsonify({'error': str(e)}), 500
 
-    
-@app.route('/hints', methods=['POST'])
-def hints():
+@app.route('/rescore', methods=['POST'])
+def rescore():
+    """
+    Re-pontua uma tentativa a partir dos logits guardados, sem rodar o ASR.
+    Parâmetros (form ou JSON): attempt_id; opcionais text (referência
+    corrigida; padrão: a original) e threshold (similaridade fonética, 0-1).
+    """
+    params = request.get_json(silent=True) or request.form
+    attempt_id = params.get('attempt_id')
+    if not attempt_id:
+        return jsonify({'error': "attempt_id não fornecido."}), 400
     try:
-        text = request.form['text']
-        words = text.split()
-        hints_result = []
+        threshold = float(params.get('threshold', DEFAULT_SIMILARITY_THRESHOLD))
+    except (TypeError, ValueError):
+        return jsonify({'error': "threshold inválido."}), 400
+    if not 0.0 < threshold <= 1.0:
+        return jsonify({'error': "threshold deve estar entre 0 e 1."}), 400
 
-        for w in words:
-            data = get_pronunciation_hints(w)
-            if data["explanations"]:
-                hints_result.append(data)
-
-        return jsonify({"hints": hints_result})
+    try:
+        logits, original_text, _, model_name = logits_store.get(attempt_id)
+    except AttemptNotFound:
+        return jsonify({'error': "Tentativa não encontrada ou expirada; envie o áudio novamente."}), 404
+    try:
+        text = params.get('text') or original_text
+        transcription = decode_transcription(logits, asr_models.get(model_name))
+        result = score_transcription(transcription, text, threshold=threshold)
+        result.update({'attempt_id': attempt_id, 'transcription': transcription, 'threshold': threshold,
+                       'model': model_name})
+        return jsonify(result)
     except Exception as e:
-        logger.exception(f"Erro em /hints: {e}")
+        logger.exception("Erro em /rescore")
         return jsonify({'error': str(e)}), 500
 
+def asr_pressure():
+    """Fração do orçamento de segundos da fila de ASR em uso."""
+    stats = asr_scheduler.stats()
+    return stats['queued_seconds'] / stats['max_queued_seconds']
+
 
-@app.route('/get_sentence', methods=['POST'])
-def get_sentence():
+def submit_asr(file_path, fn, *args, category=None):
+    """
+    Envia fn(*args, asr_model=...) ao escalonador com o modelo escolhido pelo
+    asr_routing e o custo estimado pela duração de `file_path` (relativo ao
+    modelo padrão). Se a fila não comportar o modelo escolhido, tenta o leve;
+    levanta SchedulerOverloaded (e apaga o arquivo) se nem ele couber.
+    Com a requisição rastreada, fn roda no worker dentro do trace (Tracing.bind).
+    """
+    fn = Tracing.bind(fn)
     try:
-        category = request.form.get('category', 'random')
+        audio_seconds = estimate_audio_duration(file_path)
+        asr_model, reason = asr_routing.choose(audio_seconds, category, asr_pressure())
+        try:
+            future = asr_scheduler.submit(fn, *args, asr_model=asr_model,
+                                          audio_seconds=audio_seconds * asr_models.relative_cost(asr_model))
+        except SchedulerOverloaded:
+            asr_model = asr_routing.fallback(asr_model)
+            if asr_model is None:
+                raise
+            reason = 'overload'
+            future = asr_scheduler.submit(fn, *args, asr_model=asr_model,
+                                          audio_seconds=audio_seconds * asr_models.relative_cost(asr_model))
+        ASR_MODEL_REQUESTS.inc(model=asr_model.name, reason=reason)
+        return future
+    except SchedulerOverloaded:
+        if os.path.exists(file_path):
+            os.remove(file_path)
+        raise
+
+
+def cancel_queued_asr(future, file_path):
+    """Cancela o ASR ainda na fila; como process_audio não vai rodar, apaga o arquivo."""
+    if future.cancel() and os.path.exists(file_path):
+        os.remove(file_path)
+
 
-        if category == 'random':
-            if random_sentences:
-                sentence = random.choice(random_sentences)
-                sentence_text = remove_punctuation_end(sentence.get('fr_sentence', "Frase não encontrada"))
-            else:
-                return jsonify({"error": "Nenhuma frase disponível para seleção aleatória."}), 500
-        else:
-            if category in categorized_sentences:
-                sentences_in_category = categorized_sentences[category]
-                sentence_text = random.choice(sentences_in_category)
-                sentence_text = remove_punctuation_end(sentence_text)
-            else:
-                return jsonify({"error": "Categoria não encontrada."}), 400
-
-        return jsonify({'fr_sentence': sentence_text, 'category': category})
+def overloaded_response(error):
+    response = jsonify({'error': str(error), 'retry_after': error.retry_after})
+    response.status_code = 503
+    response.headers['Retry-After'] = str(error.retry_after)
+    return response
 
+
+# Métricas lidas na hora do /metrics
+Metrics.gauge_callback('asr_queue_depth', 'Jobs de ASR aguardando na fila.',
+                       lambda: asr_scheduler.stats()['queue_depth'])
+Metrics.gauge_callback('asr_queued_seconds', 'Custo estimado (s) aguardando na fila de ASR.',
+                       lambda: asr_scheduler.stats()['queued_seconds'])
+Metrics.gauge_callback('asr_running', 'Jobs de ASR em execução.',
+                       lambda: asr_scheduler.stats()['running'])
+Metrics.gauge_callback('asr_rejected_total', 'Jobs de ASR recusados (503) pelo controle de admissão.',
+                       lambda: asr_scheduler.stats()['rejected'], metric_type='counter')
+Metrics.gauge_callback('logits_store_bytes', 'Bytes de logits comprimidos guardados para /rescore.',
+                       lambda: logits_store.stats()['bytes'])
+Metrics.gauge_callback('requests_cancelled_total', 'Requisições canceladas por motivo.',
+                       cancellation_counts, labelname='reason', metric_type='counter')
+
+
+@app.route('/metrics', methods=['GET'])
+def metrics():
+    return Response(Metrics.render(), content_type=Metrics.CONTENT_TYPE)
+
+
+@app.route('/scheduler/stats', methods=['GET'])
+def scheduler_stats():
+    """Profundidade da fila de ASR, estatísticas de espera e cancelamentos."""
+    stats = asr_scheduler.stats()
+    stats['cancellations'] = cancellation_counts()
+    stats['threads'] = THREAD_CONFIG.as_dict()
+    stats['asr_models'] = dict(asr_models.stats(), routing=asr_routing.as_dict())
+    return jsonify(stats)
+
+# API assíncrona de pontuação -------------------
+def transcribe_for_job(job_id, file_path, text, cancel_token, asr_model=None):
+    job_store.update(job_id, JOB_TRANSCRIBING)
+    return transcribe_and_retain(file_path, text, cancel_token, asr_model)
+
+
+def on_job_transcribed(job_id, text, future):
+    """Callback do Future do ASR: publica a transcrição e enfileira a pontuação."""
+    try:
+        transcription, attempt_id, model_name = future.result()
+    except (CancelledError, Exception) as e:
+        fail_job(job_id, e)
+        return
+    job_store.update(job_id, JOB_TRANSCRIBED, transcription=transcription, attempt_id=attempt_id,
+                     model=model_name)
+    enqueue_scoring(job_id, transcription, text)
+
+
+def fail_job(job_id, error):
+    """Encerra o job como cancelado (CancelledError/OperationCancelled) ou com erro."""
+    if isinstance(error, (CancelledError, OperationCancelled)):
+        job_store.update(job_id, JOB_CANCELLED, error="Job cancelado.")
+    else:
+        logger.error(f"Erro no ASR do job {job_id}: {error}")
+        job_store.update(job_id, JOB_ERROR, error=str(error))
+    job_tokens.pop(job_id, None)
+
+
+def enqueue_scoring(job_id, transcription, text):
+    try:
+        scoring_jobs.submit({'transcription': transcription, 'text': text}, job_id=job_id)
+    except JobQueueFull:
+        logger.warning(f"Fila de pontuação cheia, job {job_id} descartado")
+        job_tokens.pop(job_id, None)
+
+
+def run_scoring_job(job_id, payload):
+    """Pontua a transcrição já publicada pelo ASR."""
+    cancel_token = job_tokens.get(job_id)
+    try:
+        result = score_transcription(payload['transcription'], payload['text'], cancel_token)
+        job_store.update(job_id, JOB_DONE, result=result)
+    finally:
+        job_tokens.pop(job_id, None)
+
+
+def cancel_job(job_id, reason):
+    cancel_token = job_tokens.get(job_id)
+    if cancel_token is not None:
+        cancel_token.cancel(reason)
+
+
+job_store = JobStore()
+# Tokens de cancelamento dos jobs ainda em andamento
+job_tokens = {}
+scoring_jobs = ScoringJobQueue(job_store, run_scoring_job, max_pending=32, workers=2)
+
+
+@app.route('/jobs', methods=['POST'])
+def create_job():
+    """
+    Recebe áudio + texto de referência e retorna imediatamente um job_id (202).
+    O resultado sai em GET /jobs/<id> ou em GET /jobs/<id>/events (SSE).
+    """
+    try:
+        tmp_file_path, text, error_response = save_uploaded_audio()
+        if error_response:
+            return error_response
+
+        # A admissão acontece aqui: com a fila de ASR cheia o cliente recebe 503 na hora
+        job_id = job_store.create()
+        cancel_token = CancelToken()
+        try:
+            future = submit_asr(tmp_file_path, transcribe_for_job, job_id, tmp_file_path, text, cancel_token,
+                                category=request.form.get('category'))
+        except SchedulerOverloaded as e:
+            job_store.update(job_id, JOB_ERROR, error=str(e))
+            return overloaded_response(e)
+        job_tokens[job_id] = cancel_token
+        cancel_token.add_callback(lambda: cancel_queued_asr(future, tmp_file_path))
+        future.add_done_callback(lambda f: on_job_transcribed(job_id, text, f))
+
+        return jsonify({
+            'job_id': job_id,
+            'status': JOB_QUEUED,
+            'status_url': f'/jobs/{job_id}',
+            'events_url': f'/jobs/{job_id}/events'
+        }), 202
     except Exception as e:
-        logger.error(f"Erro no endpoint /get_sentence: {e}")
-        return jsonify({"error": "Erro interno no servidor."}), 500
+        logger.exception(f"Erro em /jobs: {e}")
+        return jsonify({'error': str(e)}), 500
 
-@app.route('/upload', methods=['POST'])
-def upload():
+
+# Modo leitura -------------------
+def prepare_reading_job(job_id, file_path, text, cancel_token):
     """
-    Rota que recebe o áudio do usuário, processa e retorna o feedback em JSON.
+    Roda num worker do ASR: carrega a gravação, corta nos silêncios e
+    dispara a transcrição dos trechos (ChunkedTranscription).
     """
     try:
-        file = request.files.get('audio')
-        if not file:
-            return jsonify({"error": "Nenhum arquivo de áudio enviado."}), 400
-
-        # Verificação de tamanho
-        max_size = 10 * 1024 * 1024
-        file.seek(0, os.SEEK_END)
-        file_length = file.tell()
-        if file_length > max_size:
-            return jsonify({"error": "Arquivo de áudio muito grande."}), 400
-        file.seek(0)
-
-        text = request.form.get('text')
-        if not text:
-            return jsonify({"error": "Texto de referência não fornecido."}), 400
+        waveform = load_waveform(file_path, cancel_token)
+    finally:
+        if os.path.exists(file_path):
+            os.remove(file_path)
+
+    check_cancelled(cancel_token)
+    with Metrics.stage('vad_split'):
+        chunks = plan_chunks(voiced_frames(waveform[0].numpy()), waveform.shape[-1])
+    job_store.update(job_id, JOB_TRANSCRIBING, chunks_total=len(chunks), chunks_done=0,
+                     duration=round(waveform.shape[-1] / 16000, 2))
+
+    def on_chunk(index, chunk_text, done):
+        start, end, _ = chunks[index]
+        job_store.update(job_id, JOB_TRANSCRIBING, chunks_done=done, chunk={
+            'index': index,
+            'start': round(start / 16000, 2),
+            'end': round(end / 16000, 2),
+            'transcription': chunk_text,
+        })
+
+    def on_done(texts):
+        transcription = stitch_transcripts(texts)
+        job_store.update(job_id, JOB_TRANSCRIBED, transcription=transcription)
+        enqueue_scoring(job_id, transcription, text)
+
+    ChunkedTranscription(
+        asr_scheduler, transcribe_chunk, waveform, chunks, cancel_token,
+        on_chunk=on_chunk, on_done=on_done, on_error=lambda e: fail_job(job_id, e),
+        max_in_flight=ASR_WORKERS
+    ).start()
+
+
+def on_reading_prepared(job_id, future):
+    # Sucesso segue pelos callbacks do ChunkedTranscription; aqui só as falhas da preparação
+    try:
+        future.result()
+    except (CancelledError, Exception) as e:
+        fail_job(job_id, e)
 
-        category = request.form.get('category', 'random')
 
-        # Salva o arquivo temporário
-        with tempfile.NamedTemporaryFile(delete=False, suffix=".wav") as tmp_file:
-            tmp_file.write(file.read())
-            tmp_file_path = tmp_file.name
-
-        # Processa o áudio de forma assíncrona
-        future = executor.submit(process_audio, tmp_file_path)
-        transcription = future.result(timeout=120)
-
-        # Normalização e comparação
-        normalized_transcription = normalize_text(transcription)
-        normalized_text = normalize_text(text)
-        words_estimated = normalized_transcription.split()
-        words_real = normalized_text.split()
-
-        # Alinhamento e métricas
-        mapped_words, mapped_indices = WordMatching.get_best_mapped_words(words_estimated, words_real)
-       
-
-        # Geração do diff_html e feedback
-        diff_html = []
-        pronunciations = {}
-        feedback = {}
-        correct_count = 0
-        incorrect_count = 0
-
-        for idx, real_word in enumerate(words_real):
-            mapped_word = mapped_words[idx]
-            if mapped_word != '-':
-                correct_pron = transliterate_and_convert_sentence(real_word)
-                user_pron = transliterate_and_convert_sentence(mapped_word)
-                if compare_phonetics(correct_pron, user_pron):
-                    diff_html.append(f'<span class="word correct" onclick="showPronunciation(\'{real_word}\')">{real_word}</span>')
-                    correct_count += 1
-                else:
-                    diff_html.append(f'<span class="word incorrect" onclick="showPronunciation(\'{real_word}\')">{real_word}</span>')
-                    incorrect_count += 1
-                    feedback[real_word] = {
-                        'correct': correct_pron,
-                        'user': user_pron,
-                        'suggestion': f"Tente pronunciar '{real_word}' como '{correct_pron}'"
-                    }
-                pronunciations[real_word] = {
-                    'correct': correct_pron,
-                    'user': user_pron
-                }
-            else:
-                diff_html.append(f'<span class="word missing" onclick="showPronunciation(\'{real_word}\')">{real_word}</span>')
-                incorrect_count += 1
-                feedback[real_word] = {
-                    'correct': transliterate_and_convert_sentence(real_word),
-                    'user': '',
-                    'suggestion': f"Tente pronunciar '{real_word}' como '{transliterate_and_convert_sentence(real_word)}'"
-                }
-                pronunciations[real_word] = {
-                    'correct': transliterate_and_convert_sentence(real_word),
-                    'user': ''
-                }
-
-        diff_html = ' '.join(diff_html)
-        total_words = correct_count + incorrect_count
-        ratio = (correct_count / total_words) * 100 if total_words > 0 else 0
-        completeness_score = (len(mapped_words) / len(words_real)) * 100 if len(words_real) > 0 else 0
+@app.route('/reading', methods=['POST'])
+def create_reading_job():
+    """
+    Modo leitura: recebe a gravação de um parágrafo (até READING_MAX_BYTES)
+    e o texto, e retorna um job_id (202) como POST /jobs. Em
+    GET /jobs/<id>/events cada trecho sai num evento 'transcribing' assim que
+    fica pronto ({chunk: {index, start, end, transcription}, chunks_done,
+    chunks_total}); 'transcribed' traz a transcrição costurada e 'done' a
+    pontuação do parágrafo inteiro.
+    """
+    try:
+        tmp_file_path, text, error_response = save_uploaded_audio(max_size=READING_MAX_BYTES)
+        if error_response:
+            return error_response
+
+        job_id = job_store.create(mode='reading')
+        cancel_token = CancelToken()
+        try:
+            # A preparação (decodificar + VAD) também passa pelo escalonador:
+            # com a fila cheia o cliente recebe 503 na hora
+            future = asr_scheduler.submit(prepare_reading_job, job_id, tmp_file_path, text, cancel_token)
+        except SchedulerOverloaded as e:
+            os.remove(tmp_file_path)
+            job_store.update(job_id, JOB_ERROR, error=str(e))
+            return overloaded_response(e)
+        job_tokens[job_id] = cancel_token
+        cancel_token.add_callback(lambda: cancel_queued_asr(future, tmp_file_path))
+        future.add_done_callback(lambda f: on_reading_prepared(job_id, f))
 
         return jsonify({
-            'ratio': f"{ratio:.2f}",
-            'diff_html': diff_html,
-            'pronunciations': pronunciations,
-            'feedback': feedback,
-            'completeness_score': f"{completeness_score:.2f}"
-        })
+            'job_id': job_id,
+            'status': JOB_QUEUED,
+            'status_url': f'/jobs/{job_id}',
+            'events_url': f'/jobs/{job_id}/events'
+        }), 202
     except Exception as e:
-        print(f"Erro em /upload: {e}")
+        logger.exception(f"Erro em /reading: {e}")
         return jsonify({'error': str(e)}), 500
 
-@app.route('/speak', methods=['POST'])
+
+@app.route('/jobs/<job_id>', methods=['GET'])
+def get_job(job_id):
+    job = job_store.get(job_id)
+    if job is None:
+        return jsonify({'error': "Job não encontrado."}), 404
+    return jsonify(job)
+
+
+@app.route('/jobs/<job_id>', methods=['DELETE'])
+def delete_job(job_id):
+    """Cancela o job: sai da fila do ASR ou é interrompido no próximo ponto de verificação."""
+    job = job_store.get(job_id)
+    if job is None:
+        return jsonify({'error': "Job não encontrado."}), 404
+    cancel_job(job_id, 'client')
+    return jsonify({'job_id': job_id, 'status': job_store.get(job_id)['status']}), 202
+
+
+@app.route('/jobs/<job_id>/events', methods=['GET'])
+def job_events(job_id):
+    """
+    Server-sent events do job. Se o assinante desconectar antes do fim
+    (e não pedir ?cancel_on_disconnect=0), o job é cancelado.
+    """
+    if job_store.get(job_id) is None:
+        return jsonify({'error': "Job não encontrado."}), 404
+    cancel_on_disconnect = request.args.get('cancel_on_disconnect', '1') != '0'
+
+    def stream():
+        try:
+            yield from sse_event_stream(job_store, job_id)
+        finally:
+            job = job_store.get(job_id)
+            if cancel_on_disconnect and job and job['status'] not in FINAL_STATES:
+                cancel_job(job_id, 'disconnect')
+
+    return Response(
+        stream_with_context(stream()),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
+@app.route('/speak', methods=['GET', 'POST'])
 def speak():
-    text = request.form['text']
-    tts = gTTS(text=text, lang='fr')
-    file_path = tempfile.mktemp(suffix=".mp3")
-    tts.save(file_path)
-    return send_file(file_path, as_attachment=True, mimetype='audio/mp3')
+    """
+    Áudio TTS de `text` (form ou query string), servido do cache em disco.
+    GET permite cache no navegador: ETag = chave do conteúdo, 304 se não mudou.
+    """
+    params = request.form if request.method == 'POST' else request.args
+    text = params.get('text', '').strip()
+    if not text:
+        return jsonify({'error': "Texto não fornecido."}), 400
+    voice = params.get('voice', DEFAULT_VOICE)
+    try:
+        speed = float(params.get('speed', DEFAULT_SPEED))
+    except ValueError:
+        return jsonify({'error': "Velocidade inválida."}), 400
+    if not 0.5 <= speed <= 2.0:
+        return jsonify({'error': "Velocidade deve estar entre 0.5 e 2.0."}), 400
+
+    try:
+        cache = get_tts_cache()
+        if voice not in cache.engine.voices:
+            return jsonify({'error': f"Voz não suportada (opções: {', '.join(cache.engine.voices)})."}), 400
+        key = cache.key(text, voice, speed)
+        # Cliques simultâneos na mesma frase sintetizam uma vez só
+        file_path, key, _hit = speak_flight.do(key, cache.get, text, voice, speed)
+    except Exception as e:
+        logger.exception("Erro em /speak")
+        return jsonify({'error': str(e)}), 500
+
+    response = send_file(file_path, mimetype=cache.engine.mimetype, etag=key,
+                         conditional=True, max_age=TTS_MAX_AGE_SECONDS,
+                         download_name='speak' + cache.engine.suffix)
+    response.cache_control.public = True
+    return response
 
 
 
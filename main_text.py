@@ -0,0 +1,33 @@
+# main_text.py
+#
+# Servidor só-texto: serve /pronounce, /hints e /get_sentence sem importar
+# torch, torchaudio, transformers, noisereduce, webrtcvad nem ortools, e sem
+# carregar o modelo ASR. Sobe em bem menos de 1 s e pode ser escalado
+# separadamente do servidor de áudio (main.py).
+#
+#   python main_text.py
+#   gunicorn main_text:app
+#
+# Tempo de inicialização: python benchmarks/bench_startup.py
+
+import logging
+
+from flask import Flask, Response
+
+import Metrics
+from TextRoutes import text_routes
+
+app = Flask(__name__)
+app.register_blueprint(text_routes)
+
+# Configuração do logger
+logging.basicConfig(level=logging.INFO)
+
+
+@app.route('/metrics', methods=['GET'])
+def metrics():
+    return Response(Metrics.render(), content_type=Metrics.CONTENT_TYPE)
+
+
+if __name__ == '__main__':
+    app.run(host='0.0.0.0', port=3001)
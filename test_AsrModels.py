@@ -0,0 +1,114 @@
+from types import SimpleNamespace
+
+import pytest
+
+from AsrModels import (AsrModel, ModelRegistry, RoutingPolicy, install_cancel_checks,
+                       parse_model_specs)
+from Cancellation import CancelToken, OperationCancelled, active
+
+
+class _Param:
+    def __init__(self, count):
+        self.count = count
+
+    def numel(self):
+        return self.count
+
+
+class _Layer:
+    def __init__(self):
+        self.hooks = []
+
+    def register_forward_pre_hook(self, hook):
+        self.hooks.append(hook)
+
+    def __call__(self):
+        for hook in self.hooks:
+            hook(self, ())
+
+
+class _FakeModel:
+    def __init__(self, parameters):
+        self._parameters = [_Param(parameters // 2), _Param(parameters - parameters // 2)]
+
+    def parameters(self):
+        return iter(self._parameters)
+
+
+def _registry(small='base'):
+    large = AsrModel('large', 'org/large', None, _FakeModel(1000))
+    base = AsrModel('base', 'org/base', None, _FakeModel(250))
+    return ModelRegistry([large, base], small=small)
+
+
+def test_parse_model_specs():
+    assert parse_model_specs(' large=org/ckpt-1b , org/ckpt-base/,') == \
+        [('large', 'org/ckpt-1b'), ('ckpt-base', 'org/ckpt-base/')]
+    with pytest.raises(ValueError):
+        parse_model_specs(' , ')
+    with pytest.raises(ValueError):
+        parse_model_specs('a=org/x,a=org/y')
+
+
+def test_registry():
+    registry = _registry()
+    assert registry.default.name == 'large' and registry.small.name == 'base'
+    assert registry.get(None) is registry.default
+    assert registry.models['large'].parameters == 1000
+    with pytest.raises(ValueError):
+        registry.get('medium')
+    assert _registry(small='large').small is None       # o padrão não degrada para si mesmo
+
+
+def test_relative_cost_by_parameters_then_rtf():
+    registry = _registry()
+    assert registry.relative_cost(registry.default) == 1.0
+    assert registry.relative_cost(registry.small) == 0.25
+    registry.default.observe(10.0, 5.0)
+    registry.small.observe(10.0, 0.5)
+    assert registry.relative_cost(registry.small) == pytest.approx(0.1)
+    registry.small.observe(10.0, 1.5)                    # média móvel
+    assert registry.small.rtf == pytest.approx(0.05 + 0.2 * (0.15 - 0.05))
+
+
+@pytest.mark.parametrize('kwargs, expected', [
+    ({'audio_seconds': 5.0}, ('large', 'default')),
+    ({'audio_seconds': 1.5}, ('base', 'duration')),
+    ({'audio_seconds': 0.0}, ('large', 'default')),
+    ({'audio_seconds': 5.0, 'category': 'mots'}, ('base', 'category')),
+    ({'audio_seconds': 5.0, 'pressure': 0.6}, ('base', 'pressure')),
+    ({'audio_seconds': 5.0, 'pressure': 0.4}, ('large', 'default')),
+])
+def test_routing_reasons(kwargs, expected):
+    policy = RoutingPolicy(_registry(), small_max_seconds=2.0, small_categories=['mots'],
+                           degrade_pressure=0.5)
+    model, reason = policy.choose(**kwargs)
+    assert (model.name, reason) == expected
+
+
+def test_single_model_always_default():
+    policy = RoutingPolicy(_registry(small=None), small_categories=['mots'])
+    assert policy.choose(1.0, category='mots', pressure=1.0) == (policy.registry.default, 'default')
+    assert policy.fallback(policy.registry.default) is None
+
+
+def test_fallback():
+    policy = RoutingPolicy(_registry())
+    assert policy.fallback(policy.registry.default) is policy.registry.small
+    assert policy.fallback(policy.registry.small) is None
+
+
+def test_cancel_checks_on_every_layer():
+    layers = [_Layer() for _ in range(3)]
+    model = SimpleNamespace(wav2vec2=SimpleNamespace(
+        feature_extractor=SimpleNamespace(conv_layers=layers[:1]),
+        encoder=SimpleNamespace(layers=layers[1:])))
+    assert install_cancel_checks(model) == 3
+    assert install_cancel_checks(_FakeModel(10)) == 0
+
+    token = CancelToken()
+    with active(token):
+        layers[2]()
+        token.cancel('client')
+        with pytest.raises(OperationCancelled):
+            layers[0]()
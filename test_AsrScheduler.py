@@ -0,0 +1,100 @@
+import time
+import threading
+
+import pytest
+
+from AsrScheduler import AsrScheduler, SchedulerOverloaded
+from Cancellation import OperationCancelled
+
+
+@pytest.fixture
+def blocked():
+    """Scheduler de 1 worker ocupado até release.set(): os próximos jobs ficam na fila."""
+    release = threading.Event()
+    started = threading.Event()
+
+    def make(**kwargs):
+        scheduler = AsrScheduler(workers=1, initial_rtf=0.5, overhead_seconds=0.2, **kwargs)
+        scheduler.submit(lambda: (started.set(), release.wait(5)))
+        assert started.wait(5)
+        return scheduler
+
+    yield make, release
+    release.set()
+
+
+def _order(scheduler, jobs):
+    order = []
+    futures = [scheduler.submit(order.append, name, audio_seconds=seconds) for name, seconds in jobs]
+    return order, futures
+
+
+def test_shortest_job_first(blocked):
+    make, release = blocked
+    scheduler = make(aging_rate=0.0)
+    order, futures = _order(scheduler, [('long', 20.0), ('short', 1.0), ('medium', 5.0)])
+    release.set()
+    for future in futures:
+        future.result(5)
+    assert order == ['short', 'medium', 'long']
+
+
+def test_aging_lets_waiting_job_pass(blocked):
+    make, release = blocked
+    scheduler = make(aging_rate=100.0)
+    order, futures = _order(scheduler, [('long', 10.0)])
+    time.sleep(0.1)  # 0.1 s de espera valem 10 s de custo, mais que a diferença (4.5 s)
+    more_order, more = _order(scheduler, [('short', 1.0)])
+    release.set()
+    for future in futures + more:
+        future.result(5)
+    assert order + more_order == ['long', 'short']
+
+
+def test_admission_rejects_over_budget(blocked):
+    make, release = blocked
+    scheduler = make(max_queued_seconds=3.0)
+    scheduler.submit(lambda: None, audio_seconds=4.0)       # custo 2.2
+    with pytest.raises(SchedulerOverloaded) as info:
+        scheduler.submit(lambda: None, audio_seconds=4.0)
+    assert info.value.retry_after >= 1
+    assert scheduler.stats()['rejected'] == 1
+
+
+def test_single_job_over_budget_accepted_when_queue_empty(blocked):
+    make, release = blocked
+    scheduler = make(max_queued_seconds=1.0)
+    future = scheduler.submit(lambda: 'ok', audio_seconds=60.0)
+    release.set()
+    assert future.result(5) == 'ok'
+
+
+def test_cancelled_in_queue_leaves_the_queue(blocked):
+    make, release = blocked
+    scheduler = make(max_queued_seconds=3.0)
+    future = scheduler.submit(lambda: None, audio_seconds=4.0)
+    assert scheduler.stats()['queue_depth'] == 1
+    assert future.cancel()
+    stats = scheduler.stats()
+    assert stats['queue_depth'] == 0
+    assert stats['queued_seconds'] == 0
+    assert stats['cancelled'] == 1
+    # O orçamento liberado volta a aceitar um job do mesmo tamanho
+    scheduler.submit(lambda: None, audio_seconds=4.0)
+    assert scheduler.stats()['queue_depth'] == 1
+
+
+def test_operation_cancelled_counts_as_cancelled():
+    scheduler = AsrScheduler(workers=1)
+
+    def job():
+        raise OperationCancelled('cliente desistiu')
+
+    future = scheduler.submit(job, audio_seconds=1.0)
+    with pytest.raises(OperationCancelled):
+        future.result(5)
+    deadline = time.monotonic() + 5
+    while scheduler.stats()['cancelled'] != 1 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert scheduler.stats()['completed'] == 0
+    assert scheduler.stats()['cancelled'] == 1
@@ -0,0 +1,105 @@
+import io
+import struct
+import wave
+
+import numpy as np
+import pytest
+
+import AudioInput
+from AudioInput import FAST_FORMAT, WAVE_FORMAT_EXTENSIBLE, WAVE_FORMAT_PCM
+
+SAMPLES = np.array([0, 1, -1, 16384, -32768, 32767], dtype='<i2')
+
+
+def _chunk(chunk_id, body, size=None):
+    header = chunk_id + struct.pack('<I', len(body) if size is None else size)
+    return header + body + (b'\0' if len(body) & 1 else b'')
+
+
+def _fmt(audio_format=WAVE_FORMAT_PCM, channels=1, rate=16000, bits=16, extensible_as=None):
+    align = channels * bits // 8
+    body = struct.pack('<HHIIHH', audio_format, channels, rate, rate * align, align, bits)
+    if extensible_as is not None:
+        # cbSize, bits válidos, máscara de canais, SubFormat GUID (2 primeiros bytes = formato)
+        body += struct.pack('<HHI', 22, bits, 4) + struct.pack('<H', extensible_as) + bytes(14)
+    return _chunk(b'fmt ', body)
+
+
+def _wav(*chunks):
+    body = b'WAVE' + b''.join(chunks)
+    return b'RIFF' + struct.pack('<I', len(body)) + body
+
+
+def _recorder_wav(samples=SAMPLES):
+    return _wav(_fmt(), _chunk(b'data', samples.tobytes()))
+
+
+def test_matches_the_stdlib_wave_writer():
+    buffer = io.BytesIO()
+    with wave.open(buffer, 'wb') as f:
+        f.setnchannels(1)
+        f.setsampwidth(2)
+        f.setframerate(16000)
+        f.writeframes(SAMPLES.tobytes())
+    data = buffer.getvalue()
+    assert AudioInput.sniff_format(data) == FAST_FORMAT
+    np.testing.assert_array_equal(AudioInput.pcm16_samples(data), SAMPLES / np.float32(32768))
+
+
+def test_samples_into_caller_buffer():
+    scratch = np.full(16, np.nan, dtype=np.float32)
+    samples = AudioInput.pcm16_samples(_recorder_wav(), out=lambda n: scratch[:n])
+    assert samples.base is scratch
+    assert samples.dtype == np.float32 and samples[3] == 0.5 and samples[4] == -1.0
+
+
+def test_extensible_pcm_is_the_fast_format():
+    data = _wav(_fmt(WAVE_FORMAT_EXTENSIBLE, extensible_as=WAVE_FORMAT_PCM), _chunk(b'data', SAMPLES.tobytes()))
+    assert AudioInput.parse_wav_header(data)['format'] == WAVE_FORMAT_PCM
+    assert AudioInput.sniff_format(data) == FAST_FORMAT
+    float_data = _wav(_fmt(WAVE_FORMAT_EXTENSIBLE, bits=32, extensible_as=3), _chunk(b'data', bytes(8)))
+    assert AudioInput.sniff_format(float_data) == 'wav'
+    assert AudioInput.pcm16_samples(float_data) is None
+
+
+@pytest.mark.parametrize('declared', [0, 0xFFFFFFFF])
+def test_streaming_recorder_data_size(declared):
+    data = _wav(_fmt(), _chunk(b'data', SAMPLES.tobytes(), size=declared))
+    header = AudioInput.parse_wav_header(data)
+    assert header['data_size'] == SAMPLES.nbytes       # vale o que chegou
+    assert len(AudioInput.pcm16_samples(data)) == len(SAMPLES)
+
+
+def test_odd_sized_chunk_is_padded():
+    data = _wav(_fmt(), _chunk(b'LIST', b'INFOabc'), _chunk(b'data', SAMPLES.tobytes()))
+    header = AudioInput.parse_wav_header(data)
+    assert data[header['data_offset'] - 8:header['data_offset'] - 4] == b'data'
+    np.testing.assert_array_equal(AudioInput.pcm16_samples(data), SAMPLES / np.float32(32768))
+
+
+def test_odd_trailing_byte_is_ignored():
+    data = _wav(_fmt(), _chunk(b'data', SAMPLES.tobytes() + b'\x7f'))
+    assert len(AudioInput.pcm16_samples(data)) == len(SAMPLES)
+    assert not AudioInput.is_empty_wav(data)
+
+
+@pytest.mark.parametrize('payload', [b'', b'\x01'])
+def test_empty_data_chunk(payload):
+    data = _wav(_fmt(), _chunk(b'data', payload))
+    assert AudioInput.is_empty_wav(data)
+    assert AudioInput.pcm16_samples(data).size == 0
+    stereo = _wav(_fmt(channels=2), _chunk(b'data', bytes(2)))
+    assert AudioInput.is_empty_wav(stereo)
+
+
+@pytest.mark.parametrize('data, expected', [
+    (b'OggS' + bytes(40), 'ogg'),
+    (b'\x1aE\xdf\xa3' + bytes(40), 'webm'),
+    (bytes(4) + b'ftypisom' + bytes(40), 'mp4'),
+    (b'ID3' + bytes(40), 'mp3'),
+    (_wav(_fmt(rate=44100), _chunk(b'data', bytes(4))), 'wav'),
+    (_wav(_chunk(b'data', bytes(4))), 'other'),           # data antes de fmt
+    (b'RIFF' + bytes(4) + b'AVI ', 'other'),
+])
+def test_sniff_format(data, expected):
+    assert AudioInput.sniff_format(data) == expected
@@ -0,0 +1,101 @@
+import threading
+from types import SimpleNamespace
+
+import pytest
+
+import Cancellation
+from AsrModels import install_cancel_checks
+from Cancellation import CancelToken, OperationCancelled, check_cancelled
+
+
+def test_cancel_runs_callbacks_once():
+    token = CancelToken()
+    calls = []
+    token.add_callback(lambda: calls.append('a'))
+    token.cancel('timeout')
+    token.cancel('client')
+    assert calls == ['a']
+    assert token.reason == 'timeout'
+    with pytest.raises(OperationCancelled, match='timeout'):
+        token.raise_if_cancelled()
+
+
+def test_callback_added_after_cancel_runs_immediately():
+    token = CancelToken()
+    token.cancel()
+    calls = []
+    token.add_callback(lambda: calls.append('late'))
+    assert calls == ['late']
+
+
+def test_removed_callback_is_not_called():
+    token = CancelToken()
+    calls = []
+    callback = lambda: calls.append('x')
+    token.add_callback(callback)
+    token.remove_callback(callback)
+    token.cancel()
+    assert calls == []
+
+
+def test_cancellation_counts_by_reason():
+    before = Cancellation.cancellation_counts().get('disconnect', 0)
+    CancelToken().cancel('disconnect')
+    assert Cancellation.cancellation_counts()['disconnect'] == before + 1
+
+
+def test_check_cancelled_accepts_none():
+    check_cancelled(None)
+    check_cancelled(CancelToken())
+
+
+def test_active_token_is_per_context():
+    token = CancelToken()
+    token.cancel()
+    Cancellation.check_active()
+    with Cancellation.active(token):
+        with pytest.raises(OperationCancelled):
+            Cancellation.check_active()
+        # Outra thread não herda o token ativo
+        errors = []
+        thread = threading.Thread(target=lambda: errors.append(_raises(Cancellation.check_active)))
+        thread.start()
+        thread.join()
+        assert errors == [False]
+    Cancellation.check_active()
+
+
+def _raises(fn):
+    try:
+        fn()
+    except OperationCancelled:
+        return True
+    return False
+
+
+class _Layer:
+    def __init__(self):
+        self.hooks = []
+
+    def register_forward_pre_hook(self, hook):
+        self.hooks.append(hook)
+
+    def __call__(self):
+        for hook in self.hooks:
+            hook(self, ())
+
+
+def test_install_cancel_checks_between_layers():
+    conv = [_Layer() for _ in range(2)]
+    layers = [_Layer() for _ in range(3)]
+    model = SimpleNamespace(wav2vec2=SimpleNamespace(
+        feature_extractor=SimpleNamespace(conv_layers=conv),
+        encoder=SimpleNamespace(layers=layers)))
+    assert install_cancel_checks(model) == 5
+
+    token = CancelToken()
+    with Cancellation.active(token):
+        layers[0]()
+        token.cancel()
+        with pytest.raises(OperationCancelled):
+            layers[1]()
@@ -0,0 +1,68 @@
+import pytest
+
+from ContextRules import ContextRules, GroupRule, WordRule, LiaisonRule, apply_liaison
+from SpecialRoules import FRENCH_CONTEXT_RULES
+
+
+def _tokens(sentence):
+    return FRENCH_CONTEXT_RULES.apply(sentence.split())
+
+
+@pytest.mark.parametrize('sentence, sources', [
+    ('Est-ce que tu viens', [0, 1, 2, 3]),
+    ('est ce que tu viens', [0, 2, 3, 4]),
+    ('est-ce-que tu viens', [0, 0, 1, 2]),
+])
+def test_est_ce_que_groups(sentence, sources):
+    tokens, got_sources, _ = _tokens(sentence)
+    assert tokens == ['éss', 'ke', 'tu', 'viens']
+    assert got_sources == sources
+
+
+@pytest.mark.parametrize('sentence, expected', [
+    ('il ne mange plus', 'plys'),        # a negação tem de vir logo antes
+    ('il mange ne plus', 'ply'),
+    ('ne plus ici', 'plyz'),
+    ('plus grand', 'plys'),
+])
+def test_plus_by_neighbours(sentence, expected):
+    tokens, sources, _ = _tokens(sentence)
+    assert tokens[sources.index(sentence.split().index('plus'))] == expected
+
+
+def test_est_depends_on_the_produced_subject():
+    assert _tokens('il est là')[0][1] == 'ɛ'
+    assert _tokens("c' est là")[0][1] == 'ɛ'
+    assert _tokens('à l est')[0][2] == 'ɛst'
+    assert _tokens('est')[0] == ['ɛst']                  # fora da frase a condição é falsa
+
+
+def test_liaisons():
+    assert _tokens('les amis')[2] == [('e', 'z'), None]
+    assert _tokens('les haricots')[2] == [None, None]   # 'h' aspirado
+    assert _tokens('grand arbre')[2] == [('', 't'), None]
+    assert _tokens('petit chat')[2] == [None, None]
+
+
+def test_apply_liaison():
+    assert apply_liaison('le', ('e', 'z')) == 'lz'
+    assert apply_liaison('grɑ̃', ('', 't')) == 'grɑ̃t'
+    assert apply_liaison('ami', None) == 'ami'
+
+
+def test_custom_rules_are_data():
+    rules = ContextRules(
+        groups=[GroupRule([('a', 'an'), 'b'], ['AB'], [1])],
+        words=[WordRule('x', [([(+1, str.isdigit)], 'X#')], default='X')],
+        liaison=LiaisonRule(before=lambda token: token.startswith('o'),
+                            by_word={'AB': ('B', '-')}, by_last_letter={'X': ('', '+')}),
+    )
+    tokens, sources, liaisons = rules.apply(['An', 'B', 'x', '1', 'x', 'o', 'AB', 'o'])
+    assert tokens == ['AB', 'X#', '1', 'X', 'o', 'AB', 'o']
+    assert sources == [1, 2, 3, 4, 5, 6, 7]
+    assert liaisons == [None, None, None, ('', '+'), None, ('B', '-'), None]
+
+
+def test_without_liaison_rule():
+    tokens, sources, liaisons = ContextRules().apply(['Les', 'amis'])
+    assert (tokens, sources, liaisons) == (['Les', 'amis'], [0, 1], [None, None])
@@ -0,0 +1,92 @@
+import random
+
+import pytest
+
+from IncrementalPronunciation import (PronunciationSession, SessionStore, SessionNotFound,
+                                      VersionConflict, InvalidEdit)
+from TextPipeline import transliterate_and_convert_sentence
+
+SENTENCES = [
+    "Est-ce que les enfants ont fini leurs devoirs",
+    "Il y a plus de deux amis qui sont arrivés",
+    "Nous avons un petit ami à Paris",
+]
+
+
+def _apply_client_side(outputs, change):
+    # O que o frontend faz: outputs.splice(start, delete, ...novos)
+    outputs[change['start']:change['start'] + change['delete']] = change['outputs']
+
+
+def _check(session, client_outputs):
+    full = PronunciationSession(session.text)
+    assert session.output_strings() == full.output_strings()
+    assert client_outputs == full.output_strings()
+
+
+def test_typing_matches_full_recompute():
+    session = PronunciationSession('')
+    client = session.output_strings()
+    for char in SENTENCES[0]:
+        change = session.apply_edit(len(session.text), 0, char)
+        if change:
+            _apply_client_side(client, change)
+    _check(session, client)
+    assert session.pronunciation() == transliterate_and_convert_sentence(SENTENCES[0])
+
+
+@pytest.mark.parametrize('seed', range(3))
+def test_random_edits_match_full_recompute(seed):
+    rng = random.Random(seed)
+    session = PronunciationSession(SENTENCES[seed])
+    client = session.output_strings()
+    for _ in range(40):
+        pos = rng.randint(0, len(session.text))
+        delete = rng.randint(0, min(3, len(session.text) - pos))
+        insert = rng.choice(['', ' ', 'e', 'les ', ' ami', 'plus', "l'", 'ont'])
+        change = session.apply_edit(pos, delete, insert)
+        if change:
+            _apply_client_side(client, change)
+    _check(session, client)
+
+
+def test_change_is_trimmed_to_affected_tokens():
+    session = PronunciationSession(SENTENCES[2])
+    change = session.apply_edit(len(session.text), 0, 'ien')    # Paris -> Parisien
+    assert change['start'] == len(session.tokens) - 1
+    assert change['delete'] == 1
+    assert session.apply_edit(0, 0, '') is None
+
+
+def test_invalid_edit():
+    session = PronunciationSession('bonjour')
+    with pytest.raises(InvalidEdit):
+        session.apply_edit(5, 10, '')
+    with pytest.raises(InvalidEdit):
+        session.apply_edit(-1, 0, 'a')
+
+
+def test_store_versions_and_conflicts():
+    store = SessionStore()
+    session_id, session = store.create('bonjour')
+    version, changes = store.edit(session_id, 0, [{'pos': 7, 'insert': ' madame'}])
+    assert version == 1 and changes
+    with pytest.raises(VersionConflict):
+        store.edit(session_id, 0, [{'pos': 0, 'insert': 'a'}])
+    with pytest.raises(SessionNotFound):
+        store.edit('inexistente', 0, [])
+
+
+def test_store_eviction():
+    store = SessionStore(max_sessions=2, ttl_seconds=1800)
+    first, _ = store.create('un')
+    store.create('deux')
+    store.create('trois')
+    with pytest.raises(SessionNotFound):
+        store.get(first)
+
+    expiring = SessionStore(ttl_seconds=60)
+    session_id, session = expiring.create('un')
+    session.last_used -= 61
+    with pytest.raises(SessionNotFound):
+        expiring.get(session_id)
@@ -0,0 +1,57 @@
+import numpy as np
+import pytest
+
+from LogitsStore import LogitsStore, AttemptNotFound, encode_logits, decode_logits
+
+
+def _logits(seed, frames=50, vocab=40):
+    return np.random.default_rng(seed).normal(0, 8, size=(frames, vocab)).astype(np.float32)
+
+
+def test_round_trip_within_fp16_tolerance():
+    logits = _logits(0)
+    shape, blob = encode_logits(logits)
+    restored = decode_logits(shape, blob)
+    assert restored.dtype == np.float32 and restored.shape == logits.shape
+    np.testing.assert_allclose(restored, logits, rtol=1e-3, atol=1e-3)
+    assert (restored.argmax(axis=-1) == logits.argmax(axis=-1)).mean() > 0.99
+    assert len(blob) < logits.nbytes // 2 + 64
+
+
+def test_get_returns_the_attempt():
+    store = LogitsStore()
+    attempt_id = store.put(_logits(1), 'bonjour', 'bonjou', model='base')
+    logits, text, transcription, model = store.get(attempt_id)
+    assert (text, transcription, model) == ('bonjour', 'bonjou', 'base')
+    assert logits.shape == (50, 40)
+    with pytest.raises(AttemptNotFound):
+        store.get('inexistente')
+
+
+def test_eviction_by_bytes_keeps_the_newest():
+    one = len(encode_logits(_logits(0))[1])
+    store = LogitsStore(max_bytes=int(one * 2.5))
+    first, second = store.put(_logits(0), 'a', 'a'), store.put(_logits(1), 'b', 'b')
+    store.get(first)                                     # LRU: first passa a ser o mais recente
+    third = store.put(_logits(2), 'c', 'c')
+    with pytest.raises(AttemptNotFound):
+        store.get(second)
+    store.get(first)
+    store.get(third)
+    assert store.stats()['attempts'] == 2
+    assert store.stats()['bytes'] <= store.max_bytes
+
+    # Uma tentativa maior que o limite inteiro ainda fica (é a última)
+    tiny = LogitsStore(max_bytes=1)
+    ids = [tiny.put(_logits(seed), 'x', 'x') for seed in range(3)]
+    assert tiny.stats()['attempts'] == 1
+    tiny.get(ids[-1])
+
+
+def test_expired_attempt_is_not_found():
+    store = LogitsStore(ttl_seconds=60)
+    attempt_id = store.put(_logits(0), 'a', 'a')
+    store._attempts[attempt_id].created -= 61
+    with pytest.raises(AttemptNotFound):
+        store.get(attempt_id)
+    assert store.stats() == {'attempts': 0, 'bytes': 0, 'max_bytes': store.max_bytes}
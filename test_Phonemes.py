@@ -0,0 +1,36 @@
+import Phonemes
+import TextPipeline
+import WordMetrics
+
+
+def test_nasal_is_one_phoneme():
+    assert Phonemes.split_phonemes('bɔ̃ʒuʁ') == ('b', 'ɔ̃', 'ʒ', 'u', 'ʁ')
+    assert len(Phonemes.encode('bɔ̃ʒuʁ')) == 5
+
+
+def test_inventory_round_trip():
+    codes = Phonemes.encode('ʃɑ̃ pa.ʁi')
+    assert isinstance(codes, bytes)
+    assert Phonemes.decode(codes) == 'ʃɑ̃ pa.ʁi'
+
+
+def test_unknown_symbols_keep_identity():
+    assert Phonemes.encode('伀企') != Phonemes.encode('伂伃')
+    assert Phonemes.decode(Phonemes.encode('a伀')) == 'a伀'
+    assert WordMetrics.hybrid_similarity('伀企', '伂伃') < 1
+
+
+def test_many_unknown_symbols_do_not_grow_the_table():
+    # Mais de 256 símbolos distintos fora do inventário (antes: tabela cheia e IndexError)
+    size = len(Phonemes._symbols)
+    unknown = [chr(0x4E00 + i) for i in range(300)]
+    for char in unknown:
+        assert TextPipeline.convert_pronunciation_to_portuguese('a' + char) == 'a' + char
+    assert len(Phonemes._symbols) == size
+    assert TextPipeline.convert_pronunciation_to_portuguese('bɔ̃ʒuʁ') == \
+        TextPipeline._convert_codes_to_portuguese(Phonemes.encode('bɔ̃ʒuʁ'))
+    assert WordMetrics.hybrid_similarity(unknown[-2] + unknown[-1], unknown[-3] + unknown[-4]) < 1
+
+
+def test_unknown_code_maps_to_empty():
+    assert TextPipeline._portuguese_mapping(Phonemes.UNKNOWN) == {'default': ''}
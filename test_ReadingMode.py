@@ -0,0 +1,97 @@
+import threading
+
+import numpy as np
+
+from AsrScheduler import AsrScheduler
+from Cancellation import CancelToken, OperationCancelled
+from ReadingMode import (ChunkedTranscription, plan_chunks, stitch_transcripts,
+                         SAMPLE_RATE, FRAME_MS, CHUNK_MIN_SECONDS, CHUNK_MAX_SECONDS)
+
+SAMPLES_PER_FRAME = SAMPLE_RATE * FRAME_MS // 1000
+FRAMES_PER_SECOND = 1000 // FRAME_MS
+
+
+def _speech(*segments):
+    """[(segundos, fala?)] -> um bool por quadro."""
+    voiced = []
+    for seconds, is_voiced in segments:
+        voiced += [is_voiced] * int(seconds * FRAMES_PER_SECOND)
+    return voiced
+
+
+def test_short_recording_is_one_chunk():
+    voiced = _speech((5, True))
+    assert plan_chunks(voiced, len(voiced) * SAMPLES_PER_FRAME + 100) == \
+        [(0, len(voiced) * SAMPLES_PER_FRAME + 100, 1.0)]
+
+
+def test_cuts_in_the_middle_of_silences():
+    voiced = _speech((14, True), (1, False), (14, True), (1, False), (14, True))
+    total = len(voiced) * SAMPLES_PER_FRAME
+    chunks = plan_chunks(voiced, total)
+    assert len(chunks) == 3
+    assert chunks[0][0] == 0 and chunks[-1][1] == total
+    for (_, end, _), (start, _, _) in zip(chunks, chunks[1:]):
+        assert end == start
+        assert not voiced[end // SAMPLES_PER_FRAME]     # corte dentro do silêncio
+
+
+def test_continuous_speech_is_cut_at_the_maximum():
+    voiced = _speech((80, True))
+    chunks = plan_chunks(voiced, len(voiced) * SAMPLES_PER_FRAME)
+    for start, end, _ in chunks[:-1]:
+        assert CHUNK_MIN_SECONDS <= (end - start) / SAMPLE_RATE <= CHUNK_MAX_SECONDS
+
+
+def test_stitch_skips_empty_chunks():
+    assert stitch_transcripts([' bonjour ', '', None, 'madame']) == 'bonjour madame'
+
+
+def _run(chunks, transcribe, cancel_token=None, max_in_flight=2):
+    scheduler = AsrScheduler(workers=2)
+    waveform = np.zeros((1, chunks[-1][1] if chunks else 0), dtype=np.float32)
+    done = threading.Event()
+    events = {'chunks': [], 'done': None, 'error': None}
+
+    def on_done(texts):
+        events['done'] = texts
+        done.set()
+
+    def on_error(error):
+        events['error'] = error
+        done.set()
+
+    job = ChunkedTranscription(scheduler, transcribe, waveform, chunks, cancel_token or CancelToken(),
+                               on_chunk=lambda i, text, ready: events['chunks'].append(i),
+                               on_done=on_done, on_error=on_error, max_in_flight=max_in_flight)
+    job.start()
+    assert done.wait(5)
+    return events
+
+
+def test_chunks_transcribed_and_stitched_in_order():
+    chunks = [(0, 16000, 1.0), (16000, 48000, 1.0), (48000, 64000, 0.0), (64000, 80000, 0.9)]
+    events = _run(chunks, lambda samples, token: f'{samples.shape[-1]}')
+    assert events['error'] is None
+    assert events['done'] == ['16000', '32000', '', '16000']   # o trecho sem fala nem vai ao modelo
+    assert sorted(events['chunks']) == [0, 1, 2, 3]
+
+
+def test_failure_is_reported_once():
+    def transcribe(samples, token):
+        raise RuntimeError('falhou')
+
+    events = _run([(0, 16000, 1.0), (16000, 32000, 1.0)], transcribe)
+    assert isinstance(events['error'], RuntimeError)
+    assert events['done'] is None
+
+
+def test_cancelled_token_stops_the_job():
+    token = CancelToken()
+    token.cancel('client')
+    events = _run([(0, 16000, 1.0)], lambda samples, t: 'x', cancel_token=token)
+    assert isinstance(events['error'], OperationCancelled)
+
+
+def test_no_chunks_finishes_immediately():
+    assert _run([], lambda samples, token: 'x')['done'] == []
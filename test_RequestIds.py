@@ -0,0 +1,31 @@
+import pytest
+from flask import Flask, jsonify
+
+import RequestIds
+
+
+@pytest.mark.parametrize('header', ['abc-123_X', 'a' * 64])
+def test_accepts_proxy_id(header):
+    assert RequestIds.request_id({'HTTP_X_REQUEST_ID': header}) == header
+
+
+@pytest.mark.parametrize('header', ['', 'a' * 65, '../etc', 'a b', 'é'])
+def test_rejects_unsafe_proxy_id(header):
+    found = RequestIds.request_id({'HTTP_X_REQUEST_ID': header})
+    assert found != header
+    assert len(found) == 32
+
+
+def test_same_id_for_the_whole_request():
+    environ = {}
+    assert RequestIds.request_id(environ) == RequestIds.request_id(environ)
+
+
+def test_tag_response_plain_and_tuple():
+    app = Flask(__name__)
+    with app.app_context():
+        response = RequestIds.tag_response(jsonify({}), 'X-Trace-Id', 'abc')
+        assert response.headers['X-Trace-Id'] == 'abc'
+        response, status = RequestIds.tag_response((jsonify({}), 404), 'X-Profile-Id', 'abc')
+        assert (response.headers['X-Profile-Id'], status) == ('abc', 404)
+        assert RequestIds.tag_response('texto', 'X-Trace-Id', 'abc') == 'texto'
@@ -0,0 +1,119 @@
+import threading
+
+import pytest
+
+from Cancellation import OperationCancelled
+from ScoringJobs import (JobStore, ScoringJobQueue, JobQueueFull, sse_event_stream,
+                         JOB_QUEUED, JOB_TRANSCRIBING, JOB_TRANSCRIBED, JOB_DONE, JOB_ERROR,
+                         JOB_CANCELLED)
+
+
+def _statuses(store, job_id):
+    events, _ = store.wait_for_events(job_id, 0, timeout=0)
+    return [event['status'] for event in events]
+
+
+def test_job_lifecycle_and_events():
+    store = JobStore()
+    job_id = store.create(text='bonjour')
+    assert store.get(job_id)['status'] == JOB_QUEUED
+    store.update(job_id, JOB_TRANSCRIBING)
+    store.update(job_id, JOB_TRANSCRIBED, transcription='bonjou')
+    store.update(job_id, JOB_DONE, result={'score': 0.9})
+    job = store.get(job_id)
+    assert (job['text'], job['transcription'], job['result']) == ('bonjour', 'bonjou', {'score': 0.9})
+    assert 'events' not in job
+    assert _statuses(store, job_id) == [JOB_QUEUED, JOB_TRANSCRIBING, JOB_TRANSCRIBED, JOB_DONE]
+
+
+@pytest.mark.parametrize('final', [JOB_DONE, JOB_ERROR, JOB_CANCELLED])
+def test_final_state_is_not_reopened(final):
+    store = JobStore()
+    job_id = store.create()
+    store.update(job_id, final, error='fim')
+    store.update(job_id, JOB_TRANSCRIBED, transcription='atrasada')     # callback atrasado
+    store.update(job_id, JOB_ERROR, error='outro')
+    job = store.get(job_id)
+    assert (job['status'], job['error'], job['transcription']) == (final, 'fim', None)
+    assert _statuses(store, job_id) == [JOB_QUEUED, final]
+
+
+def test_unknown_job():
+    store = JobStore()
+    store.update('inexistente', JOB_DONE)
+    assert store.get('inexistente') is None
+    assert store.wait_for_events('inexistente', 0, timeout=0) == (None, 0)
+
+
+def test_finished_jobs_expire():
+    store = JobStore(ttl_seconds=60)
+    done, running = store.create(), store.create()
+    store.update(done, JOB_DONE)
+    store.update(running, JOB_TRANSCRIBING)
+    for job_id in (done, running):
+        store._jobs[job_id]['updated_at'] -= 61
+    store.create()                                      # a remoção acontece na criação
+    assert store.get(done) is None
+    assert store.get(running) is not None               # só jobs finalizados expiram
+
+
+def test_sse_stream_ends_on_final_state():
+    store = JobStore()
+    job_id = store.create()
+    store.update(job_id, JOB_TRANSCRIBED, transcription='bonjour')
+    store.update(job_id, JOB_DONE, result={})
+    events = list(sse_event_stream(store, job_id, keepalive_seconds=0.01))
+    assert [e.split('\n', 1)[0] for e in events] == \
+        ['event: queued', 'event: transcribed', 'event: done']
+    assert list(sse_event_stream(store, 'x'))[0].startswith('event: error')
+
+
+def _queue(handler, **kwargs):
+    store = JobStore()
+    return store, ScoringJobQueue(store, handler, **kwargs)
+
+
+def _wait_final(store, job_id):
+    cursor = 0
+    while store.get(job_id)['status'] not in (JOB_DONE, JOB_ERROR, JOB_CANCELLED):
+        events, cursor = store.wait_for_events(job_id, cursor, timeout=5)
+        assert events, 'job não terminou'
+    return store.get(job_id)
+
+
+def test_queue_runs_handler_and_maps_errors():
+    def handler(job_id, payload):
+        if payload == 'falha':
+            raise RuntimeError('falhou')
+        if payload == 'cancela':
+            raise OperationCancelled('client')
+        store.update(job_id, JOB_DONE, result=payload)
+
+    store, jobs = _queue(handler)
+    done, failed, cancelled = (jobs.submit(p) for p in ('ok', 'falha', 'cancela'))
+    assert _wait_final(store, done)['result'] == 'ok'
+    assert _wait_final(store, failed)['error'] == 'falhou'
+    assert _wait_final(store, cancelled)['status'] == JOB_CANCELLED
+
+
+def test_full_queue_rejects():
+    started, release = threading.Event(), threading.Event()
+    rejected = []
+
+    def handler(job_id, payload):
+        started.set()
+        release.wait(5)
+
+    store, jobs = _queue(handler, max_pending=1, workers=1, on_reject=rejected.append)
+    try:
+        jobs.submit('a')
+        assert started.wait(5)                          # o worker já tirou 'a' da fila
+        jobs.submit('b')
+        with pytest.raises(JobQueueFull):
+            jobs.submit('c')
+        assert rejected == ['c']
+        [failed] = [job for job in store._jobs.values() if job['status'] == JOB_ERROR]
+        assert failed['error'] == "Fila de jobs cheia."
+        assert jobs.pending() == 1
+    finally:
+        release.set()
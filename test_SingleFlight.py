@@ -0,0 +1,88 @@
+import time
+import threading
+
+import pytest
+
+from SingleFlight import SingleFlight, SINGLEFLIGHT_REQUESTS
+
+
+def _run_concurrently(flight, key, fn, callers):
+    results, errors = [], []
+
+    def call():
+        try:
+            results.append(flight.do(key, fn))
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=call) for _ in range(callers)]
+    for thread in threads:
+        thread.start()
+    return threads, results, errors
+
+
+def _leader_blocked_until(release, started, calls, result=None, error=None):
+    def fn():
+        calls.append(1)
+        started.set()
+        release.wait(5)
+        if error is not None:
+            raise error
+        return result
+    return fn
+
+
+def _wait_for_followers(group, count):
+    # Os seguidores contam como coalesced antes de esperar pelo líder
+    deadline = time.monotonic() + 5
+    while SINGLEFLIGHT_REQUESTS.value(group=group, role='coalesced') < count:
+        assert time.monotonic() < deadline
+        time.sleep(0.001)
+
+
+def test_concurrent_callers_share_one_execution():
+    flight = SingleFlight('test-shared')
+    release, started, calls = threading.Event(), threading.Event(), []
+    fn = _leader_blocked_until(release, started, calls, result={'ok': 1})
+    threads, results, errors = _run_concurrently(flight, 'k', fn, callers=5)
+    assert started.wait(5)
+    _wait_for_followers('test-shared', 4)
+    assert flight.in_flight() == 1
+    release.set()
+    for thread in threads:
+        thread.join(5)
+    assert calls == [1]
+    assert errors == []
+    assert len(results) == 5 and all(r is results[0] for r in results)
+    assert flight.in_flight() == 0
+
+
+def test_error_is_shared_by_waiters():
+    flight = SingleFlight('test-error')
+    release, started, calls = threading.Event(), threading.Event(), []
+    fn = _leader_blocked_until(release, started, calls, error=ValueError('falhou'))
+    threads, results, errors = _run_concurrently(flight, 'k', fn, callers=3)
+    assert started.wait(5)
+    _wait_for_followers('test-error', 2)
+    release.set()
+    for thread in threads:
+        thread.join(5)
+    assert calls == [1]
+    assert results == []
+    assert len(errors) == 3 and all(isinstance(e, ValueError) for e in errors)
+
+
+def test_not_a_cache():
+    flight = SingleFlight('test')
+    calls = []
+    assert flight.do('k', lambda: calls.append(1) or len(calls)) == 1
+    assert flight.do('k', lambda: calls.append(1) or len(calls)) == 2
+    assert flight.in_flight() == 0
+
+
+def test_different_keys_run_separately():
+    flight = SingleFlight('test')
+    assert [flight.do(key, str.upper, key) for key in ('a', 'b')] == ['A', 'B']
+    with pytest.raises(KeyError):
+        flight.do('c', {}.__getitem__, 'x')
+    assert flight.in_flight() == 0
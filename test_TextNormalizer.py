@@ -0,0 +1,25 @@
+import pytest
+
+import TextNormalizer
+from TextNormalizerReference import CASES
+
+
+@pytest.mark.parametrize('case', sorted(CASES))
+def test_matches_reference_normalizer(case):
+    # Mesma saída das cadeias de regex que o TextNormalizer substituiu
+    make_inputs, name, reference = CASES[case]
+    normalize = getattr(TextNormalizer, name)
+    mismatches = [text for text in make_inputs() if normalize(text) != reference(text)]
+    assert mismatches == []
+
+
+@pytest.mark.parametrize('text, expected', [
+    ("  L’Été , c'est  ", "l'ete  c'est"),
+    ('Ça va?', 'ca va'),
+])
+def test_normalize_text(text, expected):
+    assert TextNormalizer.normalize_text(text) == expected
+
+
+def test_normalize_french_pronunciation():
+    assert TextNormalizer.normalize_french_pronunciation('Jambon') == 'ʒɑ̃bɔ̃'
@@ -0,0 +1,27 @@
+import pytest
+
+from TextPipeline import convert_pronunciation_to_portuguese, transliterate_and_convert_sentence
+
+
+@pytest.mark.parametrize('word, expected', [
+    ('bonjour', 'bõjur'),
+    ('faisant', 'fézã'),
+    ('maison', 'mézõ'),
+    ('train', 'tʀẽ'),
+    ('chacun', 'chaquũ'),
+    ('aucun', 'ôquũ'),
+    ('possède', 'pózèd'),
+])
+def test_transliteration(word, expected):
+    assert transliterate_and_convert_sentence(word) == expected
+
+
+def test_s_between_vowel_and_nasal_is_voiced():
+    assert convert_pronunciation_to_portuguese('fəsɑ̃') == 'fezã'
+    assert convert_pronunciation_to_portuguese('ɑ̃sa') == 'ãsa'
+
+
+def test_context_looks_at_the_base_of_the_next_phoneme():
+    # œ̃ é vogal anterior como œ; ə̀ (marca combinante) é vogal como ə
+    assert convert_pronunciation_to_portuguese('ʃakœ̃') == 'chaquũ'
+    assert convert_pronunciation_to_portuguese('pɔs\u0259\u0300d') == 'pózèd'
@@ -0,0 +1,54 @@
+import pytest
+
+import TextRoutes
+from main_text import app
+
+
+@pytest.fixture
+def client():
+    return app.test_client()
+
+
+def test_get_pronounce_is_cacheable(client):
+    response = client.get('/pronounce', query_string={'text': 'bonjour'})
+    assert response.status_code == 200
+    assert response.get_json() == {'pronunciations': 'bõjur'}
+    assert response.headers['ETag'].startswith('"') and not response.headers['ETag'].startswith('W/')
+    assert response.cache_control.public
+    assert response.cache_control.max_age == TextRoutes.TEXT_MAX_AGE_SECONDS
+
+
+def test_if_none_match_returns_304_without_computing(client, monkeypatch):
+    etag = client.get('/pronounce', query_string={'text': 'bonjour'}).headers['ETag']
+    calls = []
+    monkeypatch.setattr(TextRoutes, 'transliterate_and_convert_sentence', lambda text: calls.append(text))
+    response = client.get('/pronounce', query_string={'text': 'bonjour'}, headers={'If-None-Match': etag})
+    assert response.status_code == 304
+    assert response.data == b''
+    assert response.headers['ETag'] == etag
+    assert calls == []
+
+
+def test_etag_ignores_trivial_variations(client):
+    etag = client.get('/pronounce', query_string={'text': 'Bonjour le monde'}).headers['ETag']
+    assert client.get('/pronounce', query_string={'text': '  Bonjour   le monde '}).headers['ETag'] == etag
+    assert client.get('/pronounce', query_string={'text': 'Bonjour monde'}).headers['ETag'] != etag
+
+
+def test_etag_differs_by_route(client):
+    pronounce = client.get('/pronounce', query_string={'text': 'bonjour'}).headers['ETag']
+    hints = client.get('/hints', query_string={'text': 'bonjour'})
+    assert hints.status_code == 200
+    assert hints.headers['ETag'] != pronounce
+
+
+@pytest.mark.parametrize('path', ['/pronounce', '/hints'])
+def test_get_without_text(client, path):
+    assert client.get(path, query_string={'text': '   '}).status_code == 400
+
+
+def test_post_pronounce_unchanged(client):
+    response = client.post('/pronounce', data={'text': 'bonjour'})
+    assert response.status_code == 200
+    assert response.get_json() == {'pronunciations': 'bõjur'}
+    assert 'ETag' not in response.headers
@@ -0,0 +1,51 @@
+import os
+
+import pytest
+
+from TextToSpeech import SyntheticEngine, TtsCache, TtsError
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return TtsCache(SyntheticEngine(), directory=str(tmp_path), max_bytes=10 ** 9)
+
+
+def test_same_text_synthesized_once(cache):
+    path, key, hit = cache.get('Bonjour  le monde ')
+    assert not hit
+    assert cache.get('Bonjour le monde') == (path, key, True)
+    assert os.path.basename(path) == key + '.wav'
+
+
+def test_key_depends_on_voice_and_speed(cache):
+    assert cache.key('Bonjour') != cache.key('Bonjour', speed=1.5)
+    assert cache.key('Bonjour', speed=1) == cache.key('Bonjour', speed=1.0)
+
+
+def test_unsupported_voice_rejected(cache):
+    with pytest.raises(TtsError):
+        cache.key('Bonjour', voice='../../etc')
+    with pytest.raises(TtsError):
+        cache.get('Bonjour', voice='en')
+    assert cache.stats()['entries'] == 0
+
+
+def test_lru_eviction(cache):
+    first, _, _ = cache.get('aaaaaaaaaa')
+    size = os.path.getsize(first)
+    cache.max_bytes = 2 * size + 1
+    second, _, _ = cache.get('bbbbbbbbbb')
+    cache.get('aaaaaaaaaa')                 # 'a' passa a ser o mais recente
+    third, _, _ = cache.get('cccccccccc')
+    assert os.path.exists(first) and os.path.exists(third)
+    assert not os.path.exists(second)
+    assert cache.stats() == {'entries': 2, 'bytes': 2 * size, 'max_bytes': 2 * size + 1}
+
+
+def test_index_rebuilt_from_disk_and_bounded(cache, tmp_path):
+    for text in ('aaaaaaaaaa', 'bbbbbbbbbb', 'cccccccccc'):
+        path, _, _ = cache.get(text)
+    size = os.path.getsize(path)
+    reopened = TtsCache(SyntheticEngine(), directory=str(tmp_path), max_bytes=size)
+    assert reopened.stats()['entries'] == 1
+    assert len(os.listdir(tmp_path)) == 1
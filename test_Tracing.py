@@ -0,0 +1,125 @@
+import json
+import threading
+
+import pytest
+from flask import Flask, jsonify
+
+import Tracing
+
+
+class _ListExporter:
+    def __init__(self):
+        self.spans = []
+
+    def export(self, spans):
+        self.spans.extend(spans)
+
+
+def _read(path):
+    with open(path, encoding='utf-8') as f:
+        return [json.loads(line) for line in f]
+
+
+def test_span_outside_a_trace_is_null():
+    assert Tracing.span('etapa', x=1) is Tracing.NULL_SPAN
+    with Tracing.span('etapa') as s:
+        s.set(y=2)
+    Tracing.annotate(z=3)
+    fn = len
+    assert Tracing.bind(fn) is fn
+
+
+def test_child_spans_and_annotations():
+    exporter = _ListExporter()
+    trace = Tracing.Trace('t1', exporter)
+    with Tracing.Span(trace, 'root') as root:
+        with Tracing.span('child', engine='dtw') as child:
+            Tracing.annotate(fallback=True)
+        with pytest.raises(ValueError):
+            with Tracing.span('failing'):
+                raise ValueError('falhou')
+    assert exporter.spans == []                      # gravados juntos ao terminar
+    trace.finish()
+    by_name = {s.name: s for s in exporter.spans}
+    assert by_name['child'].parent_id == root.span_id
+    assert by_name['child'].attrs == {'engine': 'dtw', 'fallback': True}
+    assert by_name['failing'].attrs == {'error': 'ValueError'}
+    assert by_name['root'].parent_id is None
+    assert child.as_dict()['trace_id'] == 't1'
+
+
+def test_late_span_is_exported_on_its_own():
+    exporter = _ListExporter()
+    trace = Tracing.Trace('t2', exporter)
+    trace.finish()
+    with Tracing.Span(trace, 'late'):
+        pass
+    assert [s.name for s in exporter.spans] == ['late']
+
+
+def test_bind_carries_the_parent_to_another_thread():
+    exporter = _ListExporter()
+    trace = Tracing.Trace('t3', exporter)
+
+    def work():
+        with Tracing.span('asr_forward'):
+            pass
+
+    with Tracing.Span(trace, 'root') as root:
+        thread = threading.Thread(target=Tracing.bind(work), name='asr-worker-0')
+        thread.start()
+        thread.join(5)
+    trace.finish()
+    worker = next(s for s in exporter.spans if s.name == 'asr_forward')
+    assert worker.parent_id == root.span_id
+    assert worker.thread == 'asr-worker-0'
+
+
+def test_jsonl_exporter(tmp_path):
+    path = tmp_path / 'sub' / 'traces.jsonl'
+    trace = Tracing.Trace('t4', Tracing.JsonlExporter(str(path)))
+    with Tracing.Span(trace, 'root', attrs={'path': '/upload'}):
+        pass
+    trace.finish()
+    [line] = _read(path)
+    assert line['trace_id'] == 't4' and line['name'] == 'root'
+    assert line['attrs'] == {'path': '/upload'} and line['duration_ms'] >= 0
+
+
+@pytest.fixture
+def traced_app(tmp_path, monkeypatch):
+    path = tmp_path / 'traces.jsonl'
+    monkeypatch.setattr(Tracing, 'exporter', Tracing.JsonlExporter(str(path)))
+    monkeypatch.setattr(Tracing, 'TRACE_ADMIN_TOKEN', 'segredo')
+    monkeypatch.setattr(Tracing, 'TRACE_SAMPLE_RATE', 0.0)
+
+    app = Flask(__name__)
+
+    @app.route('/upload', methods=['POST'])
+    @Tracing.traced('upload')
+    def upload():
+        with Tracing.span('asr_forward'):
+            pass
+        return jsonify({'ok': True}), 201
+
+    return app.test_client(), path
+
+
+def test_traced_view_with_admin_token(traced_app):
+    client, path = traced_app
+    response = client.post('/upload', headers={'X-Trace': 'segredo', 'X-Request-Id': 'req-42'})
+    assert response.status_code == 201
+    assert response.headers['X-Trace-Id'] == 'req-42'
+    spans = {s['name']: s for s in _read(path)}
+    assert set(spans) == {'upload', 'asr_forward'}
+    assert spans['upload']['attrs'] == {'method': 'POST', 'path': '/upload', 'status': 201}
+    assert spans['asr_forward']['parent_id'] == spans['upload']['span_id']
+    assert {s['trace_id'] for s in spans.values()} == {'req-42'}
+
+
+def test_unsampled_view_writes_nothing(traced_app):
+    client, path = traced_app
+    response = client.post('/upload', headers={'X-Trace': 'errado'})
+    assert response.status_code == 201
+    assert len(response.headers['X-Trace-Id']) == 32     # uuid4 novo
+    assert not path.exists()
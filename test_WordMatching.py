@@ -0,0 +1,63 @@
+import Metrics
+import WordMatching
+from benchmarks.synthetic import corpus_words, asr_like_alignment
+
+SENTENCE = "Le petit chat est sur la table de la cuisine".split()
+
+
+def _fastpath(result):
+    return Metrics.ALIGNMENT_FASTPATH.value(result=result)
+
+
+def test_exact_transcription_skips_the_solver():
+    before = _fastpath('exact')
+    estimated = [w.upper() + '.' for w in SENTENCE]     # caixa e pontuação não contam
+    mapped, indices = WordMatching.get_best_mapped_words(estimated, SENTENCE)
+    assert (mapped, indices) == (estimated, list(range(len(SENTENCE))))
+    assert _fastpath('exact') == before + 1
+
+
+def test_one_wrong_word_only_aligns_the_middle():
+    before = _fastpath('trimmed')
+    estimated = list(SENTENCE)
+    estimated[4] = 'sous'
+    mapped, indices = WordMatching.get_best_mapped_words(estimated, SENTENCE)
+    assert _fastpath('trimmed') == before + 1
+    assert indices == list(range(len(SENTENCE)))
+    assert mapped == estimated
+
+
+def test_missing_word_in_the_middle():
+    estimated = SENTENCE[:4] + SENTENCE[5:]
+    mapped, indices = WordMatching.get_best_mapped_words(estimated, SENTENCE)
+    assert len(mapped) == len(SENTENCE)
+    assert indices[:4] == [0, 1, 2, 3]
+    assert indices[5:] == list(range(4, len(estimated)))
+
+
+def test_find_anchors_are_increasing_and_equal():
+    real = "a b c d e f".split()
+    estimated = "a x c d y f".split()
+    anchors = WordMatching.find_anchors(estimated, real)
+    assert anchors == [(0, 0), (2, 2), (3, 3), (5, 5)]
+    assert all(real[i] == estimated[j] for i, j in anchors)
+
+
+def test_anchored_alignment_of_a_long_passage():
+    words_real = corpus_words(limit=500)
+    words_estimated, truth = asr_like_alignment(words_real)
+    mapped, indices = WordMatching.get_anchored_mapped_words(words_estimated, words_real)
+    assert len(mapped) == len(indices) == len(words_real)
+    kept = [(got, expected) for got, expected in zip(indices, truth) if expected >= 0]
+    misaligned = sum(got != expected for got, expected in kept)
+    assert misaligned <= len(kept) // 100
+    matched = [j for j in indices if j >= 0]
+    assert matched == sorted(set(matched))
+
+
+def test_long_passage_goes_to_anchored_engine():
+    words_real = corpus_words(limit=WordMatching.LONG_PASSAGE_WORDS + 20)
+    words_estimated, _ = asr_like_alignment(words_real, seed=1)
+    before = Metrics.ALIGNMENT_RUNS.value(engine='anchored')
+    WordMatching.get_best_mapped_words(words_estimated, words_real)
+    assert Metrics.ALIGNMENT_RUNS.value(engine='anchored') == before + 1
@@ -0,0 +1,41 @@
+import pytest
+
+from WordMetrics import custom_edit_distance, hybrid_similarity
+
+
+@pytest.mark.parametrize('a, b, expected', [
+    ('bonjour', 'bonchour', 0.72),
+    ('soleil', 'solei', 0.91),
+    ('parlement', 'parliament', 0.83),
+    ('chien', 'gien', 0.7),
+    ('vent', 'van', 0.55),
+    ('rouge', 'rouje', 0.9),
+    ('intense', 'document', 0.16),
+    ('maison', 'maison', 1),
+])
+def test_word_scores(a, b, expected):
+    assert hybrid_similarity(a, b) == expected
+
+
+@pytest.mark.parametrize('a, b, expected', [
+    # Pronúncias aproximadas (saída de transliterate_and_convert_sentence, em NFC)
+    ('bõjur', 'bõchuʀ', 0.51),
+    ('sólej', 'sólei', 0.79),
+    ('paʀlemã', 'paʀljamã', 0.94),
+    ('chjẽ', 'jjẽ', 0.59),
+    ('ẽtãs', 'dóquumã', 0),
+])
+def test_pronunciation_scores(a, b, expected):
+    assert hybrid_similarity(a, b) == expected
+
+
+def test_combining_mark_counts_as_a_character():
+    # 'ɑ̃' é 'ɑ' + til: a distância para 'ɑ' é apagar o til
+    assert custom_edit_distance('ɑ̃', 'ɑ') == 1
+    assert custom_edit_distance('ʃa', 'ʒa') == 1
+    # Substituição comum (3) sai mais cara que apagar + inserir
+    assert custom_edit_distance('pa', 'ba') == 2
+
+
+def test_sh_zh_penalty():
+    assert hybrid_similarity('ʃat', 'ʒat') == 0.59